@@ -0,0 +1,71 @@
+""" Render time of the parse view for many small files: the original per-line QTextEdit.append against the
+batched QPlainTextEdit insertion used by the main window.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/parse_view.py [--files 10000] [--size 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+import main
+from parsing_tool.core import PARSE_SEPARATOR
+
+def make_files(count, size):
+    line = "2024-01-01 12:00:00 INFO worker started with id 42\n"
+    content = (line * (size // len(line) + 1))[:size]
+    return [(os.path.join("bench", f"file_{i:05d}.log"), content) for i in range(count)]
+
+def render_appends(app, files):
+    """ The original parseFiles: four QTextEdit.append calls per file """
+    view = QTextEdit()
+    view.setReadOnly(True)
+    view.show()
+    start = time.perf_counter()
+    view.clear()
+    view.append('#' * 50)
+    for file_path, content in files:
+        view.append(f"\n\n{'#' * 4} {os.path.basename(file_path)}:\n\n")
+        view.append(content)
+        view.append("\n")
+        view.append('#' * 50)
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    view.close()
+    return elapsed
+
+def render_batches(app, files):
+    """ The current parse view: one edit block per ParseWorker batch """
+    window = main.ParsingToolMainWindow()
+    window.show()
+    start = time.perf_counter()
+    window.textArea.setPlainText(PARSE_SEPARATOR)
+    batch_size = main.ParseWorker.BATCH_FILES
+    for first in range(0, len(files), batch_size):
+        window.appendParseEntries(files[first:first + batch_size])
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    window.close()
+    return elapsed
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--size', type=int, default=200, help="characters per file")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    files = make_files(args.files, args.size)
+    before = render_appends(app, files)
+    after = render_batches(app, files)
+    print(f"{args.files} files of {args.size} characters")
+    print(f"  QTextEdit.append per line: {before:8.2f}s")
+    print(f"  batched QPlainTextEdit:    {after:8.2f}s  ({before / after:.1f}x faster)")
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,190 @@
+""" Headless benchmark suite: drives the main window's scan, filter, parse and structure copy over a synthetic tree.
+
+    python benchmarks/suite.py [--tree /tmp/pt-bench] [--depth 3 --fanout 4 --files 50 ...] [--repeat 3]
+                               [--save-baseline NAME] [--compare NAME [--tolerance 0.2]]
+
+Runs on the Qt offscreen platform unless QT_QPA_PLATFORM says otherwise. Settings and caches go to a temporary
+folder, so runs neither touch nor depend on the user's. Baselines are kept in benchmarks/baselines/NAME.json;
+--compare exits with status 1 when a benchmark got slower than the baseline by more than the tolerance.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+BENCHMARK_HOME = tempfile.mkdtemp(prefix='parsing-tool-bench-')
+atexit.register(shutil.rmtree, BENCHMARK_HOME, True)
+os.environ.setdefault('PARSING_TOOL_CACHE_DIR', os.path.join(BENCHMARK_HOME, 'cache'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QSettings, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from synthetic import add_spec_arguments, generate_tree, spec_from_args
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+FILTER_TERMS = ('file_00', 'dir_2 log', 'fle01')
+
+def wait_until(app, done, timeout=600):
+    """ Processes events until done() holds """
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not finish in time")
+        app.processEvents()
+        time.sleep(0.001)
+
+def result_from_metrics(metrics):
+    return {
+        'seconds': metrics.wall_seconds,
+        'files': metrics.files,
+        'bytes': metrics.bytes,
+        'files_per_second': metrics.filesPerSecond,
+        'bytes_per_second': metrics.bytesPerSecond,
+        'peak_memory_bytes': metrics.peak_memory,
+        'phases': dict(metrics.phases),
+    }
+
+def bench_scan(app, window, tree):
+    window.selected_folder = tree
+    window.populateFileList(tree)
+    wait_until(app, lambda: window.scanWorker is None)
+    return result_from_metrics(window.metricsLog.last)
+
+def bench_filter(app, window, fuzzy):
+    window.searchModeCombo.setCurrentIndex(window.SEARCH_NAMES_FUZZY if fuzzy else window.SEARCH_NAMES)
+    total = len(window.fileListModel.store)
+    start = time.perf_counter()
+    for term in FILTER_TERMS:
+        window.searchBar.setText(term)
+        window.filterFileList()
+        wait_until(app, lambda: window.filterWorker is None)
+    window.searchBar.setText('')
+    window.filterFileList()
+    seconds = time.perf_counter() - start
+    files = total * len(FILTER_TERMS)
+    return {'seconds': seconds, 'files': files, 'bytes': 0, 'files_per_second': files / seconds if seconds else 0.0,
+            'bytes_per_second': 0.0, 'peak_memory_bytes': None, 'phases': {}}
+
+def bench_parse(app, window, cold):
+    if cold:
+        window.parseCache.clear()
+    window.fileList.clearSelection()
+    window.parseSelectedFolder()
+    wait_until(app, lambda: window.parseWorker is None and window.changedFilesWorker is None)
+    return result_from_metrics(window.metricsLog.last)
+
+def bench_structure(app, window):
+    window.copyFileStructure()
+    wait_until(app, lambda: window.structureWorker is None)
+    return result_from_metrics(window.metricsLog.last)
+
+def run_suite(tree, repeat):
+    """ {benchmark: result} keeping each benchmark's fastest run """
+    import main
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # Message boxes would block a headless run
+    for name in ('information', 'warning', 'critical'):
+        setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: QMessageBox.Ok))
+    window = main.ParsingToolMainWindow()
+    window.resize(1200, 800)
+    window.show()
+    benchmarks = (
+        ('scan', lambda: bench_scan(app, window, tree)),
+        ('filter', lambda: bench_filter(app, window, fuzzy=False)),
+        ('filter (fuzzy)', lambda: bench_filter(app, window, fuzzy=True)),
+        ('parse (cold cache)', lambda: bench_parse(app, window, cold=True)),
+        ('parse (warm cache)', lambda: bench_parse(app, window, cold=False)),
+        ('structure copy', lambda: bench_structure(app, window)),
+    )
+    results = {}
+    for _ in range(repeat):
+        for name, bench in benchmarks:
+            result = bench()
+            if name not in results or result['seconds'] < results[name]['seconds']:
+                results[name] = result
+    window.close()
+    return results
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<20} {'seconds':>9} {'files/s':>10} {'MB/s':>8} {'peak MB':>8}  vs baseline")
+    for name, result in results.items():
+        peak = result['peak_memory_bytes']
+        line = (f"{name:<20} {result['seconds']:>9.3f} {result['files_per_second']:>10.0f} "
+                f"{result['bytes_per_second'] / 1024 / 1024:>8.1f} {peak / 1024 / 1024 if peak else 0:>8.0f}")
+        base = (baseline or {}).get(name)
+        if base and base['seconds']:
+            line += f"  {(result['seconds'] / base['seconds'] - 1) * 100:+.0f}%"
+        print(line)
+
+def regressions(results, baseline, tolerance):
+    return [name for name, result in results.items()
+            if name in baseline and result['seconds'] > baseline[name]['seconds'] * (1 + tolerance)]
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def main_suite():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tree', default=os.path.join(tempfile.gettempdir(), 'parsing-tool-bench-tree'),
+                        help="where the synthetic tree is generated (reused across runs)")
+    add_spec_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown against the baseline")
+    parser.add_argument('--json', metavar='PATH', help="also write the results to PATH")
+    args = parser.parse_args()
+
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, os.path.join(BENCHMARK_HOME, 'settings'))
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, os.path.join(BENCHMARK_HOME, 'settings'))
+    spec = spec_from_args(args)
+    started = time.perf_counter()
+    files, size = generate_tree(args.tree, spec)
+    print(f"Tree {args.tree}: {spec.folderCount} folders, {files} files, {size / 1024 / 1024:.1f} MB "
+          f"(ready in {time.perf_counter() - started:.1f}s)")
+
+    results = run_suite(args.tree, args.repeat)
+    report = {
+        'created_at': time.time(),
+        'spec': spec.asDict(),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare), 'r', encoding='utf-8') as f:
+            baseline_report = json.load(f)
+        if baseline_report['spec'] != spec.asDict():
+            print(f"Warning: baseline {args.compare} was recorded on a different tree", file=sys.stderr)
+        baseline = baseline_report['results']
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path(args.save_baseline)}")
+    if baseline is not None:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(slower)}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main_suite())
@@ -0,0 +1,143 @@
+""" Reproducible synthetic folder trees for the benchmarks.
+
+    python benchmarks/synthetic.py /tmp/tree [--depth 3] [--fanout 4] [--files 50] [--sizes lognormal]
+
+The same parameters and seed always produce the same tree. A tree that was already generated with the same
+parameters is reused rather than written again.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+
+MARKER = '.synthetic-tree.json'
+SIZE_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+TEXT_EXTENSIONS = ('.log', '.txt', '.xml', '.csv')
+BINARY_EXTENSIONS = ('.bin', '.dat')
+
+LOG_WORDS = ('INFO', 'DEBUG', 'WARN', 'ERROR', 'worker', 'request', 'completed', 'started', 'queue', 'cache',
+             'timeout', 'retry', 'session', 'user', 'id', 'ms', 'bytes', 'connection', 'closed', 'opened')
+
+class TreeSpec:
+    """ Shape of a synthetic tree: depth levels below the root, fanout subfolders and files_per_dir files per folder """
+
+    def __init__(self, depth=3, fanout=4, files_per_dir=50, sizes='lognormal', mean_size=4096, max_size=1024 * 1024,
+                 binary_ratio=0.05, seed=1):
+        if sizes not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown size distribution: {sizes}")
+        self.depth = depth
+        self.fanout = fanout
+        self.files_per_dir = files_per_dir
+        self.sizes = sizes
+        self.mean_size = mean_size
+        self.max_size = max_size
+        self.binary_ratio = binary_ratio
+        self.seed = seed
+
+    def asDict(self):
+        return dict(vars(self))
+
+    @property
+    def folderCount(self):
+        return sum(self.fanout ** level for level in range(self.depth + 1))
+
+    @property
+    def fileCount(self):
+        return self.folderCount * self.files_per_dir
+
+    def fileSize(self, rng):
+        if self.sizes == 'fixed':
+            size = self.mean_size
+        elif self.sizes == 'uniform':
+            size = rng.randint(0, 2 * self.mean_size)
+        else:
+            # Median well below the mean, with a long tail of large files, like real log folders
+            sigma = 1.2
+            size = int(rng.lognormvariate(math.log(self.mean_size) - sigma * sigma / 2, sigma))
+        return max(0, min(size, self.max_size))
+
+def text_corpus(rng, size):
+    """ Log-like text that file contents are sliced from """
+    lines = []
+    length = 0
+    while length < size:
+        words = ' '.join(rng.choice(LOG_WORDS) for _ in range(rng.randint(4, 12)))
+        line = f"2024-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} {words} {rng.randint(0, 99999)}\n"
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines).encode('ascii')
+
+def generate_tree(root, spec):
+    """ Writes the tree described by spec under root (replacing a tree generated with other parameters).
+
+    Returns (files, bytes) written, or the totals recorded when an identical tree was already there.
+    """
+    marker = os.path.join(root, MARKER)
+    try:
+        with open(marker, 'r', encoding='utf-8') as f:
+            recorded = json.load(f)
+        if recorded['spec'] == spec.asDict():
+            return recorded['files'], recorded['bytes']
+    except (OSError, ValueError, KeyError):
+        pass
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+
+    rng = random.Random(spec.seed)
+    corpus = text_corpus(rng, min(spec.max_size, 4 * 1024 * 1024) * 2)
+    total_files = 0
+    total_bytes = 0
+    folders = [(root, 0)]
+    while folders:
+        folder, level = folders.pop()
+        for i in range(spec.files_per_dir):
+            size = spec.fileSize(rng)
+            if rng.random() < spec.binary_ratio:
+                name = f"blob_{i:04d}{rng.choice(BINARY_EXTENSIONS)}"
+                data = b'\0' + rng.randbytes(max(size - 1, 0))
+            else:
+                name = f"file_{i:04d}{rng.choice(TEXT_EXTENSIONS)}"
+                start = rng.randint(0, max(len(corpus) - size, 0))
+                data = corpus[start:start + size]
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(data)
+            total_files += 1
+            total_bytes += len(data)
+        if level < spec.depth:
+            for i in range(spec.fanout):
+                subfolder = os.path.join(folder, f"dir_{level + 1}_{i:03d}")
+                os.mkdir(subfolder)
+                folders.append((subfolder, level + 1))
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump({'spec': spec.asDict(), 'files': total_files, 'bytes': total_bytes}, f, indent=2)
+    return total_files, total_bytes
+
+def add_spec_arguments(parser):
+    parser.add_argument('--depth', type=int, default=3, help="folder levels below the root")
+    parser.add_argument('--fanout', type=int, default=4, help="subfolders per folder")
+    parser.add_argument('--files', type=int, default=50, dest='files_per_dir', help="files per folder")
+    parser.add_argument('--sizes', choices=SIZE_DISTRIBUTIONS, default='lognormal', help="file size distribution")
+    parser.add_argument('--mean-size', type=int, default=4096, help="mean file size in bytes")
+    parser.add_argument('--max-size', type=int, default=1024 * 1024, help="largest file size in bytes")
+    parser.add_argument('--binary-ratio', type=float, default=0.05, help="fraction of files that are binary")
+    parser.add_argument('--seed', type=int, default=1)
+
+def spec_from_args(args):
+    return TreeSpec(args.depth, args.fanout, args.files_per_dir, args.sizes, args.mean_size, args.max_size,
+                    args.binary_ratio, args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root')
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    spec = spec_from_args(args)
+    files, size = generate_tree(args.root, spec)
+    print(f"{args.root}: {spec.folderCount} folders, {files} files, {size / 1024 / 1024:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,902 @@
 import sys
 import os
+import time
+
+# Startup timing: everything from here to the end of the imports below counts as import time
+STARTUP_STARTED = time.perf_counter()
+
+if __name__ == '__main__' and len(sys.argv) > 1:
+    # Headless commands never load Qt
+    from parsing_tool.cli import COMMANDS, main as cli_main
+    if sys.argv[1] in COMMANDS:
+        sys.exit(cli_main(sys.argv[1:]))
+
+import json
+import re
+import shutil
+import threading
+from array import array
+from bisect import bisect_left
 from PyQt5 import QtGui
-from PyQt5.QtWidgets import (QApplication, QDialog, QLabel, QProgressBar, QWidget, QPushButton, QTextEdit, 
-                             QVBoxLayout, QHBoxLayout, QFileDialog, QListWidget, QTreeView, QSplitter,
-                             QMainWindow, QAction, QMessageBox, QLineEdit, QComboBox, QSystemTrayIcon, QMenu)
-from PyQt5.QtGui import QClipboard, QIcon
-from PyQt5.QtCore import QDir, QModelIndex, QUrl, Qt
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import (QApplication, QDialog, QLabel, QProgressBar, QWidget, QPushButton, QPlainTextEdit,
+                             QVBoxLayout, QHBoxLayout, QFileDialog, QListView, QAbstractItemView, QTreeView, QSplitter,
+                             QMainWindow, QAction, QMessageBox, QLineEdit, QComboBox, QSystemTrayIcon, QMenu,
+                             QAbstractScrollArea, QInputDialog, QCheckBox, QTextBrowser)
+from PyQt5.QtGui import (QClipboard, QIcon, QFontDatabase, QKeySequence, QPainter, QColor, QTextCharFormat,
+                         QTextCursor, QTextLayout)
+from PyQt5.QtCore import (QDir, QModelIndex, QUrl, Qt, QThread, QObject, QTimer, QFileSystemWatcher, pyqtSignal,
+                          QAbstractListModel, QItemSelection, QItemSelectionModel, QSortFilterProxyModel, QSettings)
 from PyQt5.Qt import QFileSystemModel
 
+from parsing_tool.core import (PARSE_SEPARATOR, iter_directory_listings, iter_directory_files,
+                               iter_files, format_parse_entry)
+from parsing_tool.dirindex import DirectoryIndex
+from parsing_tool.dirnames import DirectoryNameIndex, with_ancestors
+from parsing_tool.engine import ParseEngine
+from parsing_tool.export import compression_for_path, export_parse_output
+from parsing_tool.live import FolderSnapshot
+from parsing_tool.follow import FileFollower
+from parsing_tool.contentsearch import ContentIndex
+from parsing_tool.filtering import DEFAULT_FUZZY_LIMIT, filter_rows, parse_query, rank_rows
+from parsing_tool.pathstore import CompactPathStore
+from parsing_tool.preview import MappedTextFile
+from parsing_tool.spool import ParseSpool
+from parsing_tool.parsers import build_parser_set
+from parsing_tool.sniff import BinaryFileError, default_classifier
+from parsing_tool.engine import read_text_file
+from parsing_tool.ignore import IGNORE_FILES, IgnoreMatcher, split_patterns
+from parsing_tool.parsecache import ParseCache
+from parsing_tool.manifest import SnapshotManifest, diff_snapshot, format_deleted_files, snapshot_entries
+from parsing_tool.textsearch import compile_search, find_matches
+from parsing_tool.metrics import MetricsLog, OperationMetrics, format_bytes
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.archives import archive_lister, default_archive_index, split_member_path
+from parsing_tool.structure import LineCountCache, StructureOptions, StructureRenderer
+
+IMPORTS_FINISHED = time.perf_counter()
+
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(base_path, relative_path)
 
+class DirectoryScanWorker(QThread):
+    """ Walks a folder with os.scandir off the GUI thread and streams matching files in batches """
+    batchReady = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+    scanFinished = pyqtSignal(int, bool)
+
+    BATCH_SIZE = 500
+
+    def __init__(self, folder, extensions=None, lister=iter_directory_listings, parent=None, metrics=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.extensions = extensions
+        self.lister = lister
+        self.metrics = metrics or OperationMetrics("Scan")
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def run(self):
+        batch = []
+        dir_count = 0
+        file_count = 0
+        with self.metrics.phase('walk'):
+            for root, files in iter_directory_files(self.folder, self.extensions, self.isCancelled, self.lister):
+                dir_count += 1
+                file_count += len(files)
+                batch.extend(files)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.batchReady.emit(batch)
+                    self.progress.emit(dir_count, file_count)
+                    batch = []
+        if batch and not self._cancelled:
+            self.batchReady.emit(batch)
+        self.progress.emit(dir_count, file_count)
+        self.scanFinished.emit(file_count, self._cancelled)
+
+class ParseWorker(QThread):
+    """ Runs a ParseEngine off the GUI thread and hands files over in batches; the GUI acknowledges each batch
+    so rendering applies backpressure """
+    batchRead = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+    parseFinished = pyqtSignal(list, bool)
+
+    MAX_PENDING = 4
+    # A batch is handed over once it reaches either size, or after BATCH_INTERVAL seconds
+    BATCH_FILES = 250
+    BATCH_CHARS = 1024 * 1024
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, files, parent=None, reader=read_text_file):
+        """ files: the paths to parse, or walk(is_cancelled) returning them, which then runs on this thread """
+        super().__init__(parent)
+        self.files = files if callable(files) else list(files)
+        self.engine = ParseEngine(reader=reader)
+        self.skipped = 0
+        self._slots = threading.Semaphore(self.MAX_PENDING)
+
+    def cancel(self):
+        self.engine.cancel()
+        self._slots.release()
+
+    def isCancelled(self):
+        return self.engine.isCancelled()
+
+    def acknowledge(self):
+        self._slots.release()
+
+    def emitBatch(self, batch, done, total):
+        """ Hands batch to the GUI once a slot is free; returns False when cancelled meanwhile """
+        if batch:
+            while not self._slots.acquire(timeout=0.1):
+                if self.engine.isCancelled():
+                    return False
+            if self.engine.isCancelled():
+                return False
+            self.batchRead.emit(batch)
+        self.progress.emit(done, total)
+        return True
+
+    def run(self):
+        errors = []
+        if callable(self.files):
+            self.files = list(self.files(self.isCancelled))
+        total = len(self.files)
+        self.progress.emit(0, total)
+        done = 0
+        batch = []
+        batch_chars = 0
+        flushed = time.perf_counter()
+        cancelled = False
+        for index, file_path, content, error in self.engine.iterResults(self.files):
+            done += 1
+            if isinstance(error, BinaryFileError):
+                self.skipped += 1
+            elif error is not None:
+                errors.append((file_path, str(error)))
+            else:
+                batch.append((file_path, content))
+                batch_chars += len(content)
+            if (len(batch) >= self.BATCH_FILES or batch_chars >= self.BATCH_CHARS
+                    or time.perf_counter() - flushed >= self.BATCH_INTERVAL):
+                if not self.emitBatch(batch, done, total):
+                    cancelled = True
+                    break
+                batch = []
+                batch_chars = 0
+                flushed = time.perf_counter()
+        else:
+            cancelled = not self.emitBatch(batch, done, total) or done < total
+        self.parseFinished.emit(errors, cancelled)
+
+class ExportWorker(QThread):
+    """ Streams the parse output of files straight to a destination file off the GUI thread """
+    progress = pyqtSignal(int, int)
+    exportFinished = pyqtSignal(list, bool)
+
+    def __init__(self, files, destination, parent=None, metrics=None, parsers=None):
+        """ files: the paths to export, or walk(is_cancelled) returning them, which then runs on this thread """
+        super().__init__(parent)
+        self.files = files if callable(files) else list(files)
+        self.destination = destination
+        self.parsers = parsers
+        self.skipped = []
+        self.metrics = metrics or OperationMetrics("Export")
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def run(self):
+        errors = []
+        if callable(self.files):
+            self.files = list(self.files(self.isCancelled))
+            if self._cancelled:
+                self.exportFinished.emit(errors, True)
+                return
+        total = len(self.files)
+        self.progress.emit(0, total)
+        try:
+            with self.metrics.phase('export'):
+                export_parse_output(self.files, self.destination, compression_for_path(self.destination),
+                                    errors=errors, skipped=self.skipped, is_cancelled=self.isCancelled,
+                                    progress=lambda done: self.progress.emit(done, total), parsers=self.parsers)
+        except Exception as e:
+            errors.append((self.destination, str(e)))
+        if self._cancelled:
+            try:
+                os.remove(self.destination)
+            except OSError:
+                pass
+        self.exportFinished.emit(errors, self._cancelled)
+
+class TaskWorker(QThread):
+    """ Runs task(is_cancelled) off the GUI thread and hands its result back """
+    taskFinished = pyqtSignal(object)
+    taskFailed = pyqtSignal(str)
+    taskProgress = pyqtSignal(int)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def reportProgress(self, value):
+        self.taskProgress.emit(value)
+
+    def run(self):
+        try:
+            result = self.task(self.isCancelled)
+        except Exception as e:
+            if not self._cancelled:
+                self.taskFailed.emit(str(e))
+            return
+        if not self._cancelled:
+            self.taskFinished.emit(result)
+
+class LiveFolderWatcher(QObject):
+    """ Watches every directory under a folder and reports coalesced file additions and removals """
+    changesReady = pyqtSignal(list, list)
+    watchStarted = pyqtSignal(int, int)
+    watchFailed = pyqtSignal(str)
+
+    DEBOUNCE_MS = 300
+    MAX_DELAY_MS = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder = None
+        self.snapshot = None
+        self.watcher = None
+        self.snapshotWorker = None
+        self._dirty = set()
+        self._firstDirty = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def start(self, folder, lister=iter_directory_listings, prune=None):
+        self.stop()
+        self.folder = folder
+        snapshot = FolderSnapshot(folder, lister, prune)
+        self.snapshotWorker = TaskWorker(lambda is_cancelled: snapshot if snapshot.build(is_cancelled) else None,
+                                         self)
+        self.snapshotWorker.taskFinished.connect(self.onSnapshotReady)
+        self.snapshotWorker.taskFailed.connect(self.watchFailed)
+        self.snapshotWorker.finished.connect(self.snapshotWorker.deleteLater)
+        self.snapshotWorker.start()
+
+    def stop(self):
+        if self.snapshotWorker is not None:
+            self.snapshotWorker.cancel()
+            self.snapshotWorker = None
+        if self.watcher is not None:
+            self.watcher.directoryChanged.disconnect(self.onDirectoryChanged)
+            self.watcher.deleteLater()
+            self.watcher = None
+        self._timer.stop()
+        self._dirty.clear()
+        self._firstDirty = None
+        self.snapshot = None
+        self.folder = None
+
+    def isActive(self):
+        return self.folder is not None
+
+    def onSnapshotReady(self, snapshot):
+        if self.sender() is not self.snapshotWorker or snapshot is None:
+            return
+        self.snapshotWorker = None
+        self.snapshot = snapshot
+        self.watcher = QFileSystemWatcher(self)
+        directories = snapshot.directories()
+        failed = self.watcher.addPaths(directories) if directories else []
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self.watchStarted.emit(len(directories) - len(failed), len(failed))
+
+    def onDirectoryChanged(self, path):
+        self._dirty.add(path)
+        now = time.monotonic()
+        if self._firstDirty is None:
+            self._firstDirty = now
+        # Restart the debounce on every event, but never hold a batch longer than MAX_DELAY_MS
+        remaining = self.MAX_DELAY_MS - int((now - self._firstDirty) * 1000)
+        self._timer.start(max(0, min(self.DEBOUNCE_MS, remaining)))
+
+    def flush(self):
+        if self.snapshot is None or not self._dirty:
+            return
+        dirty = self._dirty
+        self._dirty = set()
+        self._firstDirty = None
+        changes = self.snapshot.refresh(dirty)
+        if changes.removed_dirs:
+            watched = set(self.watcher.directories())
+            stale = [path for path in changes.removed_dirs if path in watched]
+            if stale:
+                self.watcher.removePaths(stale)
+        if changes.added_dirs:
+            self.watcher.addPaths(changes.added_dirs)
+        if changes.added_files or changes.removed_files:
+            self.changesReady.emit(changes.added_files, changes.removed_files)
+
+class LogFollower(QObject):
+    """ Polls a FileFollower off the GUI thread and reports the lines appended to the followed files """
+    linesAppended = pyqtSignal(list)
+    pollFailed = pyqtSignal(str)
+
+    INTERVAL_MS = 1000
+    # The interval stretches so that polling (one stat per followed file) takes at most a tenth of the time
+    MAX_INTERVAL_MS = 30000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.follower = FileFollower()
+        self.worker = None
+        self.active = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.poll)
+
+    def start(self):
+        self.active = True
+        if self.worker is None:
+            self._timer.start(self.INTERVAL_MS)
+
+    def stop(self):
+        self.active = False
+        self._timer.stop()
+        self.discardPoll()
+
+    def clear(self):
+        """ Stops following every file; a poll already running is discarded """
+        self.follower.clear()
+        self.discardPoll()
+        if self.active:
+            self._timer.start(self.INTERVAL_MS)
+
+    def discardPoll(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    def poll(self):
+        if self.worker is not None or not self.active:
+            return
+        follower = self.follower
+
+        def pollFiles(is_cancelled):
+            started = time.perf_counter()
+            updates = follower.poll(is_cancelled)
+            return updates, time.perf_counter() - started
+
+        self.worker = TaskWorker(pollFiles, self)
+        self.worker.taskFinished.connect(self.onPolled)
+        self.worker.taskFailed.connect(self.onPollFailed)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def onPolled(self, result):
+        if self.sender() is not self.worker:
+            return
+        self.worker = None
+        updates, seconds = result
+        if updates:
+            self.linesAppended.emit(updates)
+        if self.active:
+            self._timer.start(max(self.INTERVAL_MS, min(self.MAX_INTERVAL_MS, int(seconds * 10000))))
+
+    def onPollFailed(self, error):
+        if self.sender() is not self.worker:
+            return
+        self.worker = None
+        self.pollFailed.emit(error)
+        if self.active:
+            self._timer.start(self.MAX_INTERVAL_MS)
+
+class FileListModel(QAbstractListModel):
+    """ Virtual list model over a CompactPathStore; filtering keeps an array of visible store rows """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = CompactPathStore()
+        self.generation = 0
+        self._filterText = ''
+        self._fuzzy = False
+        self._visible = None
+        # Fuzzy results are ranked rather than in store order; row lookups then go through a dict
+        self._ranked = False
+        self._visiblePositions = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) if self._visible is None else len(self._visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.store.path(self.sourceRow(index.row()))
+        return None
+
+    def sourceRow(self, row):
+        return row if self._visible is None else self._visible[row]
+
+    def visibleRow(self, source_row):
+        """ View row of a store row, or -1 when it is filtered out """
+        if self._visible is None:
+            return source_row if source_row < len(self.store) else -1
+        if self._ranked:
+            if self._visiblePositions is None:
+                self._visiblePositions = {row: position for position, row in enumerate(self._visible)}
+            return self._visiblePositions.get(source_row, -1)
+        row = bisect_left(self._visible, source_row)
+        if row < len(self._visible) and self._visible[row] == source_row:
+            return row
+        return -1
+
+    def filePath(self, row):
+        return self.store.path(self.sourceRow(row))
+
+    def isFiltered(self):
+        return bool(self._filterText.strip())
+
+    def clear(self):
+        self.beginResetModel()
+        self.store = CompactPathStore()
+        self.generation += 1
+        self._visible = array('I') if self.isFiltered() else None
+        self._visiblePositions = None
+        self.endResetModel()
+
+    def appendPaths(self, paths):
+        start = len(self.store)
+        self.store.extend(paths)
+        if self._visible is None:
+            count = len(self.store) - start
+            if count:
+                self.beginInsertRows(QModelIndex(), start, start + count - 1)
+                self.endInsertRows()
+        else:
+            rows = filter_rows(self.store, self._filterText, self._fuzzy, start)
+            if rows:
+                first = len(self._visible)
+                self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+                self._visible.extend(rows)
+                self._visiblePositions = None
+                self.endInsertRows()
+                if self._ranked:
+                    self._rerank()
+
+    def _rerank(self):
+        """ Moves appended fuzzy matches to their place in the ranking, keeping selections, then re-applies the cap """
+        ranked = rank_rows(self.store, self._filterText, self._visible, len(self._visible))
+        if ranked != self._visible:
+            self.layoutAboutToBeChanged.emit()
+            indexes = self.persistentIndexList()
+            source_rows = [self._visible[index.row()] for index in indexes]
+            self._visible = ranked
+            self._visiblePositions = None
+            self.changePersistentIndexList(indexes, [self.index(self.visibleRow(row)) for row in source_rows])
+            self.layoutChanged.emit()
+        if len(self._visible) > DEFAULT_FUZZY_LIMIT:
+            self.beginRemoveRows(QModelIndex(), DEFAULT_FUZZY_LIMIT, len(self._visible) - 1)
+            del self._visible[DEFAULT_FUZZY_LIMIT:]
+            self._visiblePositions = None
+            self.endRemoveRows()
+
+    def setFilter(self, text, fuzzy=False, rows=None, upto=0):
+        """ Applies a filter; rows may be a filter_rows result already computed for store rows below upto """
+        text = text.lower()
+        filtered = bool(text.strip())
+        # Fuzzy terms rank their matches; a filter of exclusions only keeps store order
+        ranked = fuzzy and bool(parse_query(text)[0])
+        if filtered or self.store.hasRemoved():
+            if rows is None:
+                upto = 0
+                rows = array('I')
+            if upto < len(self.store):
+                rows.extend(filter_rows(self.store, text, fuzzy, upto))
+                if ranked and upto:
+                    # Both parts are ranked on their own
+                    rows = rank_rows(self.store, text, rows)
+        else:
+            rows = None
+        self.beginResetModel()
+        self._filterText = text
+        self._fuzzy = fuzzy
+        self._ranked = ranked
+        self._visible = rows
+        self._visiblePositions = None
+        self.endResetModel()
+
+    def filterMatches(self, text, fuzzy=False):
+        return self._filterText == text.lower() and self._fuzzy == fuzzy
+
+    def removePaths(self, paths):
+        source_rows = sorted(row for row in map(self.store.findRow, paths) if row >= 0)
+        if not source_rows:
+            return
+        view_rows = sorted(row for row in map(self.visibleRow, source_rows) if row >= 0)
+        for row in source_rows:
+            self.store.remove(row)
+        if self._visible is None:
+            self._visible = array('I', range(len(self.store)))
+        self._visiblePositions = None
+        runs = []
+        for row in view_rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        if len(runs) > 100:
+            # Too scattered for row-by-row signals; rebuild the visible rows in one reset
+            self.setFilter(self._filterText, self._fuzzy)
+            return
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._visible[first:last + 1]
+            self.endRemoveRows()
+
+    def sourceRows(self, selection):
+        """ Store rows covered by a QItemSelection, in selection order """
+        rows = array('I')
+        for selection_range in selection:
+            if self._visible is None:
+                rows.extend(range(selection_range.top(), selection_range.bottom() + 1))
+            else:
+                rows.extend(self._visible[selection_range.top():selection_range.bottom() + 1])
+        return rows
+
+    def selectionForRows(self, source_rows):
+        """ QItemSelection of the visible rows among source_rows, merged into contiguous ranges """
+        selection = QItemSelection()
+        rows = sorted(row for row in map(self.visibleRow, source_rows) if row >= 0)
+        start = previous = None
+        for row in rows:
+            if start is None:
+                start = previous = row
+            elif row == previous + 1:
+                previous = row
+            else:
+                selection.select(self.index(start), self.index(previous))
+                start = previous = row
+        if start is not None:
+            selection.select(self.index(start), self.index(previous))
+        return selection
+
+class FolderFilterProxyModel(QSortFilterProxyModel):
+    """ Hides every folder outside an allowed set of paths; shows everything when the set is None """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._allowed = None
+
+    def setAllowedPaths(self, paths, root):
+        if paths is None:
+            self._allowed = None
+        else:
+            self._allowed = {QDir.cleanPath(QDir.fromNativeSeparators(path)) for path in paths}
+            # The tree root and everything above it must stay visible for the view to show anything
+            path = QDir.cleanPath(root)
+            while True:
+                self._allowed.add(path)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._allowed is None:
+            return True
+        model = self.sourceModel()
+        return model.filePath(model.index(source_row, 0, source_parent)) in self._allowed
+
+class PagedTextView(QAbstractScrollArea):
+    """ Read-only viewer that paints only the visible lines of a MappedTextFile """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.highlightPattern = None
+        self._lineCount = 0
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.verticalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(self.fontMetrics().horizontalAdvance(' ') * 4)
+        goToLineAction = QAction('Go to Line...', self)
+        goToLineAction.setShortcut(QKeySequence('Ctrl+G'))
+        goToLineAction.setShortcutContext(Qt.WidgetWithChildrenShortcut)
+        goToLineAction.triggered.connect(self.askGoToLine)
+        self.addAction(goToLineAction)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+    def setDocument(self, document):
+        self.document = document
+        self._lineCount = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.refreshLineCount()
+
+    def setHighlightPattern(self, pattern):
+        """ Compiled pattern whose matches are highlighted on the painted lines, or None """
+        self.highlightPattern = pattern
+        self.viewport().update()
+
+    def refreshLineCount(self):
+        """ Picks up lines indexed since the last call """
+        self._lineCount = self.document.lineCount() if self.document is not None else 0
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def visibleLineCount(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    def gutterWidth(self):
+        return self.fontMetrics().horizontalAdvance(str(max(self._lineCount, 1))) + 12
+
+    def updateScrollBars(self):
+        page = self.visibleLineCount()
+        self.verticalScrollBar().setPageStep(page)
+        self.verticalScrollBar().setRange(0, max(0, min(self._lineCount - page, 2**31 - 1)))
+        char_width = self.fontMetrics().horizontalAdvance(' ')
+        text_width = MappedTextFile.MAX_LINE_BYTES * char_width if self.document is not None else 0
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+        self.horizontalScrollBar().setRange(0, max(0, text_width - self.viewport().width() + self.gutterWidth()))
+
+    def goToLine(self, line):
+        """ Scrolls so that line (1-based) is the first visible one """
+        self.verticalScrollBar().setValue(line - 1)
+
+    def askGoToLine(self):
+        if self.document is None:
+            return
+        line, ok = QInputDialog.getInt(self, "Go to Line", f"Line (1 - {self._lineCount}):",
+                                       self.verticalScrollBar().value() + 1, 1, max(1, min(self._lineCount, 2**31 - 1)))
+        if ok:
+            self.goToLine(line)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), self.palette().base())
+        if self.document is None:
+            return
+        metrics = self.fontMetrics()
+        spacing = metrics.lineSpacing()
+        gutter = self.gutterWidth()
+        first = self.verticalScrollBar().value()
+        x = gutter - self.horizontalScrollBar().value()
+        painter.fillRect(0, 0, gutter - 6, self.viewport().height(), self.palette().alternateBase())
+        painter.setClipRect(gutter, 0, self.viewport().width() - gutter, self.viewport().height())
+        lines = self.document.lines(first, self.visibleLineCount() + 1)
+        for offset, text in enumerate(lines):
+            top = offset * spacing
+            if self.highlightPattern is not None:
+                for m in self.highlightPattern.finditer(text):
+                    start = x + metrics.horizontalAdvance(text[:m.start()])
+                    painter.fillRect(start, top, metrics.horizontalAdvance(m.group()), spacing, Qt.yellow)
+            painter.drawText(x, top + metrics.ascent(), text)
+        painter.setClipping(False)
+        painter.setPen(self.palette().placeholderText().color())
+        for offset in range(len(lines)):
+            painter.drawText(0, offset * spacing, gutter - 10, spacing, Qt.AlignRight, str(first + offset + 1))
+
+class SearchHighlighter(QObject):
+    """ Highlights find-bar matches in a QPlainTextEdit, formatting only the blocks on screen.
+
+    Matches are located once over the plain text, up to MAX_MATCHES, and applied as QTextLayout formats the way
+    QSyntaxHighlighter applies them - but only to visible blocks as the view scrolls, so a large document is
+    neither highlighted block by block up front nor given character formats of its own.
+    """
+    # current match (-1 when none is selected), match count, whether the count was capped
+    matchesChanged = pyqtSignal(int, int, bool)
+
+    MAX_MATCHES = 10000
+    REFRESH_DEBOUNCE_MS = 300
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.pattern = None
+        self.starts = array('Q')
+        self.lengths = array('L')
+        self.capped = False
+        self.current = -1
+        # block number -> format signature of the blocks currently carrying highlight formats
+        self._formatted = {}
+        self.matchFormat = QTextCharFormat()
+        self.matchFormat.setBackground(QColor(Qt.yellow))
+        self.currentFormat = QTextCharFormat()
+        self.currentFormat.setBackground(QColor(255, 150, 50))
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.setInterval(self.REFRESH_DEBOUNCE_MS)
+        self.refreshTimer.timeout.connect(self.refresh)
+        editor.updateRequest.connect(self.highlightVisible)
+        editor.document().contentsChange.connect(self.onContentsChange)
+
+    def setPattern(self, pattern):
+        """ Highlights pattern's matches (None clears them) once typing pauses """
+        self.pattern = pattern
+        self.refreshTimer.start()
+
+    def onContentsChange(self, position, removed, added):
+        # Blocks were replaced, so recorded signatures no longer describe what is on screen
+        self._formatted.clear()
+        if self.pattern is not None or self.starts:
+            self.refreshTimer.start()
+
+    def refresh(self):
+        """ Finds the matches again and re-highlights the visible blocks """
+        self.refreshTimer.stop()
+        if self.pattern is not None:
+            self.starts, self.lengths, self.capped = find_matches(self.editor.toPlainText(), self.pattern,
+                                                                  self.MAX_MATCHES)
+        else:
+            self.starts, self.lengths, self.capped = array('Q'), array('L'), False
+        self.current = -1
+        self.clearFormats()
+        self.highlightVisible()
+        self.matchesChanged.emit(self.current, len(self.starts), self.capped)
+
+    def clearFormats(self):
+        document = self.editor.document()
+        for number in self._formatted:
+            block = document.findBlockByNumber(number)
+            if block.isValid():
+                block.layout().clearFormats()
+        self._formatted.clear()
+
+    def visibleBlocks(self):
+        block = self.editor.firstVisibleBlock()
+        offset = self.editor.contentOffset()
+        bottom = self.editor.viewport().height()
+        while block.isValid():
+            if self.editor.blockBoundingGeometry(block).translated(offset).top() > bottom:
+                break
+            yield block
+            block = block.next()
+
+    def highlightVisible(self, *args):
+        if not self.starts and not self._formatted:
+            return
+        visible = set()
+        for block in self.visibleBlocks():
+            number = block.blockNumber()
+            visible.add(number)
+            position = block.position()
+            first = bisect_left(self.starts, position)
+            last = bisect_left(self.starts, position + block.length())
+            signature = (first, last, self.current if first <= self.current < last else -1)
+            if self._formatted.get(number, (0, 0, -1)) == signature:
+                continue
+            ranges = []
+            for i in range(first, last):
+                format_range = QTextLayout.FormatRange()
+                format_range.start = self.starts[i] - position
+                format_range.length = min(self.lengths[i], block.length() - format_range.start)
+                format_range.format = self.currentFormat if i == self.current else self.matchFormat
+                ranges.append(format_range)
+            block.layout().setFormats(ranges)
+            if ranges:
+                self._formatted[number] = signature
+            else:
+                self._formatted.pop(number, None)
+        # Formats on blocks that scrolled away are dropped so only a screenful is ever formatted
+        document = self.editor.document()
+        for number in [number for number in self._formatted if number not in visible]:
+            block = document.findBlockByNumber(number)
+            if block.isValid():
+                block.layout().clearFormats()
+            del self._formatted[number]
+
+    def goTo(self, step):
+        """ Selects the next (step 1) or previous (step -1) match, starting from the cursor when none is current """
+        if not self.starts:
+            return
+        if self.current == -1:
+            position = self.editor.textCursor().position()
+            index = bisect_left(self.starts, position)
+            self.current = index % len(self.starts) if step > 0 else (index - 1) % len(self.starts)
+        else:
+            self.current = (self.current + step) % len(self.starts)
+        # The cursor is left unselected at the match so the current-match format is not painted over
+        cursor = QTextCursor(self.editor.document())
+        cursor.setPosition(self.starts[self.current])
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.highlightVisible()
+        self.matchesChanged.emit(self.current, len(self.starts), self.capped)
+
 class ParsingToolMainWindow(QMainWindow):
+    # Parse output entries tracked for live removal; beyond this the output is left as parsed
+    LIVE_PARSE_ENTRY_LIMIT = 5000
+    # Notes put in front of followed text after the file changed under the follower
+    FOLLOW_EVENTS = {
+        'rotated': "[File rotated - following the new file from its start]\n",
+        'truncated': "[File truncated - following it from its start]\n",
+        'missing': "[File removed - following resumes if it comes back]\n",
+    }
+    # Default memory budget for parse output; beyond it the output is spilled to a temporary file and paged from there
+    PARSE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+    # searchModeCombo entries
+    SEARCH_NAMES, SEARCH_NAMES_FUZZY, SEARCH_CONTENTS, SEARCH_CONTENTS_REGEX = range(4)
+
+    FILTER_DEBOUNCE_MS = 150
+    # Lists smaller than this are filtered directly on the GUI thread
+    FILTER_THREAD_THRESHOLD = 50000
+
+    FOLDER_SEARCH_DEBOUNCE_MS = 250
+    # Matching folders revealed in the tree; the status bar reports the full count
+    FOLDER_SEARCH_LIMIT = 500
+
+    # Files larger than this are previewed through the memory-mapped viewer instead of being loaded whole
+    PREVIEW_MAP_THRESHOLD = 4 * 1024 * 1024
+
     def __init__(self):
         super().__init__()
+        self.startupMetrics = OperationMetrics("Startup", started=STARTUP_STARTED)
+        self.startupMetrics.addPhase('import', IMPORTS_FINISHED - STARTUP_STARTED)
+        self.firstPainted = False
         try:
-            self.initUI()
+            with self.startupMetrics.phase('ui'):
+                self.initUI()
         except Exception as e:
             QMessageBox.critical(self, "Initialization Error", f"Error initializing UI: {str(e)}")
+        self.uiBuilt = time.perf_counter()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.firstPainted:
+            self.firstPainted = True
+            # Let the first frame reach the screen before the deferred setup runs
+            QTimer.singleShot(0, self.onFirstPaint)
+
+    def onFirstPaint(self):
+        """ Finishes the setup deferred past the first paint and records the startup timings """
+        try:
+            metrics = self.startupMetrics
+            metrics.addPhase('first paint', time.perf_counter() - self.uiBuilt)
+            with metrics.phase('folder model'):
+                self.ensureFolderModel()
+            with metrics.phase('tray'):
+                self.initSystemTray()
+            self.recordMetrics(metrics)
+            if os.environ.get('PARSING_TOOL_STARTUP_REPORT'):
+                print(json.dumps(metrics.asDict()), file=sys.stderr)
+        except Exception as e:
+            QMessageBox.critical(self, "Initialization Error", f"Error finishing startup: {str(e)}")
+
+    def showStartupTiming(self):
+        metrics = self.startupMetrics
+        if metrics.wall_seconds is None:
+            QMessageBox.information(self, "Startup Timing", "Startup has not finished yet.")
+            return
+        lines = [f"{name}: {seconds * 1000:.0f} ms" for name, seconds in metrics.phases.items()]
+        lines.append(f"total: {metrics.wall_seconds * 1000:.0f} ms (from the start of the imports)")
+        QMessageBox.information(self, "Startup Timing", "\n".join(lines))
 
     def initUI(self):
         try:
@@ -28,9 +904,6 @@ class ParsingToolMainWindow(QMainWindow):
             self.setWindowTitle('TSTP:Parsing Tool')
             self.setGeometry(100, 100, 1200, 800)
 
-            # Initialize System Tray
-            self.initSystemTray()
-
             # Central widget and main layout
             centralWidget = QWidget()
             self.setCentralWidget(centralWidget)
@@ -40,13 +913,25 @@ class ParsingToolMainWindow(QMainWindow):
             leftLayout = QVBoxLayout()
             self.folderSearchBar = QLineEdit()
             self.folderSearchBar.setPlaceholderText("Search folders...")
-            self.folderSearchBar.textChanged.connect(self.filterFolderTree)
+            self.folderSearchBar.textChanged.connect(self.scheduleFolderSearch)
+            self.folderSearchTimer = QTimer(self)
+            self.folderSearchTimer.setSingleShot(True)
+            self.folderSearchTimer.setInterval(self.FOLDER_SEARCH_DEBOUNCE_MS)
+            self.folderSearchTimer.timeout.connect(self.filterFolderTree)
+            self.folderNameIndex = None
+            self.folderIndexWorker = None
+            self.folderSearchWorker = None
+            self.settings = QSettings("TSTP", "ParsingTool")
+            # Folder search indexes every folder under the tree root, so the whole filesystem only when the user
+            # picks it (Options > Set Folder Tree Root)
+            self.folderRoot = self.settings.value("folderTreeRoot", QDir.homePath())
+            if not os.path.isdir(self.folderRoot):
+                self.folderRoot = QDir.homePath()
             self.folderView = QTreeView()
-            self.folderModel = QFileSystemModel()
-            self.folderModel.setRootPath(QDir.rootPath())
-            self.folderModel.setFilter(QDir.NoDotAndDotDot | QDir.AllDirs)
-            self.folderView.setModel(self.folderModel)
-            self.folderView.setRootIndex(self.folderModel.index(QDir.rootPath()))
+            # The file system model is created after the first paint (see ensureFolderModel)
+            self.folderModel = None
+            self.folderProxy = FolderFilterProxyModel(self)
+            self.folderView.setModel(self.folderProxy)
             self.folderView.clicked.connect(self.onFolderClicked)
             self.folderView.setHeaderHidden(True)
 
@@ -58,20 +943,76 @@ class ParsingToolMainWindow(QMainWindow):
             
             self.searchBar = QLineEdit()
             self.searchBar.setPlaceholderText("Search files...")
-            self.searchBar.textChanged.connect(self.filterFileList)
+            self.searchBar.textChanged.connect(self.scheduleFilter)
+            self.filterTimer = QTimer(self)
+            self.filterTimer.setSingleShot(True)
+            self.filterTimer.setInterval(self.FILTER_DEBOUNCE_MS)
+            self.filterTimer.timeout.connect(self.filterFileList)
+            self.filterWorker = None
+            # Glob list applied during the walk: "*.txt *.log" keeps only those, "!build/" prunes a directory
             self.fileTypeFilter = QComboBox()
+            self.fileTypeFilter.setEditable(True)
+            self.fileTypeFilter.setInsertPolicy(QComboBox.NoInsert)
             self.fileTypeFilter.addItem("All Files")
-            self.fileTypeFilter.addItem(".txt")
-            self.fileTypeFilter.addItem(".log")
-            self.fileTypeFilter.addItem(".xml")
-            self.fileTypeFilter.currentTextChanged.connect(self.filterFileList)
+            self.fileTypeFilter.addItem("*.txt")
+            self.fileTypeFilter.addItem("*.log")
+            self.fileTypeFilter.addItem("*.xml")
+            self.fileTypeFilter.addItem("*.txt *.log *.xml")
+            self.fileTypeFilter.lineEdit().setPlaceholderText("File globs, e.g. *.txt *.log !build/")
+            self.fileTypeFilter.activated.connect(self.applyFileTypeFilter)
+            self.fileTypeFilter.lineEdit().editingFinished.connect(self.applyFileTypeFilter)
+            self.appliedFileFilter = (self.fileFilterSpec(), True,
+                                      self.settings.value("browseArchives", True, type=bool))
+
+            self.searchModeCombo = QComboBox()
+            self.searchModeCombo.addItem("File Names")
+            self.searchModeCombo.addItem("File Names (Fuzzy)")
+            self.searchModeCombo.addItem("File Contents")
+            self.searchModeCombo.addItem("File Contents (Regex)")
+            self.searchModeCombo.setToolTip("Separate terms with spaces; prefix a term with - to exclude it")
+            self.searchModeCombo.currentIndexChanged.connect(self.onSearchModeChanged)
+            self.searchBar.returnPressed.connect(self.runContentSearch)
             
-            self.fileList = QListWidget()
-            self.fileList.setSelectionMode(QListWidget.MultiSelection)
-            self.fileList.itemSelectionChanged.connect(self.onFileSelectionChanged)
+            self.fileListModel = FileListModel(self)
+            self.fileList = QListView()
+            self.fileList.setModel(self.fileListModel)
+            self.fileList.setUniformItemSizes(True)
+            self.fileList.setSelectionMode(QAbstractItemView.MultiSelection)
+            self.fileList.selectionModel().selectionChanged.connect(self.onFileSelectionChanged)
             
-            self.textArea = QTextEdit()
+            self.textArea = QPlainTextEdit()
             self.textArea.setReadOnly(True)
+            # The view is only ever filled programmatically; an undo stack would keep a second copy of the output
+            self.textArea.setUndoRedoEnabled(False)
+            self.parseMemoryBudget = int(self.settings.value("parseMemoryBudget", self.PARSE_MEMORY_BUDGET))
+            # Backing file of parse output that outgrew parseMemoryBudget, shown through previewView
+            self.parseSpool = None
+            self.previewView = PagedTextView()
+            self.previewView.hide()
+            self.previewWorker = None
+
+            # Find bar for the output pane
+            self.findBar = QLineEdit()
+            self.findBar.setPlaceholderText("Find in output (Ctrl+F)...")
+            self.findBar.textChanged.connect(self.highlightSearchResults)
+            self.findBar.returnPressed.connect(self.findNext)
+            self.findCaseCheck = QCheckBox("Match case")
+            self.findCaseCheck.toggled.connect(self.highlightSearchResults)
+            self.findRegexCheck = QCheckBox("Regex")
+            self.findRegexCheck.toggled.connect(self.highlightSearchResults)
+            self.findPreviousButton = QPushButton("Previous")
+            self.findPreviousButton.clicked.connect(self.findPrevious)
+            self.findNextButton = QPushButton("Next")
+            self.findNextButton.clicked.connect(self.findNext)
+            self.findCountLabel = QLabel()
+            self.searchHighlighter = SearchHighlighter(self.textArea)
+            self.searchHighlighter.matchesChanged.connect(self.onFindMatchesChanged)
+            for text, shortcut, slot in (("Find", 'Ctrl+F', self.focusFindBar), ("Find Next", 'F3', self.findNext),
+                                         ("Find Previous", 'Shift+F3', self.findPrevious)):
+                findAction = QAction(text, self)
+                findAction.setShortcut(QKeySequence(shortcut))
+                findAction.triggered.connect(slot)
+                self.addAction(findAction)
 
             self.toggleSelectButton = QPushButton('Select All Files')
             self.toggleSelectButton.setCheckable(True)
@@ -95,12 +1036,54 @@ class ParsingToolMainWindow(QMainWindow):
             buttonLayout.addWidget(self.copyStructureButton)
             buttonLayout.addWidget(self.toggleSelectButton)
 
-            middleLayout.addWidget(self.searchBar)
+            searchLayout = QHBoxLayout()
+            searchLayout.addWidget(self.searchBar)
+            searchLayout.addWidget(self.searchModeCombo)
+            middleLayout.addLayout(searchLayout)
             middleLayout.addWidget(self.fileTypeFilter)
             middleLayout.addWidget(self.fileList)
             middleLayout.addWidget(self.textArea)
+            middleLayout.addWidget(self.previewView)
+            findLayout = QHBoxLayout()
+            findLayout.addWidget(self.findBar)
+            findLayout.addWidget(self.findCaseCheck)
+            findLayout.addWidget(self.findRegexCheck)
+            findLayout.addWidget(self.findPreviousButton)
+            findLayout.addWidget(self.findNextButton)
+            findLayout.addWidget(self.findCountLabel)
+            middleLayout.addLayout(findLayout)
             middleLayout.addLayout(buttonLayout)
 
+            # Status bar (last operation's metrics, scan progress)
+            self.metricsLabel = QLabel()
+            self.statusBar().addPermanentWidget(self.metricsLabel)
+            self.scanProgressBar = QProgressBar()
+            self.scanProgressBar.setRange(0, 0)
+            self.scanProgressBar.setMaximumWidth(150)
+            self.scanProgressBar.setVisible(False)
+            self.statusBar().addPermanentWidget(self.scanProgressBar)
+            self.scanWorker = None
+
+            self.parseProgressBar = QProgressBar()
+            self.parseProgressBar.setMaximumWidth(200)
+            self.parseProgressBar.setVisible(False)
+            self.statusBar().addPermanentWidget(self.parseProgressBar)
+            self.cancelParseButton = QPushButton('Cancel Parse')
+            self.cancelParseButton.clicked.connect(self.cancelParse)
+            self.cancelParseButton.setVisible(False)
+            self.statusBar().addPermanentWidget(self.cancelParseButton)
+            self.parseWorker = None
+
+            self.exportProgressBar = QProgressBar()
+            self.exportProgressBar.setMaximumWidth(200)
+            self.exportProgressBar.setVisible(False)
+            self.statusBar().addPermanentWidget(self.exportProgressBar)
+            self.cancelExportButton = QPushButton('Cancel Export')
+            self.cancelExportButton.clicked.connect(self.cancelExport)
+            self.cancelExportButton.setVisible(False)
+            self.statusBar().addPermanentWidget(self.cancelExportButton)
+            self.exportWorker = None
+
             # Add layouts to main layout
             splitter = QSplitter()
             folderWidget = QWidget()
@@ -128,6 +1111,10 @@ class ParsingToolMainWindow(QMainWindow):
             tutorialAction.triggered.connect(self.show_tutorial_dialog)
             helpMenu.addAction(tutorialAction)
 
+            startupTimingAction = QAction('Startup Timing', self)
+            startupTimingAction.triggered.connect(self.showStartupTiming)
+            helpMenu.addAction(startupTimingAction)
+
             # Options
             optionsMenu = menuBar.addMenu('Options')
             
@@ -142,6 +1129,10 @@ class ParsingToolMainWindow(QMainWindow):
             saveAction = QAction('Save', self)
             saveAction.triggered.connect(self.saveToFile)
             optionsMenu.addAction(saveAction)
+
+            exportAction = QAction('Export Directly...', self)
+            exportAction.triggered.connect(self.exportDirectly)
+            optionsMenu.addAction(exportAction)
             
             copyAction = QAction('Copy to Clipboard', self)
             copyAction.triggered.connect(self.copyToClipboard)
@@ -151,7 +1142,159 @@ class ParsingToolMainWindow(QMainWindow):
             copyStructureAction.triggered.connect(self.copyFileStructure)
             optionsMenu.addAction(copyStructureAction)
 
+            optionsMenu.addSeparator()
+
+            folderRootAction = QAction('Set Folder Tree Root...', self)
+            folderRootAction.triggered.connect(self.selectFolderTreeRoot)
+            optionsMenu.addAction(folderRootAction)
+
+            self.cacheListingsAction = QAction('Cache Folder Listings', self)
+            self.cacheListingsAction.setCheckable(True)
+            self.cacheListingsAction.setChecked(True)
+            optionsMenu.addAction(self.cacheListingsAction)
+
+            clearListingCacheAction = QAction('Clear Folder Listing Cache', self)
+            clearListingCacheAction.triggered.connect(self.clearDirectoryIndex)
+            optionsMenu.addAction(clearListingCacheAction)
+
+            self.persistentParseCacheAction = QAction('Persistent Parse Cache', self)
+            self.persistentParseCacheAction.setCheckable(True)
+            optionsMenu.addAction(self.persistentParseCacheAction)
+
+            clearParseCacheAction = QAction('Clear Parse Cache', self)
+            clearParseCacheAction.triggered.connect(self.clearParseCache)
+            optionsMenu.addAction(clearParseCacheAction)
+
+            parseCacheStatsAction = QAction('Parse Cache Statistics', self)
+            parseCacheStatsAction.triggered.connect(self.showParseCacheStats)
+            optionsMenu.addAction(parseCacheStatsAction)
+
+            self.changedOnlyAction = QAction('Parse Changed Files Only', self)
+            self.changedOnlyAction.setCheckable(True)
+            self.changedOnlyAction.setToolTip('Parse only files added or modified since the folder was last parsed')
+            optionsMenu.addAction(self.changedOnlyAction)
+
+            self.liveRefreshAction = QAction('Live Refresh', self)
+            self.liveRefreshAction.setCheckable(True)
+            self.liveRefreshAction.toggled.connect(self.toggleLiveRefresh)
+            optionsMenu.addAction(self.liveRefreshAction)
+
+            self.followAction = QAction('Follow Parsed Files', self)
+            self.followAction.setCheckable(True)
+            self.followAction.setToolTip('Append lines written to the parsed files since, like tail -f')
+            self.followAction.toggled.connect(self.toggleFollow)
+            optionsMenu.addAction(self.followAction)
+
+            self.respectIgnoreFilesAction = QAction('Respect .gitignore / .parsingignore', self)
+            self.respectIgnoreFilesAction.setCheckable(True)
+            self.respectIgnoreFilesAction.setChecked(True)
+            self.respectIgnoreFilesAction.toggled.connect(self.applyFileTypeFilter)
+            optionsMenu.addAction(self.respectIgnoreFilesAction)
+
+            self.browseArchivesAction = QAction('Browse Archives as Folders', self)
+            self.browseArchivesAction.setCheckable(True)
+            self.browseArchivesAction.setToolTip('List the files inside .zip and .tar archives and parse them in place')
+            self.browseArchivesAction.setChecked(self.settings.value("browseArchives", True, type=bool))
+            self.browseArchivesAction.toggled.connect(lambda checked: self.settings.setValue("browseArchives", checked))
+            self.browseArchivesAction.toggled.connect(self.applyFileTypeFilter)
+            optionsMenu.addAction(self.browseArchivesAction)
+
+            parseMemoryBudgetAction = QAction('Parse Memory Budget...', self)
+            parseMemoryBudgetAction.triggered.connect(self.selectParseMemoryBudget)
+            optionsMenu.addAction(parseMemoryBudgetAction)
+
+            formatMenu = optionsMenu.addMenu('Format Parsers')
+            self.formatParsersAction = QAction('Parse XML and Log Files by Format', self)
+            self.formatParsersAction.setCheckable(True)
+            self.formatParsersAction.setToolTip('Output only the XML elements and log records selected below')
+            self.formatParsersAction.setChecked(self.settings.value("formatParsers", False, type=bool))
+            self.formatParsersAction.toggled.connect(lambda checked: self.settings.setValue("formatParsers", checked))
+            formatMenu.addAction(self.formatParsersAction)
+            formatMenu.addSeparator()
+            for title, method in (('XML Paths...', self.selectXmlPaths), ('Log Levels...', self.selectLogLevels),
+                                  ('Log Time Range...', self.selectLogTimeRange), ('Log Pattern...', self.selectLogPattern)):
+                action = QAction(title, self)
+                action.triggered.connect(method)
+                formatMenu.addAction(action)
+
+            structureMenu = optionsMenu.addMenu('File Structure')
+            self.structureSortAction = QAction('Sort Entries', self)
+            self.structureSortAction.setCheckable(True)
+            self.structureSortAction.setChecked(self.settings.value("structureSort", True, type=bool))
+            self.structureSizesAction = QAction('Show File Sizes', self)
+            self.structureSizesAction.setCheckable(True)
+            self.structureSizesAction.setChecked(self.settings.value("structureSizes", False, type=bool))
+            self.structureLineCountsAction = QAction('Show Line Counts', self)
+            self.structureLineCountsAction.setCheckable(True)
+            self.structureLineCountsAction.setChecked(self.settings.value("structureLineCounts", False, type=bool))
+            for action, key in ((self.structureSortAction, "structureSort"), (self.structureSizesAction, "structureSizes"),
+                                (self.structureLineCountsAction, "structureLineCounts")):
+                action.toggled.connect(lambda checked, key=key: self.settings.setValue(key, checked))
+                structureMenu.addAction(action)
+            structureDepthAction = QAction('Maximum Depth...', self)
+            structureDepthAction.triggered.connect(self.selectStructureMaxDepth)
+            structureMenu.addAction(structureDepthAction)
+            structureEntriesAction = QAction('Entries per Folder...', self)
+            structureEntriesAction.triggered.connect(self.selectStructureMaxEntries)
+            structureMenu.addAction(structureEntriesAction)
+
+            self.profileOperationsAction = QAction('Profile Operations (cProfile)', self)
+            self.profileOperationsAction.setCheckable(True)
+            self.profileOperationsAction.setToolTip('Save a .prof file for every scan, parse, structure copy and save')
+            optionsMenu.addAction(self.profileOperationsAction)
+
+            dumpMetricsAction = QAction('Dump Performance Metrics...', self)
+            dumpMetricsAction.triggered.connect(self.dumpMetrics)
+            optionsMenu.addAction(dumpMetricsAction)
+
             self.selected_folder = None
+            self.contentIndex = None
+            self.contentIndexWorker = None
+            self.contentSearchWorker = None
+            self.contentIndexPending = False
+            self.parseSource = None
+            self.parseMetrics = None
+            self.scanMetrics = None
+            self.metricsLog = MetricsLog()
+            self.metricsLog.profiling = self.settings.value("profileOperations", False, type=bool)
+            self.profileOperationsAction.setChecked(self.metricsLog.profiling)
+            self.profileOperationsAction.toggled.connect(self.toggleProfiling)
+            self.parseSnapshot = None
+            self.parseSnapshotMessage = None
+            self.structureWorker = None
+            # Line counts survive between copies, so repeat copies only read files that changed
+            self.structureLineCounts = LineCountCache()
+            self.changedFilesWorker = None
+            self.parseEntryCursors = {}
+            # Live changes that arrived while a parse was running (ordered sets), applied when it finishes
+            self.pendingLiveAdded = {}
+            self.pendingLiveRemoved = {}
+            self.liveWatcher = LiveFolderWatcher(self)
+            self.liveWatcher.changesReady.connect(self.onLiveChanges)
+            self.liveWatcher.watchStarted.connect(self.onLiveWatchStarted)
+            self.liveWatcher.watchFailed.connect(self.onLiveWatchFailed)
+            self.logFollower = LogFollower(self)
+            self.logFollower.linesAppended.connect(self.onFollowedLines)
+            self.logFollower.pollFailed.connect(lambda error: self.statusBar().showMessage(f"Follow: {error}"))
+            # Whether the last parse read through the parse cache, whose entries tell how far each file was read
+            self.parseReadThroughCache = False
+            try:
+                self.directoryIndex = DirectoryIndex()
+            except Exception:
+                # Listing cache is optional; walks fall back to plain os.scandir
+                self.directoryIndex = None
+                self.cacheListingsAction.setEnabled(False)
+            self.parseCache = ParseCache()
+            self.parseCacheStats = self.parseCache.stats()
+            self.persistentParseCacheAction.setChecked(self.settings.value("persistentParseCache", False, type=bool))
+            self.togglePersistentParseCache(self.persistentParseCacheAction.isChecked())
+            self.persistentParseCacheAction.toggled.connect(self.togglePersistentParseCache)
+            try:
+                self.snapshotManifest = SnapshotManifest()
+            except Exception:
+                # Without a manifest store every parse is a full parse
+                self.snapshotManifest = None
+                self.changedOnlyAction.setEnabled(False)
         except Exception as e:
             QMessageBox.critical(self, "Initialization Error", f"Error initializing UI: {str(e)}")
 
@@ -206,17 +1349,31 @@ class ParsingToolMainWindow(QMainWindow):
 
     def onFolderClicked(self, index):
         try:
-            self.selected_folder = self.folderModel.filePath(index)
+            self.selected_folder = self.folderModel.filePath(self.folderProxy.mapToSource(index))
             self.populateFileList(self.selected_folder)
         except Exception as e:
             QMessageBox.critical(self, "Folder Selection Error", f"Error selecting folder: {str(e)}")
 
+    def ensureFolderModel(self):
+        """ Creates the folder tree's QFileSystemModel, which starts reading the tree root as soon as it exists """
+        if self.folderModel is not None:
+            return
+        self.folderModel = QFileSystemModel(self)
+        self.folderModel.setRootPath(self.folderRoot)
+        self.folderModel.setFilter(QDir.NoDotAndDotDot | QDir.AllDirs)
+        self.folderProxy.setSourceModel(self.folderModel)
+        self.folderView.setRootIndex(self.folderProxy.mapFromSource(self.folderModel.index(self.folderRoot)))
+
     def selectFolder(self):
         try:
-            folder = QFileDialog.getExistingDirectory(self, "Select Directory")
+            folder = QFileDialog.getExistingDirectory(self, "Select Directory", self.selected_folder or self.folderRoot)
             if folder:
+                self.ensureFolderModel()
+                if not self.isUnderFolderRoot(folder):
+                    # Keep the chosen folder in the tree; it becomes the last-used root
+                    self.setFolderTreeRoot(folder)
                 self.selected_folder = folder
-                index = self.folderModel.index(folder)
+                index = self.folderProxy.mapFromSource(self.folderModel.index(folder))
                 self.folderView.setCurrentIndex(index)
                 self.populateFileList(folder)
         except Exception as e:
@@ -224,163 +1381,1254 @@ class ParsingToolMainWindow(QMainWindow):
 
     def populateFileList(self, folder):
         try:
-            self.fileList.clear()
-            for root, dirs, files in os.walk(folder):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if self.filterFileType(file):
-                        self.fileList.addItem(file_path)
-            self.filterFileList()
+            self.cancelScan()
+            self.fileListModel.clear()
+            self.scanMetrics = self.metricsLog.start("Scan")
+            self.scanWorker = DirectoryScanWorker(folder, lister=self.directoryLister(folder), parent=self,
+                                                  metrics=self.scanMetrics)
+            self.scanWorker.batchReady.connect(self.onScanBatch)
+            self.scanWorker.progress.connect(self.onScanProgress)
+            self.scanWorker.scanFinished.connect(self.onScanFinished)
+            self.scanWorker.finished.connect(self.scanWorker.deleteLater)
+            self.scanProgressBar.setVisible(True)
+            self.statusBar().showMessage(f"Scanning {folder}...")
+            self.scanWorker.start()
+            if self.liveRefreshAction.isChecked():
+                self.liveWatcher.start(folder, self.directoryLister(folder, archives=False),
+                                       self.fileMatcher(folder).prune)
+            if self.isContentSearchMode():
+                self.updateContentIndex()
         except Exception as e:
             QMessageBox.critical(self, "File Population Error", f"Error populating file list: {str(e)}")
 
+    def cancelScan(self):
+        if self.scanWorker is not None:
+            self.scanWorker.cancel()
+            self.scanWorker = None
+            self.scanProgressBar.setVisible(False)
+
+    def onScanBatch(self, batch):
+        try:
+            if self.sender() is not self.scanWorker:
+                return
+            with self.scanMetrics.phase('list'):
+                self.fileListModel.appendPaths(batch)
+        except Exception as e:
+            QMessageBox.critical(self, "File Population Error", f"Error populating file list: {str(e)}")
+
+    def onScanProgress(self, dir_count, file_count):
+        if self.sender() is self.scanWorker:
+            self.statusBar().showMessage(f"Scanning... {dir_count} folders, {file_count} files")
+
+    def onScanFinished(self, file_count, cancelled):
+        if self.sender() is not self.scanWorker:
+            return
+        self.scanWorker = None
+        self.scanProgressBar.setVisible(False)
+        self.statusBar().showMessage(f"{file_count} files")
+        self.recordMetrics(self.scanMetrics, files=file_count, cancelled=cancelled)
+
+    def closeEvent(self, event):
+        self.cancelScan()
+        self.cancelParse()
+        self.cancelExport()
+        self.liveWatcher.stop()
+        self.logFollower.stop()
+        self.cancelFolderSearch(cancel_index=True)
+        self.closePreview()
+        for worker in (self.findChildren(DirectoryScanWorker) + self.findChildren(ParseWorker)
+                       + self.findChildren(ExportWorker) + self.findChildren(TaskWorker)):
+            worker.cancel()
+            worker.wait()
+        super().closeEvent(event)
+
+    def toggleLiveRefresh(self, enabled):
+        try:
+            if enabled and self.selected_folder and os.path.isdir(self.selected_folder):
+                self.liveWatcher.start(self.selected_folder, self.directoryLister(archives=False),
+                                       self.fileMatcher(self.selected_folder).prune)
+            elif not enabled:
+                self.liveWatcher.stop()
+                self.parseEntryCursors.clear()
+        except Exception as e:
+            QMessageBox.critical(self, "Live Refresh Error", f"Error toggling live refresh: {str(e)}")
+
+    def onLiveWatchStarted(self, watched, failed):
+        message = f"Live refresh: watching {watched} folders"
+        if failed:
+            message += f" ({failed} could not be watched; raise the OS watch limit)"
+        self.statusBar().showMessage(message)
+
+    def onLiveWatchFailed(self, error):
+        QMessageBox.warning(self, "Live Refresh Error", f"Error watching folder: {error}")
+
+    def onLiveChanges(self, added, removed):
+        try:
+            if self.liveWatcher.folder != self.selected_folder:
+                return
+            matcher = self.fileMatcher(self.liveWatcher.folder)
+            store = self.fileListModel.store
+            added = [path for path in added if matcher.accepts(path)]
+            self.fileListModel.removePaths(removed)
+            self.fileListModel.appendPaths([path for path in added if store.findRow(path) < 0])
+            self.updateLiveParseOutput(added, removed)
+            if self.contentIndex is not None and self.contentIndex.folder == self.selected_folder:
+                self.updateContentIndex()
+            self.statusBar().showMessage(f"Live refresh: {len(added)} added, {len(removed)} removed")
+        except Exception as e:
+            QMessageBox.critical(self, "Live Refresh Error", f"Error applying folder changes: {str(e)}")
+
+    def toggleFollow(self, enabled):
+        try:
+            if enabled:
+                self.logFollower.start()
+                self.statusBar().showMessage(f"Following {len(self.logFollower.follower)} files")
+            else:
+                self.logFollower.stop()
+        except Exception as e:
+            QMessageBox.critical(self, "Follow Error", f"Error toggling follow mode: {str(e)}")
+
+    def followParsedFiles(self, files):
+        """ Follows files from where the parse read up to (their end at the next poll when that is not known) """
+        follower = self.logFollower.follower
+        for file_path in files:
+            if split_member_path(file_path) is not None:
+                # Archive members are not appended to in place
+                continue
+            entry = self.parseCache.entry(file_path) if self.parseReadThroughCache else None
+            follower.follow(file_path, entry.size if entry is not None else None)
+
+    def onFollowedLines(self, updates):
+        try:
+            chunks = []
+            appended = 0
+            for file_path, text, event in updates:
+                appended += len(text)
+                if event is not None:
+                    text = self.FOLLOW_EVENTS[event] + text
+                if text:
+                    chunks.append(format_parse_entry(file_path, text.rstrip('\n')))
+            if not chunks:
+                return
+            view = self.previewView if self.parseSpool is not None else self.textArea
+            bar = view.verticalScrollBar()
+            at_end = bar.value() >= bar.maximum()
+            self.appendParseOutput(''.join(chunks))
+            if at_end:
+                # Keep tailing: stay at the bottom unless the user scrolled away from it
+                view = self.previewView if self.parseSpool is not None else self.textArea
+                view.verticalScrollBar().setValue(view.verticalScrollBar().maximum())
+            self.statusBar().showMessage(f"Follow: {appended} characters appended from {len(updates)} files")
+        except Exception as e:
+            QMessageBox.critical(self, "Follow Error", f"Error appending followed lines: {str(e)}")
+
+    def updateLiveParseOutput(self, added, removed):
+        """ Drops entries of removed files from the parse output and parses added ones onto the end """
+        self.logFollower.follower.unfollow(removed)
+        if self.parseWorker is not None:
+            # The running parse (possibly the previous live append) still adds entries; apply these after it
+            for file_path in removed:
+                self.pendingLiveAdded.pop(file_path, None)
+                self.pendingLiveRemoved[file_path] = None
+            self.pendingLiveAdded.update(dict.fromkeys(added))
+            return
+        for file_path in removed:
+            entry = self.parseEntryCursors.pop(file_path, None)
+            if entry is not None:
+                start, length = entry
+                cursor = QtGui.QTextCursor(start)
+                cursor.setPosition(start.position() + length, QtGui.QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+        if added and self.parseSource == self.walkSource(self.liveWatcher.folder):
+            self.parseFiles(added, source=self.parseSource, append=True)
+
+    def directoryLister(self, folder=None, archives=True):
+        """ Lister for walks under folder (the selected one by default): cached if enabled, archives shown as folders
+        unless archives is False or browsing them is off, ignore rules applied """
+        if self.directoryIndex is not None and self.cacheListingsAction.isChecked():
+            lister = self.directoryIndex.iterListings
+        else:
+            lister = iter_directory_listings
+        if archives and self.browseArchivesAction.isChecked():
+            lister = archive_lister(lister)
+        folder = folder or self.selected_folder
+        if not folder:
+            return lister
+        return self.fileMatcher(folder).lister(lister)
+
+    def clearDirectoryIndex(self):
+        try:
+            if self.directoryIndex is not None:
+                self.directoryIndex.clear()
+                self.statusBar().showMessage("Folder listing cache cleared")
+        except Exception as e:
+            QMessageBox.critical(self, "Cache Error", f"Error clearing folder listing cache: {str(e)}")
+
+    def selectFolderTreeRoot(self):
+        try:
+            folder = QFileDialog.getExistingDirectory(self, "Select Folder Tree Root", self.folderRoot)
+            if folder:
+                self.setFolderTreeRoot(folder)
+        except Exception as e:
+            QMessageBox.critical(self, "Folder Tree Error", f"Error setting folder tree root: {str(e)}")
+
+    def isUnderFolderRoot(self, folder):
+        root = self.folderRoot.rstrip('/') + '/'
+        return QDir.cleanPath(folder) == self.folderRoot or QDir.cleanPath(folder).startswith(root)
+
+    def setFolderTreeRoot(self, folder):
+        """ Roots the folder tree (and the folder search index) at folder and remembers it """
+        self.ensureFolderModel()
+        self.folderRoot = QDir.cleanPath(folder)
+        self.settings.setValue("folderTreeRoot", self.folderRoot)
+        self.cancelFolderSearch(cancel_index=True)
+        self.folderNameIndex = None
+        self.folderProxy.setAllowedPaths(None, self.folderRoot)
+        self.folderModel.setRootPath(self.folderRoot)
+        self.folderView.setRootIndex(self.folderProxy.mapFromSource(self.folderModel.index(self.folderRoot)))
+        if self.folderSearchBar.text():
+            self.filterFolderTree()
+
+    def scheduleFolderSearch(self):
+        self.folderSearchTimer.start()
+
+    def cancelFolderSearch(self, cancel_index=False):
+        if self.folderSearchWorker is not None:
+            self.folderSearchWorker.cancel()
+            self.folderSearchWorker = None
+        if cancel_index and self.folderIndexWorker is not None:
+            self.folderIndexWorker.cancel()
+            self.folderIndexWorker = None
+
     def filterFolderTree(self):
+        """ Searches folder names under the tree root; the name index is built in the background on first use """
         try:
-            search_term = self.folderSearchBar.text().lower()
-            self.folderView.setRootIndex(self.folderModel.index(QDir.rootPath()))
-            self.filterFolderModel(self.folderModel.index(QDir.rootPath()), search_term)
+            self.folderSearchTimer.stop()
+            self.cancelFolderSearch()
+            search_term = self.folderSearchBar.text().strip()
+            self.ensureFolderModel()
+            if not search_term:
+                self.folderProxy.setAllowedPaths(None, self.folderRoot)
+                self.folderView.setRootIndex(self.folderProxy.mapFromSource(self.folderModel.index(self.folderRoot)))
+                self.statusBar().clearMessage()
+                return
+            if self.folderNameIndex is None or not self.folderNameIndex.complete:
+                # The search runs once the index is ready
+                self.buildFolderNameIndex()
+                return
+            index = self.folderNameIndex
+            worker = TaskWorker(lambda is_cancelled: index.search(search_term, limit=self.FOLDER_SEARCH_LIMIT,
+                                                                   is_cancelled=is_cancelled), self)
+            worker.taskFinished.connect(self.onFolderSearchFinished)
+            worker.taskFailed.connect(self.onFolderSearchFailed)
+            worker.finished.connect(worker.deleteLater)
+            self.folderSearchWorker = worker
+            worker.start()
         except Exception as e:
             QMessageBox.critical(self, "Folder Filter Error", f"Error filtering folder tree: {str(e)}")
 
-    def filterFolderModel(self, parent, search_term):
-        for row in range(self.folderModel.rowCount(parent)):
-            index = self.folderModel.index(row, 0, parent)
-            if not self.folderModel.isDir(index):
-                continue
-            folder_name = self.folderModel.fileName(index).lower()
-            match = search_term in folder_name
-            self.folderView.setRowHidden(row, parent, not match)
-            if match or search_term in self.folderModel.filePath(index).lower():
-                self.filterFolderModel(index, search_term)
+    def buildFolderNameIndex(self):
+        if self.folderIndexWorker is not None:
+            return
+        index = DirectoryNameIndex(self.folderRoot)
+        worker = TaskWorker(lambda is_cancelled: index.build(is_cancelled, worker.reportProgress), self)
+        worker.taskProgress.connect(self.onFolderIndexProgress)
+        worker.taskFinished.connect(self.onFolderIndexFinished)
+        worker.taskFailed.connect(self.onFolderSearchFailed)
+        worker.finished.connect(worker.deleteLater)
+        self.folderNameIndex = index
+        self.folderIndexWorker = worker
+        self.statusBar().showMessage("Indexing folder names...")
+        worker.start()
+
+    def onFolderIndexProgress(self, count):
+        if self.sender() is self.folderIndexWorker:
+            self.statusBar().showMessage(f"Indexing folder names... {count} folders")
+
+    def onFolderIndexFinished(self, complete):
+        if self.sender() is not self.folderIndexWorker:
+            return
+        self.folderIndexWorker = None
+        if complete:
+            self.filterFolderTree()
+
+    def onFolderSearchFinished(self, result):
+        if self.sender() is not self.folderSearchWorker:
+            return
+        self.folderSearchWorker = None
+        if result is None:
+            return
+        try:
+            paths, total = result
+            # Resolving each path creates its node (and its parents) in the file system model
+            for path in paths:
+                self.folderModel.index(path)
+            visible = with_ancestors(paths, self.folderNameIndex.root)
+            self.folderProxy.setAllowedPaths(visible, self.folderRoot)
+            self.folderView.setRootIndex(self.folderProxy.mapFromSource(self.folderModel.index(self.folderRoot)))
+            matched = set(paths)
+            for path in sorted(visible - matched, key=len):
+                self.folderView.expand(self.folderProxy.mapFromSource(self.folderModel.index(path)))
+            message = f"{total} folders match"
+            if total > len(paths):
+                message += f" (showing {len(paths)})"
+            self.statusBar().showMessage(message)
+        except Exception as e:
+            QMessageBox.critical(self, "Folder Filter Error", f"Error filtering folder tree: {str(e)}")
 
-    def filterFileType(self, file):
+    def onFolderSearchFailed(self, error):
+        if self.sender() is self.folderSearchWorker or self.sender() is self.folderIndexWorker:
+            self.cancelFolderSearch(cancel_index=True)
+            self.folderNameIndex = None
+            QMessageBox.critical(self, "Folder Filter Error", f"Error filtering folder tree: {error}")
+
+    def fileFilterSpec(self):
+        """ (include globs, exclude globs) typed into fileTypeFilter """
+        text = self.fileTypeFilter.currentText()
+        if text == "All Files":
+            return (), ()
+        return split_patterns(text)
+
+    def fileMatcher(self, folder):
+        include, exclude = self.fileFilterSpec()
+        ignore_files = IGNORE_FILES if self.respectIgnoreFilesAction.isChecked() else ()
+        return IgnoreMatcher(folder, include, exclude, ignore_files)
+
+    def walkSource(self, folder):
+        """ Identifies a folder walk together with every rule that shaped it """
+        return (folder, self.fileFilterSpec(), self.respectIgnoreFilesAction.isChecked(),
+                self.browseArchivesAction.isChecked())
+
+    def applyFileTypeFilter(self):
+        """ Re-walks the selected folder when the globs, the ignore-file or the archive setting changed """
         try:
-            selected_type = self.fileTypeFilter.currentText()
-            if selected_type == "All Files":
-                return True
-            return file.endswith(selected_type)
+            spec = (self.fileFilterSpec(), self.respectIgnoreFilesAction.isChecked(),
+                    self.browseArchivesAction.isChecked())
+            if spec == self.appliedFileFilter:
+                return
+            self.appliedFileFilter = spec
+            # The content index only covers files the old rules let through
+            self.contentIndex = None
+            if self.selected_folder and os.path.isdir(self.selected_folder):
+                self.populateFileList(self.selected_folder)
         except Exception as e:
-            QMessageBox.critical(self, "File Filter Error", f"Error filtering file type: {str(e)}")
+            QMessageBox.critical(self, "File Filter Error", f"Error applying file filter: {str(e)}")
+
+    def scheduleFilter(self):
+        if not self.isContentSearchMode():
+            self.filterTimer.start()
 
     def filterFileList(self):
         try:
-            search_term = self.searchBar.text().lower()
-            for i in range(self.fileList.count()):
-                item = self.fileList.item(i)
-                item.setHidden(search_term not in item.text().lower())
+            if self.isContentSearchMode():
+                return
+            self.filterTimer.stop()
+            if self.filterWorker is not None:
+                self.filterWorker.cancel()
+                self.filterWorker = None
+            text = self.searchBar.text()
+            fuzzy = self.searchModeCombo.currentIndex() == self.SEARCH_NAMES_FUZZY
+            store = self.fileListModel.store
+            if len(store) < self.FILTER_THREAD_THRESHOLD or not text.strip():
+                self.applyFileFilter(text, fuzzy)
+                return
+            upto = len(store)
+            generation = self.fileListModel.generation
+            worker = TaskWorker(lambda is_cancelled: filter_rows(store, text, fuzzy, 0, upto, is_cancelled), self)
+            worker.taskFinished.connect(
+                lambda rows: self.onFilterFinished(worker, generation, text, fuzzy, rows, upto))
+            worker.taskFailed.connect(lambda error: QMessageBox.critical(
+                self, "File Filter Error", f"Error filtering file list: {error}"))
+            worker.finished.connect(worker.deleteLater)
+            self.filterWorker = worker
+            self.statusBar().showMessage("Filtering...")
+            worker.start()
+        except Exception as e:
+            QMessageBox.critical(self, "File Filter Error", f"Error filtering file list: {str(e)}")
+
+    def onFilterFinished(self, worker, generation, text, fuzzy, rows, upto):
+        if worker is not self.filterWorker:
+            return
+        self.filterWorker = None
+        if rows is None:
+            return
+        if generation != self.fileListModel.generation:
+            # The list was reloaded meanwhile; filter the new contents instead
+            self.filterFileList()
+            return
+        self.applyFileFilter(text, fuzzy, rows, upto)
+        self.statusBar().showMessage(f"{self.fileListModel.rowCount()} matching files")
+
+    def applyFileFilter(self, text, fuzzy, rows=None, upto=0):
+        try:
+            selection_model = self.fileList.selectionModel()
+            selected_rows = self.fileListModel.sourceRows(selection_model.selection())
+            self.fileListModel.setFilter(text, fuzzy, rows, upto)
+            if selected_rows:
+                # Keep the selection of rows that are still visible without re-triggering the preview
+                selection_model.blockSignals(True)
+                selection_model.select(self.fileListModel.selectionForRows(selected_rows), QItemSelectionModel.Select)
+                selection_model.blockSignals(False)
+                self.fileList.viewport().update()
+                self.updateToggleSelectButton()
         except Exception as e:
             QMessageBox.critical(self, "File Filter Error", f"Error filtering file list: {str(e)}")
 
+    def isContentSearchMode(self):
+        return self.searchModeCombo.currentIndex() in (self.SEARCH_CONTENTS, self.SEARCH_CONTENTS_REGEX)
+
+    def onSearchModeChanged(self, index):
+        try:
+            if self.isContentSearchMode():
+                self.searchBar.setPlaceholderText("Search file contents (press Enter)...")
+                self.fileListModel.setFilter('')
+                self.updateContentIndex()
+            else:
+                self.searchBar.setPlaceholderText("Search files...")
+                self.filterFileList()
+        except Exception as e:
+            QMessageBox.critical(self, "Search Mode Error", f"Error changing search mode: {str(e)}")
+
+    def updateContentIndex(self):
+        """ Builds or incrementally refreshes the content index of the selected folder in the background """
+        try:
+            if not (self.selected_folder and os.path.isdir(self.selected_folder)):
+                return
+            if self.contentIndex is None or self.contentIndex.folder != self.selected_folder:
+                if self.contentIndexWorker is not None:
+                    self.contentIndexWorker.cancel()
+                    self.contentIndexWorker = None
+                self.contentIndex = ContentIndex(self.selected_folder, lister=self.directoryLister(archives=False))
+            elif self.contentIndexWorker is not None:
+                self.contentIndexPending = True
+                return
+            index = self.contentIndex
+            self.contentIndexPending = False
+            worker = TaskWorker(lambda is_cancelled: index.update(is_cancelled, worker.reportProgress), self)
+            worker.taskProgress.connect(self.onContentIndexProgress)
+            worker.taskFinished.connect(self.onContentIndexFinished)
+            worker.taskFailed.connect(self.onContentIndexFailed)
+            worker.finished.connect(worker.deleteLater)
+            self.contentIndexWorker = worker
+            worker.start()
+        except Exception as e:
+            QMessageBox.critical(self, "Content Index Error", f"Error indexing folder contents: {str(e)}")
+
+    def onContentIndexProgress(self, indexed):
+        if self.sender() is self.contentIndexWorker:
+            self.statusBar().showMessage(f"Indexing contents... {indexed} files")
+
+    def onContentIndexFinished(self, result):
+        if self.sender() is not self.contentIndexWorker:
+            return
+        self.contentIndexWorker = None
+        indexed, removed = result
+        self.statusBar().showMessage(f"Content index up to date ({indexed} indexed, {removed} removed)")
+        if self.contentIndexPending:
+            self.updateContentIndex()
+
+    def onContentIndexFailed(self, error):
+        if self.sender() is self.contentIndexWorker:
+            self.contentIndexWorker = None
+            QMessageBox.critical(self, "Content Index Error", f"Error indexing folder contents: {error}")
+
+    def runContentSearch(self):
+        try:
+            query = self.searchBar.text()
+            if not self.isContentSearchMode() or not query:
+                return
+            if self.contentIndex is None or self.contentIndex.folder != self.selected_folder:
+                QMessageBox.warning(self, "Warning", "Please select a valid folder first.")
+                return
+            regex = self.searchModeCombo.currentIndex() == self.SEARCH_CONTENTS_REGEX
+            if regex:
+                try:
+                    re.compile(query)
+                except re.error as e:
+                    QMessageBox.warning(self, "Search Error", f"Invalid regular expression: {str(e)}")
+                    return
+            if self.contentSearchWorker is not None:
+                self.contentSearchWorker.cancel()
+            index = self.contentIndex
+            worker = TaskWorker(lambda is_cancelled: index.search(query, regex=regex, is_cancelled=is_cancelled), self)
+            worker.taskFinished.connect(self.onContentSearchFinished)
+            worker.taskFailed.connect(self.onContentSearchFailed)
+            worker.finished.connect(worker.deleteLater)
+            self.contentSearchWorker = worker
+            self.contentSearchStarted = time.perf_counter()
+            self.statusBar().showMessage("Searching contents...")
+            worker.start()
+        except Exception as e:
+            QMessageBox.critical(self, "Search Error", f"Error searching file contents: {str(e)}")
+
+    def onContentSearchFinished(self, hits):
+        if self.sender() is not self.contentSearchWorker:
+            return
+        self.contentSearchWorker = None
+        elapsed = time.perf_counter() - self.contentSearchStarted
+        self.cancelParse()
+        self.parseSource = None
+        self.parseEntryCursors.clear()
+        self.logFollower.clear()
+        self.showTextArea()
+        self.textArea.setPlainText('\n'.join(f"{hit.path}:{hit.line_number}: {hit.line}" for hit in hits))
+        files = len({hit.path for hit in hits})
+        message = f"{len(hits)} matching lines in {files} files ({elapsed:.2f}s)"
+        if self.contentIndexWorker is not None:
+            message += " - index still building, results may be incomplete"
+        self.statusBar().showMessage(message)
+
+    def onContentSearchFailed(self, error):
+        if self.sender() is self.contentSearchWorker:
+            self.contentSearchWorker = None
+            QMessageBox.critical(self, "Search Error", f"Error searching file contents: {error}")
+
+    def filesToParse(self, metrics):
+        """ Selected files, or when nothing is selected a walk of every matching file under the selected folder for
+        ParseWorker / ExportWorker to run off the GUI thread """
+        files_to_parse = self.selectedFilePaths()
+        if files_to_parse:
+            return files_to_parse
+        folder = self.selected_folder
+        # Built here: the lister reads the filter widgets and settings, which only the GUI thread may touch
+        lister = self.directoryLister(folder)
+
+        def walk(is_cancelled):
+            with metrics.phase('walk'):
+                return list(iter_files(folder, is_cancelled=is_cancelled, lister=lister))
+        return walk
+
     def parseSelectedFolder(self):
         try:
             if self.selected_folder and os.path.isdir(self.selected_folder):
-                selected_items = self.fileList.selectedItems()
-                if selected_items:
-                    files_to_parse = [item.text() for item in selected_items]
+                metrics = self.metricsLog.start("Parse")
+                if self.fileList.selectionModel().hasSelection():
+                    self.parseFiles(self.filesToParse(metrics), metrics=metrics)
+                elif self.changedOnlyAction.isChecked() and self.snapshotManifest is not None:
+                    self.parseChangedFiles(self.selected_folder, metrics)
                 else:
-                    files_to_parse = []
-                    for root, dirs, files in os.walk(self.selected_folder):
-                        for file in files:
-                            if self.filterFileType(file):
-                                files_to_parse.append(os.path.join(root, file))
-                self.parseFiles(files_to_parse)
+                    folder = self.selected_folder
+                    self.parseFiles(self.filesToParse(metrics), self.walkSource(folder), snapshot=(folder, None),
+                                    metrics=metrics)
             else:
                 QMessageBox.warning(self, "Warning", "Please select a valid folder first.")
         except Exception as e:
             QMessageBox.critical(self, "Parse Error", f"Error parsing folder: {str(e)}")
 
-    def parseFiles(self, files):
+    def parseChangedFiles(self, folder, metrics=None):
+        """ Diffs the folder against its last snapshot in the background, then parses what was added or modified """
+        self.cancelParse()
+        manifest = self.snapshotManifest
+        lister = self.directoryLister()
+        metrics = metrics or self.metricsLog.start("Parse")
+
+        def findChanges(is_cancelled):
+            with metrics.phase('walk + diff'):
+                saved_at = manifest.savedAt(folder)
+                files = iter_files(folder, lister=lister)
+                diff = diff_snapshot(files, manifest.load(folder), is_cancelled, worker.reportProgress)
+            return folder, saved_at, diff, metrics
+
+        worker = TaskWorker(findChanges, self)
+        worker.taskProgress.connect(self.onChangedFilesProgress)
+        worker.taskFinished.connect(self.onChangedFilesFound)
+        worker.taskFailed.connect(self.onChangedFilesFailed)
+        worker.finished.connect(worker.deleteLater)
+        self.changedFilesWorker = worker
+        self.statusBar().showMessage("Checking for changed files...")
+        worker.start()
+
+    def onChangedFilesProgress(self, checked):
+        if self.sender() is self.changedFilesWorker:
+            self.statusBar().showMessage(f"Checking for changed files... {checked} files")
+
+    def onChangedFilesFound(self, result):
+        if self.sender() is not self.changedFilesWorker:
+            return
+        self.changedFilesWorker = None
+        folder, saved_at, diff, metrics = result
+        self.parseFiles(diff.added + diff.modified, snapshot=(folder, diff), metrics=metrics)
+        if saved_at is not None:
+            self.parseSnapshotMessage = (f"{len(diff.added)} added, {len(diff.modified)} modified, "
+                                         f"{len(diff.deleted)} deleted since "
+                                         f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(saved_at))}")
+        else:
+            self.parseSnapshotMessage = "no earlier snapshot, all files parsed"
+
+    def onChangedFilesFailed(self, error):
+        if self.sender() is self.changedFilesWorker:
+            self.changedFilesWorker = None
+            QMessageBox.critical(self, "Parse Error", f"Error finding changed files: {error}")
+
+    def saveParseSnapshot(self, files):
+        """ Records the parsed folder's manifest in the background, so the next changed-only parse diffs against it """
+        folder, diff = self.parseSnapshot
+        self.parseSnapshot = None
+        if self.snapshotManifest is None:
+            return
+        manifest = self.snapshotManifest
+        known = self.parseCache.entry
+
+        def save(is_cancelled):
+            if diff is not None:
+                entries = diff.entries
+            else:
+                # A full parse read most files through the cache, which already knows their stat and digest
+                entries = snapshot_entries(files, known, is_cancelled)
+                if entries is None:
+                    return
+            manifest.save(folder, entries)
+
+        worker = TaskWorker(save, self)
+        worker.taskFailed.connect(lambda error: self.statusBar().showMessage(f"Could not save parse snapshot: {error}"))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+
+    def parseFiles(self, files, source=None, append=False, snapshot=None, metrics=None):
         try:
-            self.textArea.clear()
-            self.textArea.append('#' * 50)
-            for file_path in files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.textArea.append(f"\n\n{'#' * 4} {os.path.basename(file_path)}:\n\n")
-                    self.textArea.append(content)
-                    self.textArea.append("\n")
-                    self.textArea.append('#' * 50)
-                except Exception as e:
-                    QMessageBox.critical(self, "File Read Error", f"Error reading {file_path}: {str(e)}")
+            self.cancelParse()
+            self.parseMetrics = metrics or self.metricsLog.start("Parse")
+            self.parseSnapshot = snapshot
+            self.parseSnapshotMessage = None
+            if not append:
+                self.showTextArea()
+                self.textArea.setPlainText(PARSE_SEPARATOR)
+                self.parseEntryCursors.clear()
+                self.logFollower.clear()
+            self.parseSource = source
+            self.parseCacheStats = self.parseCache.stats()
+            parsers = self.formatParsers()
+            reader = parsers.reader(self.parseCache.read) if parsers else self.parseCache.read
+            self.parseReadThroughCache = not parsers
+            self.parseWorker = ParseWorker(files, self, self.parseMetrics.wrap(reader))
+            self.parseWorker.batchRead.connect(self.onFilesParsed)
+            self.parseWorker.progress.connect(self.onParseProgress)
+            self.parseWorker.parseFinished.connect(self.onParseFinished)
+            self.parseWorker.finished.connect(self.parseWorker.deleteLater)
+            # Busy until the worker reports the file count (after its walk, when it has one)
+            self.parseProgressBar.setRange(0, 0 if callable(files) else max(len(files), 1))
+            self.parseProgressBar.setValue(0)
+            self.parseProgressBar.setVisible(True)
+            self.cancelParseButton.setVisible(True)
+            self.parseWorker.start()
+        except Exception as e:
+            QMessageBox.critical(self, "Parse Error", f"Error parsing files: {str(e)}")
+
+    def cancelParse(self):
+        self.pendingLiveAdded.clear()
+        self.pendingLiveRemoved.clear()
+        if self.changedFilesWorker is not None:
+            self.changedFilesWorker.cancel()
+            self.changedFilesWorker = None
+            self.statusBar().showMessage("Parse cancelled")
+        if self.parseWorker is not None:
+            self.parseWorker.cancel()
+            self.parseWorker = None
+            self.parseProgressBar.setVisible(False)
+            self.cancelParseButton.setVisible(False)
+            self.statusBar().showMessage("Parse cancelled")
+
+    def onFilesParsed(self, batch):
+        worker = self.sender()
+        try:
+            if worker is self.parseWorker:
+                with self.parseMetrics.phase('render'):
+                    if self.parseSpool is not None:
+                        self.appendParseOutput(''.join(format_parse_entry(file_path, content)
+                                                       for file_path, content in batch))
+                    else:
+                        self.appendParseEntries(batch)
         except Exception as e:
             QMessageBox.critical(self, "Parse Error", f"Error parsing files: {str(e)}")
+        finally:
+            worker.acknowledge()
+
+    def appendParseEntries(self, batch):
+        """ Inserts a batch of parse entries as one edit, so the view lays out and repaints once per batch.
+
+        Once the text area would outgrow the memory budget the output is spilled, and the rest goes to the spool.
+        """
+        document = self.textArea.document()
+        # The document holds UTF-16 text
+        room = self.parseMemoryBudget // 2 - document.characterCount()
+        track = self.liveRefreshAction.isChecked()
+        cursor = QtGui.QTextCursor(document)
+        cursor.movePosition(QtGui.QTextCursor.End)
+        self.textArea.setUpdatesEnabled(False)
+        cursor.beginEditBlock()
+        overflow = None
+        try:
+            for index, (file_path, content) in enumerate(batch):
+                entry = format_parse_entry(file_path, content)
+                if len(entry) > room:
+                    overflow = index
+                    break
+                room -= len(entry)
+                start = cursor.position()
+                cursor.insertText(entry)
+                if track and len(self.parseEntryCursors) < self.LIVE_PARSE_ENTRY_LIMIT:
+                    # A cursor at the entry start follows earlier edits; the entry length itself never changes
+                    entry_start = QtGui.QTextCursor(document)
+                    entry_start.setPosition(start)
+                    self.parseEntryCursors[file_path] = (entry_start, cursor.position() - start)
+        finally:
+            cursor.endEditBlock()
+            self.textArea.setUpdatesEnabled(True)
+        if overflow is not None:
+            self.spillParseOutput()
+            self.appendParseOutput(''.join(format_parse_entry(file_path, content)
+                                           for file_path, content in batch[overflow:]))
+
+    def spillParseOutput(self):
+        """ Moves the parse output from the text area to a temporary file, which the paged viewer shows from then on """
+        spool = ParseSpool()
+        try:
+            spool.append(self.textArea.toPlainText())
+            spool.flush()
+            document = MappedTextFile(spool.path)
+            document.build()
+        except Exception:
+            spool.close()
+            raise
+        # Spooled output is append-only, so live refresh can no longer drop entries from it
+        self.parseEntryCursors.clear()
+        self.showPagedDocument(document)
+        self.parseSpool = spool
+
+    def appendParseOutput(self, text):
+        """ Appends text to the parse output, spilling the output to disk first when it would outgrow the budget """
+        if self.parseSpool is None:
+            document = self.textArea.document()
+            if (document.characterCount() + len(text)) * 2 <= self.parseMemoryBudget:
+                cursor = QtGui.QTextCursor(document)
+                cursor.movePosition(QtGui.QTextCursor.End)
+                cursor.insertText(text)
+                return
+            self.spillParseOutput()
+        self.parseSpool.append(text)
+        self.parseSpool.flush()
+        self.previewView.document.refresh()
+        self.previewView.refreshLineCount()
+
+    def selectParseMemoryBudget(self):
+        try:
+            budget, ok = QInputDialog.getInt(self, "Parse Memory Budget",
+                                             "Parse output kept in memory before it is spilled to disk (MB):",
+                                             max(1, self.parseMemoryBudget // (1024 * 1024)), 1, 16384)
+            if ok:
+                self.parseMemoryBudget = budget * 1024 * 1024
+                self.settings.setValue("parseMemoryBudget", self.parseMemoryBudget)
+        except Exception as e:
+            QMessageBox.critical(self, "Parse Memory Budget Error", f"Error setting parse memory budget: {str(e)}")
+
+    def onParseProgress(self, done, total):
+        if self.sender() is self.parseWorker:
+            self.parseProgressBar.setMaximum(max(total, 1))
+            self.parseProgressBar.setValue(done)
+            self.statusBar().showMessage(f"Parsing... {done}/{total} files")
+
+    def onParseFinished(self, errors, cancelled):
+        if self.sender() is not self.parseWorker:
+            return
+        files = self.parseWorker.files
+        total = len(files)
+        skipped = self.parseWorker.skipped
+        self.parseWorker = None
+        self.parseProgressBar.setVisible(False)
+        self.cancelParseButton.setVisible(False)
+        if not cancelled:
+            self.followParsedFiles(files)
+        if self.parseSnapshot is not None and not cancelled:
+            deleted = self.parseSnapshot[1].deleted if self.parseSnapshot[1] is not None else ()
+            if deleted:
+                self.appendParseOutput(format_deleted_files(self.parseSnapshot[0], deleted))
+            self.saveParseSnapshot(files)
+        message = f"Parsed {total - len(errors) - skipped} of {total} files"
+        if skipped:
+            message += f" ({skipped} binary files skipped)"
+        stats = self.parseCache.stats()
+        hits = (stats['hits'] + stats['hash_hits']) - (self.parseCacheStats['hits'] + self.parseCacheStats['hash_hits'])
+        message += f" - cache: {hits} hits, {stats['misses'] - self.parseCacheStats['misses']} misses"
+        if self.parseSpool is not None:
+            message += f" - {format_bytes(self.parseSpool.size)} spilled to disk"
+        if self.parseSnapshotMessage:
+            message += f" - {self.parseSnapshotMessage}"
+        self.statusBar().showMessage(message)
+        stats = self.parseCache.stats()
+        # Summed over the reader threads, so together they can exceed the wall time
+        self.parseMetrics.addPhase('read', stats['read_seconds'] - self.parseCacheStats['read_seconds'])
+        self.parseMetrics.addPhase('decode', stats['decode_seconds'] - self.parseCacheStats['decode_seconds'])
+        self.recordMetrics(self.parseMetrics, files=total, bytes=stats['bytes_read'] - self.parseCacheStats['bytes_read'],
+                           cancelled=cancelled)
+        if self.pendingLiveAdded or self.pendingLiveRemoved:
+            added, removed = list(self.pendingLiveAdded), list(self.pendingLiveRemoved)
+            self.pendingLiveAdded.clear()
+            self.pendingLiveRemoved.clear()
+            self.updateLiveParseOutput(added, removed)
+        if errors:
+            self.showReadErrors(errors)
+
+    def recordMetrics(self, metrics, **figures):
+        """ Completes an operation's metrics and shows them in the status bar """
+        try:
+            metrics.finish(**figures)
+            if metrics.profiled:
+                metrics.dumpProfile(user_cache_dir('profiles'))
+            self.metricsLog.record(metrics)
+            self.metricsLabel.setText(metrics.summary())
+            self.metricsLabel.setToolTip(f"Profile saved to {metrics.profile_path}" if metrics.profile_path else "")
+        except Exception as e:
+            self.statusBar().showMessage(f"Could not record performance metrics: {str(e)}")
+
+    def toggleProfiling(self, enabled):
+        self.metricsLog.profiling = enabled
+        self.settings.setValue("profileOperations", enabled)
+
+    def dumpMetrics(self):
+        try:
+            if not self.metricsLog.operations:
+                QMessageBox.information(self, "Performance Metrics", "No operations have been measured yet.")
+                return
+            filename, _ = QFileDialog.getSaveFileName(self, "Dump Performance Metrics", "parsing-tool-metrics.json",
+                                                      "JSON Files (*.json);;All Files (*)")
+            if filename:
+                self.metricsLog.dump(filename)
+                self.statusBar().showMessage(f"Metrics of {len(self.metricsLog.operations)} operations saved to {filename}")
+        except Exception as e:
+            QMessageBox.critical(self, "Metrics Error", f"Error saving performance metrics: {str(e)}")
+
+    def togglePersistentParseCache(self, enabled):
+        try:
+            if enabled and not self.parseCache.hasDisk:
+                self.parseCache.openDisk()
+            elif not enabled:
+                self.parseCache.closeDisk()
+            self.settings.setValue("persistentParseCache", enabled)
+        except Exception as e:
+            self.persistentParseCacheAction.setChecked(False)
+            QMessageBox.critical(self, "Cache Error", f"Error opening the persistent parse cache: {str(e)}")
+
+    def clearParseCache(self):
+        try:
+            self.parseCache.clear()
+            self.parseCacheStats = self.parseCache.stats()
+            self.statusBar().showMessage("Parse cache cleared")
+        except Exception as e:
+            QMessageBox.critical(self, "Cache Error", f"Error clearing parse cache: {str(e)}")
+
+    def showParseCacheStats(self):
+        QMessageBox.information(self, "Parse Cache", self.parseCache.statsText())
+
+    def showReadErrors(self, errors, limit=20):
+        lines = [f"{file_path}: {error}" for file_path, error in errors[:limit]]
+        if len(errors) > limit:
+            lines.append(f"... and {len(errors) - limit} more")
+        QMessageBox.warning(self, "File Read Errors", f"{len(errors)} file(s) could not be read:\n\n" + "\n".join(lines))
 
     def saveToFile(self):
         try:
             filename, _ = QFileDialog.getSaveFileName(self, "Save File", "", "Text Files (*.txt);;All Files (*)")
             if filename:
                 try:
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        f.write(self.textArea.toPlainText())
+                    if self.parseSpool is not None:
+                        metrics = self.metricsLog.start("Save")
+                        with metrics.phase('write'):
+                            self.parseSpool.copyTo(filename)
+                        self.recordMetrics(metrics, bytes=os.path.getsize(filename))
+                        return
+                    if self.previewView.document is not None:
+                        # A previewed file is saved as-is rather than through the viewer
+                        shutil.copyfile(self.previewView.document.path, filename)
+                        return
+                    metrics = self.metricsLog.start("Save")
+                    with metrics.phase('serialize'):
+                        text = self.textArea.toPlainText()
+                    with metrics.phase('write'):
+                        # Written as shown, like a spooled save: no platform line-end translation
+                        with open(filename, 'w', encoding='utf-8', newline='') as f:
+                            f.write(text)
+                    self.recordMetrics(metrics, bytes=os.path.getsize(filename))
                 except Exception as e:
                     QMessageBox.critical(self, "Save Error", f"Error saving file: {str(e)}")
         except Exception as e:
             QMessageBox.critical(self, "Save Dialog Error", f"Error opening save dialog: {str(e)}")
 
+    def exportDirectly(self):
+        try:
+            if not (self.selected_folder and os.path.isdir(self.selected_folder)):
+                QMessageBox.warning(self, "Warning", "Please select a valid folder first.")
+                return
+            filename, _ = QFileDialog.getSaveFileName(
+                self, "Export Directly", "",
+                "Text Files (*.txt);;Gzip Compressed (*.gz);;XZ Compressed (*.xz);;Bzip2 Compressed (*.bz2);;All Files (*)")
+            if filename:
+                self.cancelExport()
+                metrics = self.metricsLog.start("Export")
+                files = self.filesToParse(metrics)
+                self.exportWorker = ExportWorker(files, filename, self, metrics, self.formatParsers())
+                self.exportWorker.progress.connect(self.onExportProgress)
+                self.exportWorker.exportFinished.connect(self.onExportFinished)
+                self.exportWorker.finished.connect(self.exportWorker.deleteLater)
+                self.exportProgressBar.setRange(0, 0 if callable(files) else max(len(files), 1))
+                self.exportProgressBar.setValue(0)
+                self.exportProgressBar.setVisible(True)
+                self.cancelExportButton.setVisible(True)
+                self.exportWorker.start()
+        except Exception as e:
+            QMessageBox.critical(self, "Export Error", f"Error exporting files: {str(e)}")
+
+    def cancelExport(self):
+        if self.exportWorker is not None:
+            self.exportWorker.cancel()
+            self.exportWorker = None
+            self.exportProgressBar.setVisible(False)
+            self.cancelExportButton.setVisible(False)
+            self.statusBar().showMessage("Export cancelled")
+
+    def onExportProgress(self, done, total):
+        if self.sender() is self.exportWorker:
+            self.exportProgressBar.setMaximum(max(total, 1))
+            self.exportProgressBar.setValue(done)
+            self.statusBar().showMessage(f"Exporting... {done}/{total} files")
+
+    def onExportFinished(self, errors, cancelled):
+        if self.sender() is not self.exportWorker:
+            return
+        destination = self.exportWorker.destination
+        skipped = len(self.exportWorker.skipped)
+        total = len(self.exportWorker.files)
+        metrics = self.exportWorker.metrics
+        self.exportWorker = None
+        self.exportProgressBar.setVisible(False)
+        self.cancelExportButton.setVisible(False)
+        message = f"Exported to {destination}"
+        if skipped:
+            message += f" ({skipped} binary files skipped)"
+        self.statusBar().showMessage(message)
+        self.recordMetrics(metrics, files=total - len(errors) - skipped,
+                           bytes=os.path.getsize(destination) if os.path.exists(destination) else 0,
+                           cancelled=cancelled)
+        if errors:
+            self.showReadErrors(errors)
+
     def copyToClipboard(self):
         try:
             clipboard = QApplication.clipboard()
+            if self.parseSpool is not None and self.parseSpool.size <= self.parseMemoryBudget:
+                clipboard.setText(self.parseSpool.read())
+                QMessageBox.information(self, "Success", "Text copied to clipboard.")
+                return
+            if self.previewView.document is not None:
+                QMessageBox.warning(self, "Warning", "This output is too large to copy to the clipboard; use Save instead.")
+                return
             clipboard.setText(self.textArea.toPlainText())
             QMessageBox.information(self, "Success", "Text copied to clipboard.")
         except Exception as e:
             QMessageBox.critical(self, "Copy Error", f"Error copying to clipboard: {str(e)}")
 
+    def formatParsers(self):
+        """ ParserSet from the Format Parsers options, or None while they are off; ValueError for invalid options """
+        if not self.formatParsersAction.isChecked():
+            return None
+        xml_paths = [line.strip() for line in self.settings.value("xmlPaths", "").splitlines() if line.strip()]
+        fields = self.settings.value("logFields", "").split()
+        try:
+            return build_parser_set(xml_paths, self.settings.value("logPattern", "") or None,
+                                    self.settings.value("logLevels", "").split(), self.settings.value("logSince", ""),
+                                    self.settings.value("logUntil", ""), fields)
+        except re.error as e:
+            raise ValueError(f"invalid log pattern: {e}")
+
+    def selectXmlPaths(self):
+        try:
+            paths, ok = QInputDialog.getMultiLineText(
+                self, "XML Paths", "Elements to output from .xml files, one path per line\n"
+                "(e.g. //event, /log/entry[@level='error']/message/text(), //item/@id):",
+                self.settings.value("xmlPaths", ""))
+            if ok:
+                self.settings.setValue("xmlPaths", paths.strip())
+        except Exception as e:
+            QMessageBox.critical(self, "Format Parsers Error", f"Error setting XML paths: {str(e)}")
+
+    def selectLogLevels(self):
+        try:
+            levels, ok = QInputDialog.getText(self, "Log Levels", "Levels of the .log records to output "
+                                              "(e.g. ERROR WARN; blank = all):", text=self.settings.value("logLevels", ""))
+            if ok:
+                self.settings.setValue("logLevels", levels.strip().upper())
+        except Exception as e:
+            QMessageBox.critical(self, "Format Parsers Error", f"Error setting log levels: {str(e)}")
+
+    def selectLogTimeRange(self):
+        try:
+            bounds = []
+            for key, label in (("logSince", "From"), ("logUntil", "To")):
+                value, ok = QInputDialog.getText(self, "Log Time Range", f"{label} (e.g. 2024-01-05 13:00; blank = no limit):",
+                                                 text=self.settings.value(key, ""))
+                if not ok:
+                    return
+                bounds.append((key, value.strip()))
+            for key, value in bounds:
+                self.settings.setValue(key, value)
+        except Exception as e:
+            QMessageBox.critical(self, "Format Parsers Error", f"Error setting log time range: {str(e)}")
+
+    def selectLogPattern(self):
+        try:
+            pattern, ok = QInputDialog.getText(self, "Log Pattern", "Regex for the start of a log record, with named "
+                                               "groups as fields; time and level groups drive the filters\n"
+                                               "(blank = timestamp at line start and the first level word):",
+                                               text=self.settings.value("logPattern", ""))
+            if not ok:
+                return
+            fields, ok = QInputDialog.getText(self, "Log Pattern", "Fields to output instead of the whole record "
+                                              "(group names, e.g. time level message; blank = whole record):",
+                                              text=self.settings.value("logFields", ""))
+            if ok:
+                self.settings.setValue("logPattern", pattern)
+                self.settings.setValue("logFields", fields.strip())
+        except Exception as e:
+            QMessageBox.critical(self, "Format Parsers Error", f"Error setting log pattern: {str(e)}")
+
+    def structureOptions(self):
+        return StructureOptions(sort=self.structureSortAction.isChecked(),
+                                max_depth=self.settings.value("structureMaxDepth", 0, type=int) or None,
+                                max_entries=self.settings.value("structureMaxEntries", 0, type=int) or None,
+                                sizes=self.structureSizesAction.isChecked(),
+                                line_counts=self.structureLineCountsAction.isChecked())
+
+    def selectStructureMaxDepth(self):
+        try:
+            depth, ok = QInputDialog.getInt(self, "Maximum Depth", "Folder levels to expand (0 = all):",
+                                            self.settings.value("structureMaxDepth", 0, type=int), 0, 1000)
+            if ok:
+                self.settings.setValue("structureMaxDepth", depth)
+        except Exception as e:
+            QMessageBox.critical(self, "File Structure Error", f"Error setting maximum depth: {str(e)}")
+
+    def selectStructureMaxEntries(self):
+        try:
+            entries, ok = QInputDialog.getInt(self, "Entries per Folder",
+                                              "Files and subfolders listed per folder (0 = all):",
+                                              self.settings.value("structureMaxEntries", 0, type=int), 0, 10000000)
+            if ok:
+                self.settings.setValue("structureMaxEntries", entries)
+        except Exception as e:
+            QMessageBox.critical(self, "File Structure Error", f"Error setting entries per folder: {str(e)}")
+
     def copyFileStructure(self):
         try:
             if not self.selected_folder:
                 QMessageBox.warning(self, "Warning", "Please select a folder first.")
                 return
-            
-            structure = []
-            for root, dirs, files in os.walk(self.selected_folder):
-                level = root.replace(self.selected_folder, '').count(os.sep)
-                indent = ' ' * 4 * (level)
-                structure.append('{}{}/'.format(indent, os.path.basename(root)))
-                subindent = ' ' * 4 * (level + 1)
-                for f in files:
-                    structure.append('{}{}'.format(subindent, f))
-            
-            try:
-                clipboard = QApplication.clipboard()
-                clipboard.setText('\n'.join(structure))
-                QMessageBox.information(self, "Success", "File structure copied to clipboard.")
-            except Exception as e:
-                QMessageBox.critical(self, "Copy Error", f"Error copying file structure to clipboard: {str(e)}")
+            if self.structureWorker is not None:
+                self.structureWorker.cancel()
+            folder = self.selected_folder
+            lister = self.directoryLister()
+            renderer = StructureRenderer(self.structureOptions(), self.structureLineCounts)
+            metrics = self.metricsLog.start("Structure copy")
+
+            def render(is_cancelled):
+                with metrics.phase('walk + render'):
+                    structure = renderer.render(folder, lister, is_cancelled, worker.reportProgress)
+                return structure, renderer, metrics
+
+            worker = TaskWorker(render, self)
+            worker.taskProgress.connect(self.onStructureProgress)
+            worker.taskFinished.connect(self.onStructureFinished)
+            worker.taskFailed.connect(self.onStructureFailed)
+            worker.finished.connect(worker.deleteLater)
+            self.structureWorker = worker
+            self.statusBar().showMessage("Building file structure...")
+            worker.start()
         except Exception as e:
             QMessageBox.critical(self, "Copy Structure Error", f"Error copying file structure: {str(e)}")
 
+    def onStructureProgress(self, folders):
+        if self.sender() is self.structureWorker:
+            self.statusBar().showMessage(f"Building file structure... {folders} folders")
+
+    def onStructureFinished(self, result):
+        if self.sender() is not self.structureWorker:
+            return
+        self.structureWorker = None
+        structure, renderer, metrics = result
+        if structure is None:
+            return
+        try:
+            clipboard = QApplication.clipboard()
+            with metrics.phase('clipboard'):
+                clipboard.setText(structure)
+            self.recordMetrics(metrics, files=renderer.files, bytes=len(structure.encode('utf-8')))
+            self.statusBar().showMessage(f"File structure copied: {renderer.folders} folders, {renderer.files} files")
+            QMessageBox.information(self, "Success", "File structure copied to clipboard.")
+        except Exception as e:
+            QMessageBox.critical(self, "Copy Error", f"Error copying file structure to clipboard: {str(e)}")
+
+    def onStructureFailed(self, error):
+        if self.sender() is self.structureWorker:
+            self.structureWorker = None
+            QMessageBox.critical(self, "Copy Structure Error", f"Error copying file structure: {error}")
+
+    def selectedFilePaths(self):
+        selection = self.fileList.selectionModel().selection()
+        return [self.fileListModel.store.path(row) for row in self.fileListModel.sourceRows(selection)]
+
     def onFileSelectionChanged(self):
         try:
-            selected_items = self.fileList.selectedItems()
-            if selected_items:
-                file_path = selected_items[0].text()
+            selection = self.fileList.selectionModel().selection()
+            if not selection.isEmpty():
+                self.cancelParse()
+                self.parseSource = None
+                self.parseEntryCursors.clear()
+                self.logFollower.clear()
+                file_path = self.fileListModel.filePath(selection[0].top())
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    encoding = default_classifier.encoding(file_path)
+                    if encoding is None:
+                        self.showTextArea()
+                        self.textArea.setPlainText(f"[Binary file not shown: {os.path.basename(file_path)}]")
+                        return
+                    member = split_member_path(file_path)
+                    if member is not None:
+                        size = default_archive_index.member(file_path)[1].size
+                    else:
+                        size = os.path.getsize(file_path)
+                    if size > self.PREVIEW_MAP_THRESHOLD:
+                        if member is not None or encoding.startswith(('utf-16', 'utf-32')):
+                            # Line offsets in the mapped viewer are found by byte; wide encodings only get a head, as
+                            # do archive members, which cannot be mapped
+                            with default_classifier.openText(file_path) as f:
+                                content = f.read(self.PREVIEW_MAP_THRESHOLD)
+                            self.showTextArea()
+                            self.textArea.setPlainText(content + "\n\n[Preview truncated]")
+                            return
+                        self.openPreview(file_path, encoding)
+                        return
+                    content = self.parseCache.read(file_path)
+                    self.showTextArea()
                     self.textArea.setPlainText(content)
-                    self.highlightSearchResults()
                 except Exception as e:
                     QMessageBox.critical(self, "File Read Error", f"Error reading {file_path}: {str(e)}")
             self.updateToggleSelectButton()
         except Exception as e:
             QMessageBox.critical(self, "File Selection Error", f"Error handling file selection: {str(e)}")
 
+    def openPreview(self, file_path, encoding='utf-8'):
+        """ Shows a large file in the paged viewer while its line index is built in the background """
+        self.closePreview()
+        document = MappedTextFile(file_path, encoding)
+        self.showPagedDocument(document)
+        if document.complete:
+            return
+        worker = TaskWorker(lambda is_cancelled: document.build(is_cancelled, worker.reportProgress), self)
+        worker.taskProgress.connect(self.onPreviewIndexProgress)
+        worker.taskFinished.connect(self.onPreviewIndexFinished)
+        worker.taskFailed.connect(self.onPreviewIndexFailed)
+        self.previewWorker = worker
+        worker.start()
+
+    def showPagedDocument(self, document):
+        """ Switches the output pane from the text area to the paged viewer showing document """
+        self.textArea.clear()
+        self.textArea.hide()
+        self.previewView.setDocument(document)
+        self.previewView.setHighlightPattern(self.searchHighlighter.pattern)
+        self.previewView.show()
+
+    def closePreview(self):
+        """ Stops indexing and unmaps the previewed file, discarding spooled parse output """
+        document = self.previewView.document
+        if self.previewWorker is not None:
+            # The worker touches the mapping, so it has to stop before the file is unmapped
+            self.previewWorker.cancel()
+            self.previewWorker.wait()
+            self.previewWorker.deleteLater()
+            self.previewWorker = None
+        if document is not None:
+            self.previewView.setDocument(None)
+            document.close()
+        if self.parseSpool is not None:
+            self.parseSpool.close()
+            self.parseSpool = None
+
+    def showTextArea(self):
+        """ Switches the output pane back from the paged viewer to the text area """
+        if self.previewView.isVisible() or self.previewView.document is not None:
+            self.closePreview()
+            self.previewView.hide()
+            self.textArea.show()
+
+    def onPreviewIndexProgress(self, percent):
+        if self.sender() is self.previewWorker:
+            self.previewView.refreshLineCount()
+            self.statusBar().showMessage(f"Indexing lines... {percent}%")
+
+    def onPreviewIndexFinished(self, complete):
+        if self.sender() is not self.previewWorker:
+            return
+        self.previewWorker.deleteLater()
+        self.previewWorker = None
+        self.previewView.refreshLineCount()
+        document = self.previewView.document
+        self.statusBar().showMessage(f"{os.path.basename(document.path)}: {document.lineCount()} lines (Ctrl+G to go to a line)")
+
+    def onPreviewIndexFailed(self, error):
+        if self.sender() is self.previewWorker:
+            self.closePreview()
+            QMessageBox.critical(self, "File Read Error", f"Error indexing file: {error}")
+
     def highlightSearchResults(self):
+        """ Applies the find bar's term and options to the output pane; matches are highlighted as they scroll into view """
         try:
-            cursor = self.textArea.textCursor()
-            cursor.movePosition(cursor.Start)
-            search_term = self.searchBar.text()
-            format = QtGui.QTextCharFormat()
-            format.setBackground(QtGui.QBrush(Qt.yellow))
-
-            while not cursor.isNull() and not cursor.atEnd():
-                cursor = self.textArea.document().find(search_term, cursor)
-                if not cursor.isNull():
-                    cursor.mergeCharFormat(format)
+            self.findCountLabel.clear()
+            try:
+                pattern = compile_search(self.findBar.text(), self.findCaseCheck.isChecked(),
+                                         self.findRegexCheck.isChecked())
+            except re.error as e:
+                self.findCountLabel.setText(f"Invalid regex: {e}")
+                pattern = None
+            self.searchHighlighter.setPattern(pattern)
+            self.previewView.setHighlightPattern(pattern)
         except Exception as e:
             QMessageBox.critical(self, "Highlight Error", f"Error highlighting search results: {str(e)}")
 
+    def onFindMatchesChanged(self, current, count, capped):
+        if self.searchHighlighter.pattern is None:
+            return
+        if self.previewView.document is not None:
+            self.findCountLabel.setText("Highlighting visible lines")
+        elif count == 0:
+            self.findCountLabel.setText("No matches")
+        else:
+            total = f"{count}+" if capped else str(count)
+            self.findCountLabel.setText(f"{current + 1} of {total}" if current >= 0 else f"{total} matches")
+            if capped:
+                self.findCountLabel.setToolTip(f"Only the first {count} matches are highlighted")
+            else:
+                self.findCountLabel.setToolTip("")
+
+    def focusFindBar(self):
+        self.findBar.setFocus()
+        self.findBar.selectAll()
+
+    def findNext(self):
+        self.goToMatch(1)
+
+    def findPrevious(self):
+        self.goToMatch(-1)
+
+    def goToMatch(self, step):
+        try:
+            if self.previewView.document is not None:
+                self.statusBar().showMessage("Match navigation is not available in the paged viewer; use Ctrl+G")
+                return
+            if self.searchHighlighter.refreshTimer.isActive():
+                self.searchHighlighter.refresh()
+            self.searchHighlighter.goTo(step)
+        except Exception as e:
+            QMessageBox.critical(self, "Find Error", f"Error finding matches: {str(e)}")
+
     def toggleSelectFiles(self):
         try:
             if self.toggleSelectButton.isChecked():
@@ -394,7 +2642,7 @@ class ParsingToolMainWindow(QMainWindow):
 
     def updateToggleSelectButton(self):
         try:
-            if self.fileList.selectedItems():
+            if self.fileList.selectionModel().hasSelection():
                 self.toggleSelectButton.setChecked(True)
                 self.toggleSelectButton.setText("Deselect All Files")
             else:
@@ -474,6 +2722,19 @@ class ParsingToolMainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Donate Error", f"Error showing donate dialog: {str(e)}")
 
+def create_tutorial_view():
+    """ QWebEngineView for the tutorial pages, or a QTextBrowser when QtWebEngine is unavailable.
+
+    QtWebEngine is imported here rather than at module level: initialising Chromium dominated startup time.
+    """
+    try:
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+    except ImportError:
+        view = QTextBrowser()
+        view.setOpenExternalLinks(True)
+        return view
+    return QWebEngineView()
+
 class ParsingToolTutorialWindow(QWidget):
     def __init__(self, parent=None):
         super(ParsingToolTutorialWindow, self).__init__(parent)
@@ -485,7 +2746,7 @@ class ParsingToolTutorialWindow(QWidget):
 
             self.layout = QVBoxLayout()
 
-            self.webView = QWebEngineView()
+            self.webView = create_tutorial_view()
             self.webView.setStyleSheet("background-color: #ffffff;")  # White background for the content
             
             self.layout.addWidget(self.webView)
@@ -779,6 +3040,8 @@ class ParsingToolTutorialWindow(QWidget):
         """
 
 if __name__ == '__main__':
+    # Needed for QtWebEngine to be importable after the application exists (see create_tutorial_view)
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     ex = ParsingToolMainWindow()
     ex.show()
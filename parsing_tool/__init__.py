@@ -0,0 +1,54 @@
+""" Qt-free core of the Parsing Tool: directory walking, filtering, parsing and structure rendering
+
+Names are imported from their submodules on first use, so importing one submodule (as the CLI does at start-up)
+does not load all the others and their dependencies (sqlite3, zipfile, tarfile, xml, ...).
+"""
+
+import importlib
+
+# submodule -> the names it exports here
+_EXPORTS = {
+    'core': ('PARSE_SEPARATOR', 'PARSE_ENTRY_SUFFIX', 'matches_file_type', 'list_directory',
+             'iter_directory_listings', 'iter_directory_files', 'iter_files', 'parse_entry_prefix', 'format_parse_entry',
+             'iter_parse_output', 'render_parse_output', 'render_file_structure'),
+    'engine': ('ParseEngine', 'read_text_file'),
+    'pathstore': ('CompactPathStore',),
+    'export': ('compression_for_path', 'open_export', 'iter_entry_chunks', 'write_parse_output', 'export_parse_output'),
+    'appdirs': ('user_cache_dir',),
+    'dirindex': ('DirectoryIndex',),
+    'live': ('FolderSnapshot', 'LiveChanges'),
+    'contentsearch': ('ContentIndex', 'SearchHit'),
+    'filtering': ('parse_query', 'filter_rows', 'rank_rows'),
+    'dirnames': ('DirectoryNameIndex',),
+    'preview': ('MappedTextFile',),
+    'sniff': ('SNIFF_SIZE', 'BinaryFileError', 'FileClassifier', 'default_classifier', 'open_text_file',
+              'sniff_encoding'),
+    'ignore': ('IGNORE_FILES', 'DEFAULT_IGNORES', 'IgnoreMatcher', 'IgnoreRules', 'split_patterns'),
+    'parsecache': ('ParseCache', 'content_digest'),
+    'manifest': ('ManifestEntry', 'SnapshotDiff', 'SnapshotManifest', 'diff_snapshot', 'file_entry', 'file_signature',
+                 'format_deleted_files', 'snapshot_entries'),
+    'textsearch': ('compile_search', 'find_matches'),
+    'metrics': ('MetricsLog', 'OperationMetrics', 'peak_memory_bytes'),
+    'structure': ('LineCountCache', 'StructureOptions', 'StructureRenderer', 'render_structure'),
+    'spool': ('ParseSpool',),
+    'parsers': ('RecordParser', 'ParserSet', 'XmlParser', 'LogParser', 'XPathSubset', 'build_parser_set',
+                'parse_log_time'),
+    'follow': ('FileFollower', 'FollowUpdate'),
+    'archives': ('ArchiveIndex', 'ArchiveMember', 'archive_lister', 'default_archive_index', 'is_archive_name',
+                 'member_signature', 'open_binary', 'split_member_path'),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+import sys
+
+from parsing_tool.cli import main
+
+sys.exit(main())
@@ -0,0 +1,16 @@
+import os
+import sys
+
+def user_cache_dir(*parts):
+    """ Per-user cache folder for the Parsing Tool (PARSING_TOOL_CACHE_DIR overrides it); not created here """
+    base = os.environ.get('PARSING_TOOL_CACHE_DIR')
+    if not base:
+        if sys.platform == 'win32':
+            local = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+            base = os.path.join(local, 'TSTP', 'ParsingTool', 'Cache')
+        elif sys.platform == 'darwin':
+            base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches', 'TSTP Parsing Tool')
+        else:
+            xdg = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            base = os.path.join(xdg, 'tstp-parsing-tool')
+    return os.path.join(base, *parts)
@@ -0,0 +1,489 @@
+""" Zip and tar archives as virtual folders: cached member indexes, os.walk-style listings and in-place member reads.
+
+A member is addressed like a file in a folder named after its archive: logs/bundle.zip/var/log/app.log
+"""
+
+import io
+import json
+import os
+import re
+import sqlite3
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict, namedtuple
+from contextlib import closing
+
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.core import iter_directory_listings
+from parsing_tool.sniff import SNIFF_SIZE, BinaryFileError, sniff_encoding
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tbz', '.tar.xz', '.txz')
+COMPRESSED_TAR_SUFFIXES = ARCHIVE_SUFFIXES[2:]
+
+DEFAULT_MAX_ARCHIVES = 500
+# Open archive readers kept between reads
+MAX_OPEN_ARCHIVES = 8
+# Small members of a compressed tar read past on the way to a requested one, kept for the requests that follow
+LOOKAHEAD_BYTES = 16 * 1024 * 1024
+LOOKAHEAD_MEMBER_BYTES = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    path BLOB PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    members BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+# name: normalised path inside the archive; member: the archive's own name for it; offset: tar data offset (zip: -1)
+ArchiveMember = namedtuple('ArchiveMember', 'name member size offset')
+
+_SEPARATORS = re.escape(os.sep + (os.altsep or ''))
+_MEMBER_PATH = re.compile(r'(?:' + '|'.join(re.escape(suffix) for suffix in ARCHIVE_SUFFIXES) + r')'
+                          r'(?=[' + _SEPARATORS + r'])', re.IGNORECASE)
+
+def is_archive_name(name):
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def split_member_path(path):
+    """ (archive path, member name) when path points inside an archive file, else None """
+    for m in _MEMBER_PATH.finditer(path):
+        archive = path[:m.end()]
+        if os.path.isfile(archive):
+            return archive, path[m.end() + 1:].replace(os.sep, '/')
+    return None
+
+def _normalise(name):
+    """ Member name as a relative '/'-separated path, or None for names that would leave the archive """
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts:
+        return None
+    return '/'.join(parts)
+
+def scan_members(archive_path, is_cancelled=None):
+    """ ArchiveMembers of the regular files in an archive, in archive order; None when cancelled """
+    members = []
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = _normalise(info.filename)
+                if name is not None and not info.is_dir():
+                    members.append(ArchiveMember(name, info.filename, info.file_size, -1))
+        return members
+    # Member data is skipped over: seeked past in a plain tar, decompressed front to back once in a compressed one
+    with tarfile.open(archive_path, 'r:*') as archive:
+        for info in archive:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            name = _normalise(info.name)
+            if name is not None and info.isfile():
+                members.append(ArchiveMember(name, info.name, info.size, info.offset_data))
+    return members
+
+class _TarStream:
+    """ Reads members of a compressed tar in archive order through one forward-only stream.
+
+    A requested member is streamed straight off the archive, so it is never held in memory whole; the stream serves
+    one member at a time and its lock is held until that member is closed. Small members passed over on the way
+    (up to LOOKAHEAD_MEMBER_BYTES each, LOOKAHEAD_BYTES in all) are kept for the requests that follow, so the parse
+    engine's slightly out-of-order reads do not restart decompression; going back to a larger one does.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._archive = None
+        self._iterator = None
+        self._position = -1
+        self._lookahead = OrderedDict()
+        self._lookaheadBytes = 0
+        self.lock = threading.Lock()
+
+    def _restart(self):
+        self._closeArchive()
+        self._archive = tarfile.open(self.path, 'r|*')
+        self._iterator = iter(self._archive)
+        self._position = -1
+
+    def keep(self, name, data):
+        """ Holds on to a small member's contents for a later request; called with the lock held """
+        if len(data) > LOOKAHEAD_MEMBER_BYTES:
+            return
+        self._lookahead[name] = data
+        self._lookaheadBytes += len(data)
+        while self._lookaheadBytes > LOOKAHEAD_BYTES:
+            _, dropped = self._lookahead.popitem(last=False)
+            self._lookaheadBytes -= len(dropped)
+
+    def open(self, member):
+        """ Binary stream of a member; the stream is busy until it is closed """
+        self.lock.acquire()
+        try:
+            data = self._lookahead.pop(member.member, None)
+            if data is not None:
+                self._lookaheadBytes -= len(data)
+                self.lock.release()
+                return io.BytesIO(data)
+            if self._archive is None or member.offset <= self._position:
+                self._restart()
+            for info in self._iterator:
+                self._position = info.offset_data
+                if not info.isfile():
+                    continue
+                if info.name == member.member:
+                    return io.BufferedReader(_TarMember(self, info, self._archive.extractfile(info)))
+                if info.size <= LOOKAHEAD_MEMBER_BYTES:
+                    self.keep(info.name, self._archive.extractfile(info).read())
+            raise KeyError(f"{member.member} not found in {self.path}")
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def _closeArchive(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+            self._iterator = None
+
+    def close(self):
+        # Waits for a member being read on another thread to be closed first
+        with self.lock:
+            self._closeArchive()
+            self._lookahead.clear()
+            self._lookaheadBytes = 0
+
+class _TarMember(io.RawIOBase):
+    """ The member a _TarStream is positioned at, read off the stream; closing it hands the stream back.
+
+    A small member closed before its end (sniffed, say) is kept whole, so reading it again does not restart
+    decompression.
+    """
+
+    def __init__(self, stream, info, file):
+        self._stream = stream
+        self._name = info.name
+        self._file = file
+        self._head = bytearray() if info.size <= LOOKAHEAD_MEMBER_BYTES else None
+        self._finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        if not count:
+            self._finished = True
+        elif self._head is not None:
+            self._head += memoryview(buffer)[:count]
+        return count
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._head is not None and not self._finished:
+                self._stream.keep(self._name, bytes(self._head) + self._file.read())
+        finally:
+            super().close()
+            self._stream.lock.release()
+
+class _Slice(io.RawIOBase):
+    """ size bytes of a file from offset on: an uncompressed tar member, read in place """
+
+    def __init__(self, path, offset, size):
+        self._file = open(path, 'rb')
+        self._offset = offset
+        self._size = size
+        self._position = 0
+        self._file.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self._position
+        elif whence == io.SEEK_END:
+            position += self._size
+        self._position = max(0, min(position, self._size))
+        self._file.seek(self._offset + self._position)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._size - self._position)
+        if count <= 0:
+            return 0
+        data = self._file.read(count)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+class _Prefixed(io.RawIOBase):
+    """ A stream with its first bytes (already read for sniffing) put back in front """
+
+    def __init__(self, head, stream):
+        self._head = head
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            count = min(len(buffer), len(self._head))
+            buffer[:count] = self._head[:count]
+            self._head = self._head[count:]
+            return count
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._stream.close()
+        super().close()
+
+class ArchiveIndex:
+    """ Member indexes of archives, kept in memory and in SQLite, revalidated by the archive's size and mtime.
+
+    Reopening a large archive (a .tar.gz has to be decompressed end to end to be listed) then costs one stat.
+    Readers of recently used archives stay open between reads; zip members are streamed, tar members are read by
+    offset (uncompressed) or through a shared forward-only stream (compressed), which cannot seek.
+    """
+
+    def __init__(self, path=None, max_archives=DEFAULT_MAX_ARCHIVES):
+        self.path = path or user_cache_dir('archives.sqlite3')
+        self.max_archives = max_archives
+        self._indexes = {}
+        self._readers = OrderedDict()
+        self._lock = threading.Lock()
+        self._diskReady = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _disk(self):
+        """ Whether the SQLite cache can be used; an unwritable cache folder leaves the index in memory only """
+        if self._diskReady is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with closing(self._connect()) as conn:
+                    conn.executescript(SCHEMA)
+                self._diskReady = True
+            except (OSError, sqlite3.Error):
+                self._diskReady = False
+        return self._diskReady
+
+    def _load(self, archive_path, stat):
+        if not self._disk():
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute('SELECT size, mtime_ns, members FROM archives WHERE path = ?',
+                                   (archive_path.encode('utf-8', 'surrogatepass'),)).fetchone()
+                if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+                    return None
+                with conn:
+                    conn.execute('UPDATE archives SET last_used = ? WHERE path = ?',
+                                 (time.time(), archive_path.encode('utf-8', 'surrogatepass')))
+        except sqlite3.Error:
+            return None
+        return [ArchiveMember(*fields) for fields in json.loads(zlib.decompress(row[2]))]
+
+    def _store(self, archive_path, stat, members):
+        if not self._disk():
+            return
+        blob = zlib.compress(json.dumps(members).encode('utf-8', 'surrogatepass'), 1)
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO archives VALUES (?, ?, ?, ?, ?)',
+                             (archive_path.encode('utf-8', 'surrogatepass'), stat.st_size, stat.st_mtime_ns, blob,
+                              time.time()))
+                conn.execute('DELETE FROM archives WHERE path IN (SELECT path FROM archives ORDER BY last_used DESC '
+                             'LIMIT -1 OFFSET ?)', (self.max_archives,))
+        except sqlite3.Error:
+            pass
+
+    def members(self, archive_path, is_cancelled=None):
+        """ {member name: ArchiveMember} of archive_path, in archive order; None when cancelled while scanning """
+        stat = os.stat(archive_path)
+        cached = self._indexes.get(archive_path)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+        members = self._load(archive_path, stat)
+        if members is None:
+            try:
+                members = scan_members(archive_path, is_cancelled)
+            except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+                raise OSError(f"Cannot read archive {archive_path}: {e}")
+            if members is None:
+                return None
+            self._store(archive_path, stat, members)
+        index = {member.name: member for member in members}
+        with self._lock:
+            self._indexes[archive_path] = ((stat.st_size, stat.st_mtime_ns), index)
+        return index
+
+    def iterListings(self, archive_path, is_cancelled=None):
+        """ (root, file names, subdirectory names) of the archive's folders in os.walk order, rooted at archive_path.
+
+        As with os.walk, removing names from the yielded subdirectory list keeps the walk out of them.
+        """
+        members = self.members(archive_path, is_cancelled)
+        if members is None:
+            return
+        tree = {'': ([], [])}
+        for name in members:
+            folder, _, file_name = name.rpartition('/')
+            parent = ''
+            for part in folder.split('/') if folder else ():
+                path = f"{parent}/{part}" if parent else part
+                if path not in tree:
+                    tree[path] = ([], [])
+                    tree[parent][1].append(part)
+                parent = path
+            tree[folder][0].append(file_name)
+        stack = [(archive_path, '')]
+        while stack:
+            if is_cancelled is not None and is_cancelled():
+                return
+            root, key = stack.pop()
+            files, subdirs = tree[key]
+            subdirs = list(subdirs)
+            yield root, list(files), subdirs
+            stack.extend((os.path.join(root, name), f"{key}/{name}" if key else name) for name in reversed(subdirs))
+
+    def member(self, member_path):
+        """ (archive path, ArchiveMember) of member_path; OSError when there is no such member """
+        split = split_member_path(member_path)
+        if split is None:
+            raise FileNotFoundError(f"Not inside an archive: {member_path}")
+        archive_path, name = split
+        member = self.members(archive_path).get(name)
+        if member is None:
+            raise FileNotFoundError(f"No member {name} in {archive_path}")
+        return archive_path, member
+
+    def _reader(self, archive_path):
+        stat = os.stat(archive_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        evicted = []
+        with self._lock:
+            cached = self._readers.pop(archive_path, None)
+            if cached is not None:
+                if cached[0] == signature:
+                    self._readers[archive_path] = cached
+                    return cached[1]
+                # Rewritten since it was opened: the open handle still reads the old file
+                evicted.append(cached[1])
+            if archive_path.lower().endswith('.zip'):
+                reader = zipfile.ZipFile(archive_path)
+            elif archive_path.lower().endswith(COMPRESSED_TAR_SUFFIXES):
+                reader = _TarStream(archive_path)
+            else:
+                # Plain tars are read by offset; there is nothing to keep open
+                reader = archive_path
+            self._readers[archive_path] = (signature, reader)
+            while len(self._readers) > MAX_OPEN_ARCHIVES:
+                evicted.append(self._readers.popitem(last=False)[1][1])
+        # Closing a tar stream waits for a member still being read from it; other archives need not wait too
+        for closing_reader in evicted:
+            if not isinstance(closing_reader, str):
+                closing_reader.close()
+        return reader
+
+    def open(self, member_path):
+        """ Binary stream of a member's contents """
+        archive_path, member = self.member(member_path)
+        reader = self._reader(archive_path)
+        if isinstance(reader, zipfile.ZipFile):
+            return reader.open(member.member)
+        if isinstance(reader, _TarStream):
+            return reader.open(member)
+        return io.BufferedReader(_Slice(archive_path, member.offset, member.size))
+
+    def read(self, member_path):
+        with self.open(member_path) as f:
+            return f.read()
+
+    def openText(self, member_path):
+        """ Text stream of a member in its sniffed encoding; raises BinaryFileError for binaries """
+        stream = self.open(member_path)
+        try:
+            head = stream.read(SNIFF_SIZE)
+            encoding = sniff_encoding(head)
+            if encoding is None:
+                raise BinaryFileError(member_path)
+            return io.TextIOWrapper(prefixed(head, stream), encoding=encoding, errors='replace')
+        except BaseException:
+            stream.close()
+            raise
+
+    def close(self):
+        with self._lock:
+            readers = [reader for _, reader in self._readers.values()]
+            self._readers.clear()
+        for reader in readers:
+            if not isinstance(reader, str):
+                reader.close()
+
+# Shared by the GUI, the CLI and the parse engine
+default_archive_index = ArchiveIndex()
+
+def archive_lister(base_lister=iter_directory_listings, index=None):
+    """ Lister that walks with base_lister and shows each archive it meets as a subfolder with the archive's folders
+    below it. The archive folders come right after the listing of the folder holding the archive. """
+    index = index or default_archive_index
+
+    def iterListings(folder, is_cancelled=None):
+        for root, files, subdirs in base_lister(folder, is_cancelled):
+            archives = [name for name in files if is_archive_name(name)]
+            if not archives:
+                yield root, files, subdirs
+                continue
+            files = [name for name in files if not is_archive_name(name)]
+            archive_set = set(archives)
+            folders = subdirs + archives
+            yield root, files, folders
+            # The caller may have pruned folders: the real ones go back to the base walk, the archives are ours
+            subdirs[:] = [name for name in folders if name not in archive_set]
+            for name in folders:
+                if name in archive_set:
+                    try:
+                        yield from index.iterListings(os.path.join(root, name), is_cancelled)
+                    except OSError:
+                        continue
+    return iterListings
+
+def member_signature(member_path, index=None):
+    """ (size, mtime_ns) standing in for an archive member's stat: its own size and its archive's mtime """
+    index = index or default_archive_index
+    archive_path, member = index.member(member_path)
+    return member.size, os.stat(archive_path).st_mtime_ns
+
+def prefixed(head, stream):
+    """ Buffered binary stream reading head and then the rest of stream, for streams that cannot seek back after
+    sniffing (compressed tar members) """
+    return io.BufferedReader(_Prefixed(head, stream))
+
+def open_binary(file_path):
+    """ Binary stream of a file or of an archive member """
+    if split_member_path(file_path) is not None:
+        return default_archive_index.open(file_path)
+    return open(file_path, 'rb')
@@ -0,0 +1,160 @@
+""" Command line entry point; usage: python main.py parse DIR [--ext .log] [-o out.txt] """
+
+import argparse
+import os
+import re
+import sys
+
+from parsing_tool.core import iter_directory_listings, iter_files, render_file_structure
+from parsing_tool.export import COMPRESSORS, compression_for_path, open_export, write_parse_output
+from parsing_tool.ignore import IGNORE_FILES, IgnoreMatcher
+
+COMMANDS = ('parse', 'structure')
+
+def add_walk_arguments(parser):
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='Only include files matching GLOB (repeatable, .gitignore syntax), e.g. "*.log"')
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='Skip files and folders matching GLOB (repeatable), e.g. "build/"')
+    parser.add_argument('--no-ignore-files', action='store_true',
+                        help='Do not apply .gitignore / .parsingignore rules found in the walked folders')
+    parser.add_argument('--index-cache', action='store_true',
+                        help='Reuse and update the persistent folder listing cache')
+    parser.add_argument('--archives', action='store_true',
+                        help='Walk into .zip and .tar archives as folders and read their files in place')
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='parsing-tool', description='TSTP:Parsing Tool (headless mode)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = subparsers.add_parser('parse', help='Concatenate files in the same format as the Parse button')
+    parse_parser.add_argument('paths', nargs='+', help='Folders to walk and/or individual files')
+    parse_parser.add_argument('--ext', action='append', dest='extensions', metavar='EXT',
+                              help='Only include files ending with EXT (repeatable), e.g. .log')
+    parse_parser.add_argument('-o', '--output', help='Write to this file instead of stdout')
+    parse_parser.add_argument('--compress', choices=sorted(COMPRESSORS),
+                              help='Compress the output file (default: inferred from a .gz/.xz/.bz2 name)')
+    parse_parser.add_argument('--changed', action='store_true',
+                              help='Only output files added or modified since the last --changed run on each '
+                                   'folder, plus a list of deleted files')
+    add_walk_arguments(parse_parser)
+    formats = parse_parser.add_argument_group('format parsers', 'Extract records from .xml and .log files '
+                                              'instead of copying them whole')
+    formats.add_argument('--xpath', action='append', metavar='PATH',
+                         help="Output the XML elements PATH selects (repeatable; XPath subset, e.g. "
+                              "\"//event[@type='error']/message/text()\")")
+    formats.add_argument('--log-pattern', metavar='REGEX',
+                         help='Regex matched at the start of each log record; its named groups are the fields, '
+                              'and groups named time and level drive --since/--until and --level')
+    formats.add_argument('--log-fields', metavar='NAMES', help='Output only these comma-separated fields per record')
+    formats.add_argument('--level', action='append', dest='levels', metavar='LEVEL',
+                         help='Only output log records of LEVEL (repeatable), e.g. ERROR')
+    formats.add_argument('--since', metavar='TIME', help='Only output log records at or after TIME, e.g. 2024-01-05 13:00')
+    formats.add_argument('--until', metavar='TIME', help='Only output log records at or before TIME')
+
+    structure_parser = subparsers.add_parser('structure', help='Print the folder tree like Copy File Structure')
+    structure_parser.add_argument('folder')
+    structure_parser.add_argument('-o', '--output', help='Write to this file instead of stdout')
+    structure_parser.add_argument('--max-depth', type=int, metavar='N', help='Only expand N folder levels')
+    structure_parser.add_argument('--max-entries', type=int, metavar='N',
+                                  help='List at most N files and N subfolders per folder')
+    structure_parser.add_argument('--sizes', action='store_true', help='Show file sizes')
+    structure_parser.add_argument('--line-counts', action='store_true', help='Show line counts of text files')
+    structure_parser.add_argument('--no-sort', action='store_true', help='Keep directory order instead of sorting')
+    add_walk_arguments(structure_parser)
+    return parser
+
+def directory_lister(args, folder):
+    """ Lister for walks under folder with the command's cache, archive and ignore options applied """
+    if args.index_cache:
+        from parsing_tool.dirindex import DirectoryIndex
+        lister = DirectoryIndex().iterListings
+    else:
+        lister = iter_directory_listings
+    if args.archives:
+        from parsing_tool.archives import archive_lister
+        lister = archive_lister(lister)
+    ignore_files = () if args.no_ignore_files else IGNORE_FILES
+    return IgnoreMatcher(folder, args.include or (), args.exclude or (), ignore_files).lister(lister)
+
+def collect_files(paths, extensions=None, lister_for=lambda folder: iter_directory_listings):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_files(path, extensions, lister=lister_for(path))
+        else:
+            yield path
+
+def collect_changed_files(paths, extensions, lister_for, manifest):
+    """ Changed files of each folder (individual files are always included) and the (folder, SnapshotDiff) pairs """
+    from parsing_tool.manifest import diff_snapshot
+    files = []
+    snapshots = []
+    for path in paths:
+        if os.path.isdir(path):
+            folder = os.path.abspath(path)
+            diff = diff_snapshot(iter_files(folder, extensions, lister=lister_for(path)), manifest.load(folder))
+            files.extend(diff.added + diff.modified)
+            snapshots.append((folder, diff))
+        else:
+            files.append(path)
+    return files, snapshots
+
+def open_output(output):
+    """ Text stream for output, or stdout (left open) when no file is given """
+    if output:
+        return open(output, 'w', encoding='utf-8')
+    return open(sys.stdout.fileno(), 'w', encoding='utf-8', closefd=False)
+
+def run_parse(args):
+    # Imported per command, like the listing cache: a command should not pay for the others' dependencies at start-up
+    from parsing_tool.parsers import build_parser_set
+    errors = []
+    skipped = []
+    try:
+        parsers = build_parser_set(args.xpath or (), args.log_pattern, args.levels, args.since, args.until,
+                                   args.log_fields.split(',') if args.log_fields else None)
+    except (ValueError, re.error) as e:
+        print(f"Invalid format parser option: {e}", file=sys.stderr)
+        return 2
+    lister_for = lambda folder: directory_lister(args, folder)
+    snapshots = []
+    if args.changed:
+        from parsing_tool.manifest import SnapshotManifest, format_deleted_files
+        manifest = SnapshotManifest()
+        files, snapshots = collect_changed_files(args.paths, args.extensions, lister_for, manifest)
+    else:
+        files = collect_files(args.paths, args.extensions, lister_for)
+    if args.output:
+        out = open_export(args.output, args.compress or compression_for_path(args.output))
+    else:
+        out = open_output(None)
+    with out:
+        write_parse_output(files, out, errors=errors, skipped=skipped, parsers=parsers)
+        for folder, diff in snapshots:
+            out.write(format_deleted_files(folder, diff.deleted))
+    for folder, diff in snapshots:
+        manifest.save(folder, diff.entries)
+        print(f"{folder}: {len(diff.added)} added, {len(diff.modified)} modified, {len(diff.deleted)} deleted",
+              file=sys.stderr)
+    if skipped:
+        print(f"Skipped {len(skipped)} binary file(s)", file=sys.stderr)
+    for file_path, error in errors:
+        print(f"Error reading {file_path}: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+def run_structure(args):
+    from parsing_tool.structure import StructureOptions
+    if not os.path.isdir(args.folder):
+        print(f"Not a folder: {args.folder}", file=sys.stderr)
+        return 2
+    with open_output(args.output) as out:
+        options = StructureOptions(sort=not args.no_sort, max_depth=args.max_depth, max_entries=args.max_entries,
+                                   sizes=args.sizes, line_counts=args.line_counts)
+        out.write(render_file_structure(args.folder, directory_lister(args, args.folder), options))
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'parse':
+        return run_parse(args)
+    return run_structure(args)
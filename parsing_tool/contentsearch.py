@@ -0,0 +1,312 @@
+""" Trigram index over file contents for fast substring and regex search across a folder """
+
+import hashlib
+import os
+import re
+import sqlite3
+from array import array
+from collections import namedtuple
+from contextlib import closing
+
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.core import iter_directory_listings, iter_files
+from parsing_tool.sniff import BinaryFileError, open_text_file
+
+SearchHit = namedtuple('SearchHit', 'path line_number line')
+
+READ_CHUNK = 1024 * 1024
+DEFAULT_MAX_FILE_SIZE = 256 * 1024 * 1024
+
+# files.state values
+INDEXED = 1
+UNINDEXED = 0   # too large to index; always scanned
+BINARY = 2      # never matches
+
+# Bumped when what gets indexed changes; an index built by an older version is dropped and rebuilt
+INDEX_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    state INTEGER NOT NULL,
+    alive INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS files_alive ON files(alive);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER NOT NULL,
+    ids BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_trigram ON postings(trigram);
+"""
+
+REGEX_METACHARACTERS = set('.^$*+?{}[]()|')
+# (?aiLmsux) global flags and (?i:...) / (?-i:...) scoped ones
+INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]+[:)]')
+
+def _encode(text):
+    return text.encode('utf-8', 'surrogatepass')
+
+def _decode(blob):
+    return blob.decode('utf-8', 'surrogatepass')
+
+def fold(text):
+    """ text casefolded and encoded as UTF-8, the form trigrams are taken from for both files and queries.
+
+    Casefolding (not bytes.lower(), which only knows ASCII) keeps every file the case-insensitive verification
+    would match among the candidates, for non-ASCII text too.
+    """
+    return _encode(text.casefold())
+
+def text_trigrams(data):
+    """ Distinct 3-byte sequences within the lines of data (folded text, see fold) """
+    trigrams = set()
+    for line in set(data.split(b'\n')):
+        trigrams.update(line[i:i + 3] for i in range(len(line) - 2))
+    return trigrams
+
+def file_trigrams(file_path):
+    """ Trigram set of a file's folded text, whatever encoding it was sniffed as, or None when it looks binary """
+    trigrams = set()
+    tail = ''
+    try:
+        f = open_text_file(file_path)
+    except BinaryFileError:
+        return None
+    with f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), ''):
+            chunk = tail + chunk
+            cut = chunk.rfind('\n') + 1
+            tail = chunk[cut:]
+            trigrams |= text_trigrams(fold(chunk[:cut]))
+    trigrams |= text_trigrams(fold(tail))
+    return trigrams
+
+def required_literals(query, regex=False):
+    """ Literal substrings every match must contain; an empty list means the index cannot narrow the search """
+    if not regex:
+        return [query]
+    if INLINE_FLAGS.search(query):
+        # (?x) makes whitespace and # comments non-literal, and other flags change what the literals match
+        return []
+    literals = []
+    current = []
+    i = 0
+    while i < len(query):
+        char = query[i]
+        if char == '|':
+            # Alternation: no single literal is mandatory
+            return []
+        if char == '\\' and i + 1 < len(query):
+            escaped = query[i + 1]
+            i += 2
+            if escaped.isalnum():
+                literals.append(''.join(current))
+                current = []
+            else:
+                current.append(escaped)
+            continue
+        if char in '*?{':
+            # The previous atom is optional or repeated an unknown number of times
+            if current:
+                current.pop()
+            literals.append(''.join(current))
+            current = []
+            if char == '{':
+                close = query.find('}', i)
+                i = close + 1 if close >= 0 else i + 1
+                continue
+        elif char == '[':
+            literals.append(''.join(current))
+            current = []
+            close = query.find(']', i + 2)
+            i = close + 1 if close >= 0 else len(query)
+            continue
+        elif char == '(':
+            # Group contents may be optional or alternatives; skip to the matching parenthesis
+            literals.append(''.join(current))
+            current = []
+            depth = 0
+            while i < len(query):
+                if query[i] == '\\':
+                    i += 2
+                    continue
+                if query[i] == '[':
+                    close = query.find(']', i + 2)
+                    i = close + 1 if close >= 0 else len(query)
+                    continue
+                if query[i] == '(':
+                    depth += 1
+                elif query[i] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            i += 1
+            continue
+        elif char in REGEX_METACHARACTERS:
+            literals.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    literals.append(''.join(current))
+    return [literal for literal in literals if literal]
+
+class ContentIndex:
+    """ Persistent trigram index of the files under folder.
+
+    Postings are stored per indexing batch as packed arrays of file ids. Changed and deleted files are
+    tombstoned and re-added under a new id; the index is rebuilt once tombstones outnumber live files.
+    Candidates from the index are always verified against the file contents.
+    """
+
+    BATCH_FILES = 256
+
+    def __init__(self, folder, path=None, lister=iter_directory_listings, max_file_size=DEFAULT_MAX_FILE_SIZE):
+        self.folder = folder
+        digest = hashlib.sha1(_encode(os.path.abspath(folder))).hexdigest()
+        self.path = path or user_cache_dir('contentindex', f'{digest}.sqlite3')
+        self.lister = lister
+        self.max_file_size = max_file_size
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            if conn.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+                conn.executescript('DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS files;')
+                conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def update(self, is_cancelled=None, progress=None):
+        """ Indexes new and changed files and tombstones removed ones; returns (indexed, removed) counts """
+        with closing(self._connect()) as conn:
+            known = {}
+            for file_id, path, size, mtime_ns in conn.execute(
+                    'SELECT id, path, size, mtime_ns FROM files WHERE alive = 1'):
+                known[_decode(path)] = (file_id, size, mtime_ns)
+            seen = set()
+            stale = []
+            pending = []
+            indexed = 0
+            for file_path in iter_files(self.folder, is_cancelled=is_cancelled, lister=self.lister):
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                seen.add(file_path)
+                entry = known.get(file_path)
+                if entry is not None:
+                    if entry[1] == st.st_size and entry[2] == st.st_mtime_ns:
+                        continue
+                    stale.append(entry[0])
+                pending.append((file_path, st.st_size, st.st_mtime_ns))
+                if len(pending) >= self.BATCH_FILES:
+                    indexed += self._indexBatch(conn, pending, stale, is_cancelled)
+                    pending = []
+                    stale = []
+                    if progress is not None:
+                        progress(indexed)
+            if is_cancelled is not None and is_cancelled():
+                return indexed, 0
+            removed = [entry[0] for path, entry in known.items() if path not in seen]
+            indexed += self._indexBatch(conn, pending, stale + removed, is_cancelled)
+            if progress is not None:
+                progress(indexed)
+            dead, alive = conn.execute('SELECT COUNT(*) - SUM(alive), SUM(alive) FROM files').fetchone()
+        if dead and dead > max(alive or 0, 1000):
+            return self._rebuild(is_cancelled, progress)
+        return indexed, len(removed)
+
+    def _indexBatch(self, conn, pending, stale, is_cancelled=None):
+        postings = {}
+        rows = []
+        for file_path, size, mtime_ns in pending:
+            if is_cancelled is not None and is_cancelled():
+                break
+            state = UNINDEXED
+            trigrams = ()
+            if size <= self.max_file_size:
+                try:
+                    trigrams = file_trigrams(file_path)
+                except OSError:
+                    continue
+                state = BINARY if trigrams is None else INDEXED
+            rows.append((file_path, size, mtime_ns, state, trigrams or ()))
+        with conn:
+            conn.executemany('UPDATE files SET alive = 0 WHERE id = ?', ((file_id,) for file_id in stale))
+            for file_path, size, mtime_ns, state, trigrams in rows:
+                file_id = conn.execute('INSERT INTO files (path, size, mtime_ns, state) VALUES (?, ?, ?, ?)',
+                                       (_encode(file_path), size, mtime_ns, state)).lastrowid
+                for trigram in trigrams:
+                    ids = postings.get(trigram)
+                    if ids is None:
+                        ids = postings[trigram] = array('I')
+                    ids.append(file_id)
+            conn.executemany('INSERT INTO postings VALUES (?, ?)',
+                             ((int.from_bytes(trigram, 'big'), ids.tobytes()) for trigram, ids in postings.items()))
+        return len(rows)
+
+    def _rebuild(self, is_cancelled=None, progress=None):
+        """ Drops the tombstoned index and indexes the folder afresh; returns that update's counts """
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute('DELETE FROM postings')
+                conn.execute('DELETE FROM files')
+            conn.execute('VACUUM')
+        return self.update(is_cancelled, progress)
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM postings')
+            conn.execute('DELETE FROM files')
+
+    def candidates(self, conn, query, regex=False):
+        """ (path of every live file that may match, in walk order) using the trigram postings """
+        files = {}
+        for file_id, path, state in conn.execute('SELECT id, path, state FROM files WHERE alive = 1'):
+            if state != BINARY:
+                files[file_id] = (_decode(path), state)
+        trigrams = set()
+        for literal in required_literals(query, regex):
+            data = fold(literal)
+            trigrams.update(int.from_bytes(data[i:i + 3], 'big') for i in range(len(data) - 2))
+        if not trigrams:
+            return [path for path, _ in files.values()]
+        matched = None
+        for trigram in trigrams:
+            ids = set()
+            for (blob,) in conn.execute('SELECT ids FROM postings WHERE trigram = ?', (trigram,)):
+                posting = array('I')
+                posting.frombytes(blob)
+                ids.update(posting)
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        return [path for file_id, (path, state) in files.items() if state == UNINDEXED or file_id in matched]
+
+    def search(self, query, regex=False, case_sensitive=False, max_results=1000, is_cancelled=None):
+        """ SearchHit for every matching line (1-based line numbers), up to max_results """
+        pattern = re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+        with closing(self._connect()) as conn:
+            candidates = self.candidates(conn, query, regex)
+        hits = []
+        for file_path in candidates:
+            if is_cancelled is not None and is_cancelled():
+                break
+            try:
+                with open_text_file(file_path) as f:
+                    for line_number, line in enumerate(f, 1):
+                        if pattern.search(line):
+                            hits.append(SearchHit(file_path, line_number, line.rstrip('\r\n')))
+                            if len(hits) >= max_results:
+                                return hits
+            except (OSError, BinaryFileError):
+                continue
+        return hits
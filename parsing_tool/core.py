@@ -0,0 +1,96 @@
+import os
+
+from parsing_tool.engine import ParseEngine
+from parsing_tool.sniff import BinaryFileError
+
+PARSE_SEPARATOR = '#' * 50
+
+def matches_file_type(name, extensions=None):
+    """ True when no extensions are given or the file name ends with one of them """
+    if not extensions:
+        return True
+    return name.endswith(tuple(extensions))
+
+def list_directory(root, is_cancelled=None):
+    """ (file names, subdirectory names) of root as os.walk classifies them; None when cancelled part way.
+
+    Symlinks to directories are neither files nor walked subdirectories, matching os.walk(followlinks=False).
+    """
+    files = []
+    subdirs = []
+    with os.scandir(root) as it:
+        for entry in it:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    subdirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    return files, subdirs
+
+def iter_directory_listings(folder, is_cancelled=None):
+    """ Walks folder with os.scandir in os.walk order and yields (root, file names, subdirectory names).
+
+    As with os.walk, removing names from the yielded subdirectory list keeps the walk out of them.
+    """
+    # Same top-down order as os.walk: a directory's files first, then its subdirectories
+    stack = [folder]
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return
+        root = stack.pop()
+        try:
+            listing = list_directory(root, is_cancelled)
+        except OSError:
+            continue
+        if listing is None:
+            return
+        files, subdirs = listing
+        yield root, files, subdirs
+        stack.extend(os.path.join(root, name) for name in reversed(subdirs))
+
+def iter_directory_files(folder, extensions=None, is_cancelled=None, lister=iter_directory_listings):
+    """ Yields (root, matching file paths) per directory; lister can be swapped for a cached walker """
+    for root, files, _ in lister(folder, is_cancelled):
+        yield root, [os.path.join(root, name) for name in files if matches_file_type(name, extensions)]
+
+def iter_files(folder, extensions=None, is_cancelled=None, lister=iter_directory_listings):
+    for _, files in iter_directory_files(folder, extensions, is_cancelled, lister):
+        yield from files
+
+PARSE_ENTRY_SUFFIX = f"\n\n\n{PARSE_SEPARATOR}"
+
+def parse_entry_prefix(file_path):
+    return f"\n\n\n{'#' * 4} {os.path.basename(file_path)}:\n\n\n"
+
+def format_parse_entry(file_path, content):
+    """ Text appended to the parse output for one file, including its trailing separator """
+    return parse_entry_prefix(file_path) + content + PARSE_ENTRY_SUFFIX
+
+def iter_parse_output(files, engine=None, errors=None, skipped=None):
+    """ Yields the parse output in chunks; unreadable files are recorded in errors and binaries in skipped """
+    engine = engine or ParseEngine()
+    yield PARSE_SEPARATOR
+    for _, file_path, content, error in engine.iterResults(files):
+        if isinstance(error, BinaryFileError):
+            if skipped is not None:
+                skipped.append(file_path)
+            continue
+        if error is not None:
+            if errors is not None:
+                errors.append((file_path, str(error)))
+            continue
+        yield format_parse_entry(file_path, content)
+
+def render_parse_output(files, errors=None, skipped=None):
+    return ''.join(iter_parse_output(files, errors=errors, skipped=skipped))
+
+def render_file_structure(folder, lister=iter_directory_listings, options=None):
+    """ Indented tree of folder; see structure.StructureOptions for sorting, depth, caps and annotations """
+    from parsing_tool.structure import render_structure
+    return render_structure(folder, lister, options)
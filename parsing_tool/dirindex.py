@@ -0,0 +1,147 @@
+""" Persistent SQLite index of directory listings, revalidated by directory mtime """
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.core import list_directory
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Listings of directories modified this recently are not stored: another change within the same
+# mtime tick would otherwise go unnoticed
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    root BLOB PRIMARY KEY,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    root BLOB NOT NULL,
+    path BLOB NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    files BLOB NOT NULL,
+    subdirs BLOB NOT NULL,
+    PRIMARY KEY (root, path)
+) WITHOUT ROWID;
+"""
+
+def _encode(text):
+    return text.encode('utf-8', 'surrogatepass')
+
+def _encode_names(names):
+    return b'\0'.join(_encode(name) for name in names)
+
+def _decode_names(blob):
+    if not blob:
+        return []
+    return blob.decode('utf-8', 'surrogatepass').split('\0')
+
+class DirectoryIndex:
+    """ Caches directory listings per walked root so re-walks only re-list directories whose mtime changed.
+
+    Roots are evicted least recently used first once the stored listings exceed max_bytes.
+    iterListings has the same signature as core.iter_directory_listings and can be passed as a lister.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or user_cache_dir('dirindex.sqlite3')
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per walk, so walks on worker threads never share a connection
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def iterListings(self, folder, is_cancelled=None):
+        """ Yields (root, file names, subdirectory names) in os.walk order, reusing unchanged listings.
+
+        Subdirectories removed from the yielded list are not walked (and fall out of the cache).
+        """
+        conn = self._connect()
+        root_key = _encode(folder)
+        cached = {}
+        for path, mtime_ns, files, subdirs in conn.execute(
+                'SELECT path, mtime_ns, files, subdirs FROM dirs WHERE root = ?', (root_key,)):
+            cached[path] = (mtime_ns, files, subdirs)
+        updates = []
+        seen = set()
+        completed = False
+        started_ns = time.time_ns()
+        try:
+            stack = [folder]
+            while stack:
+                if is_cancelled is not None and is_cancelled():
+                    break
+                root = stack.pop()
+                try:
+                    mtime_ns = os.stat(root).st_mtime_ns
+                except OSError:
+                    continue
+                key = _encode(root)
+                seen.add(key)
+                entry = cached.get(key)
+                if entry is not None and entry[0] == mtime_ns:
+                    files = _decode_names(entry[1])
+                    subdirs = _decode_names(entry[2])
+                else:
+                    try:
+                        listing = list_directory(root, is_cancelled)
+                    except OSError:
+                        continue
+                    if listing is None:
+                        break
+                    files, subdirs = listing
+                    if started_ns - mtime_ns > RACY_WINDOW_NS:
+                        updates.append((root_key, key, mtime_ns, _encode_names(files), _encode_names(subdirs)))
+                yield root, files, subdirs
+                stack.extend(os.path.join(root, name) for name in reversed(subdirs))
+            else:
+                completed = True
+        finally:
+            try:
+                self._store(conn, root_key, updates, (set(cached) - seen) if completed else ())
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.close()
+
+    def _store(self, conn, root_key, updates, removed):
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)', updates)
+            conn.executemany('DELETE FROM dirs WHERE root = ? AND path = ?', ((root_key, path) for path in removed))
+            if updates or removed:
+                size = conn.execute(
+                    'SELECT COALESCE(SUM(LENGTH(path) + LENGTH(files) + LENGTH(subdirs)), 0) FROM dirs WHERE root = ?',
+                    (root_key,)).fetchone()[0]
+                conn.execute('INSERT OR REPLACE INTO roots VALUES (?, ?, ?)', (root_key, time.time(), size))
+            else:
+                conn.execute('INSERT OR IGNORE INTO roots VALUES (?, ?, 0)', (root_key, time.time()))
+                conn.execute('UPDATE roots SET last_used = ? WHERE root = ?', (time.time(), root_key))
+            self._evict(conn, root_key)
+
+    def _evict(self, conn, keep_root):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM roots').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for root, size in conn.execute('SELECT root, size FROM roots WHERE root != ? ORDER BY last_used',
+                                       (keep_root,)).fetchall():
+            conn.execute('DELETE FROM dirs WHERE root = ?', (root,))
+            conn.execute('DELETE FROM roots WHERE root = ?', (root,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM dirs')
+            conn.execute('DELETE FROM roots')
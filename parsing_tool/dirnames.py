@@ -0,0 +1,72 @@
+""" Searchable index of directory names under a root, used by the folder tree search """
+
+import os
+from array import array
+
+from parsing_tool.core import list_directory
+from parsing_tool.filtering import filter_rows
+from parsing_tool.pathstore import CompactPathStore
+
+# Virtual filesystems that are never worth indexing when the root is the filesystem root
+PSEUDO_FILESYSTEMS = ('/proc', '/sys', '/dev', '/run') if os.name == 'posix' else ()
+
+class DirectoryNameIndex:
+    """ Name and parent row of every directory under root """
+
+    def __init__(self, root):
+        self.root = root
+        self.names = CompactPathStore()
+        self.parents = array('i')
+        self.complete = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def build(self, is_cancelled=None, progress=None):
+        """ Walks root for directories only; returns False when cancelled """
+        stack = [(self.root, -1)]
+        while stack:
+            if is_cancelled is not None and is_cancelled():
+                return False
+            folder, row = stack.pop()
+            try:
+                listing = list_directory(folder, is_cancelled)
+            except OSError:
+                continue
+            if listing is None:
+                return False
+            subdirs = [name for name in listing[1] if os.path.join(folder, name) not in PSEUDO_FILESYSTEMS]
+            first = len(self.names)
+            self.names.extend(subdirs)
+            self.parents.extend([row] * len(subdirs))
+            stack.extend((os.path.join(folder, name), first + i) for i, name in reversed(list(enumerate(subdirs))))
+            if progress is not None and first // 5000 != len(self.names) // 5000:
+                progress(len(self.names))
+        self.complete = True
+        return True
+
+    def path(self, row):
+        parts = []
+        while row >= 0:
+            parts.append(self.names.name(row))
+            row = self.parents[row]
+        return os.path.join(self.root, *reversed(parts))
+
+    def search(self, text, fuzzy=False, limit=500, is_cancelled=None):
+        """ (paths of up to limit directories whose name matches, total number of matches); None when cancelled """
+        rows = filter_rows(self.names, text, fuzzy, is_cancelled=is_cancelled)
+        if rows is None:
+            return None
+        return [self.path(row) for row in rows[:limit]], len(rows)
+
+def with_ancestors(paths, root):
+    """ paths plus every directory between them and root (inclusive) """
+    visible = {root}
+    for path in paths:
+        while path not in visible:
+            visible.add(path)
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+    return visible
@@ -0,0 +1,62 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from parsing_tool.sniff import open_text_file
+
+def read_text_file(file_path):
+    """ Whole file decoded in its sniffed encoding; raises BinaryFileError for binaries """
+    with open_text_file(file_path) as f:
+        return f.read()
+
+class ParseEngine:
+    """ Reads files on a bounded thread pool and yields them back in input order """
+
+    def __init__(self, max_workers=8, max_in_flight=32, reader=read_text_file):
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_in_flight, max_workers)
+        self.reader = reader
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+    def _read(self, file_path):
+        if self._cancelled.is_set():
+            return None, None
+        try:
+            return self.reader(file_path), None
+        except Exception as e:
+            return None, e
+
+    def iterResults(self, files):
+        """ Yields (index, file_path, content, error) tuples; at most max_in_flight reads are pending at once """
+        files = iter(files)
+        in_flight = deque()
+        index = 0
+
+        def submitNext():
+            nonlocal index
+            for file_path in files:
+                in_flight.append((index, file_path, pool.submit(self._read, file_path)))
+                index += 1
+                return True
+            return False
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+        try:
+            while len(in_flight) < self.max_in_flight and submitNext():
+                pass
+            while in_flight and not self._cancelled.is_set():
+                done_index, file_path, future = in_flight.popleft()
+                content, error = future.result()
+                if self._cancelled.is_set():
+                    break
+                submitNext()
+                yield done_index, file_path, content, error
+        finally:
+            # Do not wait for reads still stuck on slow files once cancelled
+            pool.shutdown(wait=not self._cancelled.is_set(), cancel_futures=True)
@@ -0,0 +1,93 @@
+""" Streams parse output from the source files straight to a destination file in constant memory """
+
+import bz2
+import gzip
+import lzma
+import os
+
+from parsing_tool.core import PARSE_SEPARATOR, parse_entry_prefix, PARSE_ENTRY_SUFFIX
+from parsing_tool.sniff import BinaryFileError, open_text_file
+
+CHUNK_SIZE = 1024 * 1024
+
+COMPRESSORS = {
+    'gzip': gzip.open,
+    'xz': lzma.open,
+    'bz2': bz2.open,
+}
+
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.xz': 'xz',
+    '.bz2': 'bz2',
+}
+
+def compression_for_path(path):
+    """ Compression implied by the destination file name, or None for plain text """
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+def open_export(destination, compression=None):
+    """ Opens destination for text writing with the same newline handling as saveToFile and ParseSpool: '\n' is
+    written as is """
+    if compression:
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression: {compression}")
+        return COMPRESSORS[compression](destination, 'wt', encoding='utf-8', newline='')
+    return open(destination, 'w', encoding='utf-8', buffering=CHUNK_SIZE, newline='')
+
+def iter_entry_chunks(file_path, parsers=None, chunk_size=CHUNK_SIZE):
+    """ Text of one parse entry in chunks: the records of the parser that accepts the file, one per line, or else the
+    file itself read chunk_size characters at a time """
+    parser = parsers.parserFor(file_path) if parsers else None
+    if parser is not None:
+        for index, record in enumerate(parser.records(file_path)):
+            yield '\n' + record if index else record
+        return
+    with open_text_file(file_path) as f:
+        yield from iter(lambda: f.read(chunk_size), '')
+
+def write_parse_output(files, out, chunk_size=CHUNK_SIZE, errors=None, is_cancelled=None, progress=None,
+                       skipped=None, parsers=None):
+    """ Writes the parse output for files to the text stream out, reading each file in chunks.
+
+    Files a parser in the ParserSet parsers accepts are written as their extracted records instead.
+
+    A file that fails before anything is written is skipped, exactly like parseFiles; binaries are listed in
+    skipped. A file that fails part way through keeps what was written, gets a marker line and is recorded
+    in errors. Returns the number of files written.
+    """
+    written = 0
+    out.write(PARSE_SEPARATOR)
+    for done, file_path in enumerate(files, 1):
+        if is_cancelled is not None and is_cancelled():
+            break
+        chunks = iter_entry_chunks(file_path, parsers, chunk_size)
+        try:
+            chunk = next(chunks, None)
+            out.write(parse_entry_prefix(file_path))
+            try:
+                while chunk is not None:
+                    out.write(chunk)
+                    chunk = next(chunks, None)
+            except Exception as e:
+                out.write(f"\n[Parsing Tool: read error, output truncated: {str(e)}]")
+                if errors is not None:
+                    errors.append((file_path, str(e)))
+            out.write(PARSE_ENTRY_SUFFIX)
+            written += 1
+        except BinaryFileError:
+            if skipped is not None:
+                skipped.append(file_path)
+        except Exception as e:
+            if errors is not None:
+                errors.append((file_path, str(e)))
+        finally:
+            chunks.close()
+        if progress is not None:
+            progress(done)
+    return written
+
+def export_parse_output(files, destination, compression=None, **kwargs):
+    with open_export(destination, compression) as out:
+        return write_parse_output(files, out, **kwargs)
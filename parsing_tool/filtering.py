@@ -0,0 +1,116 @@
+""" File-list filtering: multi-term substring and fuzzy (subsequence) matching over a CompactPathStore """
+
+import heapq
+import re
+from array import array
+from bisect import bisect_right
+
+DEFAULT_FUZZY_LIMIT = 5000
+
+def parse_query(text):
+    """ Splits a filter into (terms, excluded terms); '-term' or '!term' excludes paths containing term """
+    terms = []
+    excluded = []
+    for term in text.lower().split():
+        if term[0] in '-!' and len(term) > 1:
+            excluded.append(term[1:])
+        else:
+            terms.append(term)
+    return terms, excluded
+
+def _encode(text):
+    return text.encode('utf-8', 'surrogatepass')
+
+def fuzzy_pattern(term):
+    """ Regex matching term as a subsequence within one NUL separated key """
+    return re.compile(b'[^\\0]*?'.join(re.escape(_encode(char)) for char in term))
+
+def fuzzy_score(key, pattern, term):
+    """ Higher is better: contiguous matches, matches in the file name and at word starts rank first """
+    base = max(key.rfind(b'/'), key.rfind(b'\\')) + 1
+    match = pattern.search(key, base)
+    score = 0
+    if match is None:
+        match = pattern.search(key)
+        if match is None:
+            return None
+    else:
+        score += 100
+        if term in key[base:]:
+            score += 50
+    score -= match.end() - match.start() - len(term)
+    if match.start() == base or key[match.start() - 1:match.start()] in (b'/', b'\\', b'_', b'-', b'.', b' '):
+        score += 20
+    return score - len(key) / 100.0
+
+def filter_rows(store, text, fuzzy=False, start=0, stop=None, is_cancelled=None, limit=DEFAULT_FUZZY_LIMIT):
+    """ Store rows in start..stop matching text.
+
+    Substring mode returns every match in store order. Fuzzy mode returns at most limit rows ranked best
+    first. Returns None when cancelled.
+    """
+    terms, excluded = parse_query(text)
+    if fuzzy and terms:
+        rows = _fuzzy_rows(store, terms, start, stop, is_cancelled, limit)
+    elif terms:
+        rows = _intersect(store, store.match(terms[0], start, stop), terms[1:], start, stop)
+    else:
+        rows = store.match('', start, stop)
+    if rows is None or (is_cancelled is not None and is_cancelled()):
+        return None
+    for term in excluded:
+        excluded_rows = set(store.match(term, start, stop))
+        rows = array('I', [row for row in rows if row not in excluded_rows])
+    return rows
+
+def _intersect(store, rows, terms, start, stop):
+    for term in terms:
+        matching = set(store.match(term, start, stop))
+        rows = array('I', [row for row in rows if row in matching])
+    return rows
+
+def _fuzzy_rows(store, terms, start, stop, is_cancelled, limit):
+    encoded = [_encode(term) for term in terms]
+    patterns = [fuzzy_pattern(term) for term in terms]
+    # The longest term is the most selective; use it to find candidate rows
+    driver = max(range(len(terms)), key=lambda i: len(encoded[i]))
+    candidates = array('I')
+    for first, blob, offsets, low, high in store.keyChunks(start, stop):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        pos = offsets[low]
+        end = offsets[high]
+        search = patterns[driver].search
+        while True:
+            match = search(blob, pos, end)
+            if match is None:
+                break
+            row = bisect_right(offsets, match.start()) - 1
+            candidates.append(first + row)
+            pos = offsets[row + 1]
+    return _ranked(store, store.dropRemoved(candidates), encoded, patterns, limit)
+
+def _ranked(store, rows, encoded, patterns, limit):
+    def scored():
+        for row in rows:
+            key = store.key(row)
+            total = 0
+            for pattern, term in zip(patterns, encoded):
+                score = fuzzy_score(key, pattern, term)
+                if score is None:
+                    break
+                total += score
+            else:
+                yield total, -row
+
+    best = heapq.nlargest(limit, scored())
+    return array('I', [-negative_row for _, negative_row in best])
+
+def rank_rows(store, text, rows, limit=DEFAULT_FUZZY_LIMIT):
+    """ Fuzzy matches of text among rows, ranked best first as filter_rows ranks them, at most limit.
+
+    Merges fuzzy results computed for separate parts of the store (scan batches, say) into one ranking.
+    """
+    terms, _ = parse_query(text)
+    encoded = [_encode(term) for term in terms]
+    return _ranked(store, rows, encoded, [fuzzy_pattern(term) for term in terms], limit)
@@ -0,0 +1,161 @@
+""" Follow (tail) mode: reads only the bytes appended to files since they were last read """
+
+import codecs
+import os
+import threading
+from collections import namedtuple
+
+from parsing_tool.sniff import SNIFF_SIZE, sniff_encoding
+
+# event: None for plain appended text, 'rotated' (replaced by a new file), 'truncated' (shrank), 'missing' (gone)
+FollowUpdate = namedtuple('FollowUpdate', 'path text event')
+
+# Endianness of wide encodings when reading starts after the BOM
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+class FollowedFile:
+    __slots__ = ('path', 'offset', 'identity', 'decoder', 'partial', 'missing')
+
+    def __init__(self, path, offset=None):
+        self.path = path
+        # None until the first poll, which starts following from the end of the file
+        self.offset = offset
+        self.identity = None
+        self.decoder = None
+        # Text after the last newline read, held back until its line is complete
+        self.partial = ''
+        self.missing = False
+
+    def restart(self, identity):
+        self.offset = 0
+        self.identity = identity
+        self.decoder = None
+
+def incremental_decoder(f):
+    """ Incremental decoder for the binary stream f (a followed file), or None when it looks binary """
+    head = f.read(SNIFF_SIZE)
+    encoding = sniff_encoding(head)
+    if encoding in ('utf-16', 'utf-32'):
+        encoding = next((explicit for bom, explicit in BOM_ENCODINGS if head.startswith(bom)), encoding)
+    if encoding is None:
+        return None
+    return codecs.getincrementaldecoder(encoding)(errors='replace')
+
+class FileFollower:
+    """ A byte offset per followed file; poll() returns the complete lines appended to each since the last poll.
+
+    A file whose inode changed was rotated and one that got shorter was truncated; both are read again from the
+    start. Work per poll is one stat per file plus reading the new bytes, capped at READ_LIMIT per file so a
+    burst is spread over several polls. Safe to call from a worker thread while the GUI adds and removes files.
+    """
+
+    READ_LIMIT = 4 * 1024 * 1024
+    # A line longer than this is passed on unfinished rather than held back
+    MAX_PARTIAL = 1024 * 1024
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._files)
+
+    def follow(self, path, offset=None):
+        """ Follows path from byte offset, or from its end at the next poll when offset is None """
+        with self._lock:
+            if path not in self._files:
+                self._files[path] = FollowedFile(path, offset)
+
+    def unfollow(self, paths):
+        with self._lock:
+            for path in paths:
+                self._files.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+    def poll(self, is_cancelled=None):
+        """ FollowUpdates for the files that changed, in the order they were followed """
+        with self._lock:
+            files = list(self._files.values())
+        updates = []
+        for followed in files:
+            if is_cancelled is not None and is_cancelled():
+                break
+            update = self._pollFile(followed)
+            if update is not None:
+                updates.append(update)
+        return updates
+
+    def _pollFile(self, followed):
+        try:
+            stat = os.stat(followed.path)
+        except OSError:
+            if followed.missing:
+                return None
+            followed.missing = True
+            return FollowUpdate(followed.path, self._takePartial(followed), 'missing')
+        identity = (stat.st_dev, stat.st_ino)
+        if followed.offset is None:
+            followed.offset = stat.st_size
+            followed.identity = identity
+            return None
+        event = None
+        if followed.identity is not None and identity != followed.identity:
+            event = 'rotated'
+        elif stat.st_size < followed.offset:
+            event = 'truncated'
+        elif followed.missing:
+            # Gone for a while and back under the same inode: nothing was lost, carry on
+            followed.missing = False
+        flushed = ''
+        if event is not None:
+            flushed = self._takePartial(followed)
+            followed.restart(identity)
+            followed.missing = False
+        followed.identity = identity
+        if stat.st_size == followed.offset:
+            return FollowUpdate(followed.path, flushed, event) if event is not None else None
+        try:
+            text = self._read(followed, stat.st_size)
+        except OSError:
+            return FollowUpdate(followed.path, flushed, event) if event is not None else None
+        if text is None:
+            # Turned out to be binary: stop following it
+            self.unfollow([followed.path])
+            return None
+        return FollowUpdate(followed.path, flushed + text, event) if (text or flushed or event) else None
+
+    def _read(self, followed, size):
+        """ Complete lines between the file's offset and size (at most READ_LIMIT bytes), or None for binaries """
+        with open(followed.path, 'rb') as f:
+            if followed.decoder is None:
+                followed.decoder = incremental_decoder(f)
+                if followed.decoder is None:
+                    return None
+            if followed.offset == 0:
+                # The explicit-endian decoders would pass a BOM through as U+FEFF
+                f.seek(0)
+                head = f.read(4)
+                followed.offset = next((len(bom) for bom, _ in BOM_ENCODINGS if head.startswith(bom)), 0)
+            f.seek(followed.offset)
+            data = f.read(min(size - followed.offset, self.READ_LIMIT))
+        followed.offset += len(data)
+        text = followed.partial + followed.decoder.decode(data)
+        end = text.rfind('\n') + 1
+        if end == 0 and len(text) > self.MAX_PARTIAL:
+            end = len(text)
+        followed.partial = text[end:]
+        return text[:end]
+
+    @staticmethod
+    def _takePartial(followed):
+        partial = followed.partial
+        followed.partial = ''
+        return partial
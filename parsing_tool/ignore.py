@@ -0,0 +1,208 @@
+""" .gitignore-style include/exclude rules, applied while walking so ignored directories are never entered """
+
+import os
+import re
+
+# Per-directory rule files, read in this order (later rules win)
+IGNORE_FILES = ('.gitignore', '.parsingignore')
+
+# Version control metadata is never worth parsing
+DEFAULT_IGNORES = ('.git/', '.hg/', '.svn/')
+
+def split_patterns(text):
+    """ Glob list typed by the user ("*.txt *.log, !build/") -> (include patterns, exclude patterns) """
+    include = []
+    exclude = []
+    for pattern in re.split(r'[\s,;]+', text.strip()):
+        if pattern.startswith('!') and len(pattern) > 1:
+            exclude.append(pattern[1:])
+        elif pattern and not pattern.startswith('!'):
+            include.append(pattern)
+    return tuple(include), tuple(exclude)
+
+def _translate_class(pattern, i):
+    """ Regex for the [...] class starting at pattern[i] and the index after it; None when unterminated """
+    j = i + 1
+    if j < len(pattern) and pattern[j] in '!^':
+        j += 1
+    if j < len(pattern) and pattern[j] == ']':
+        j += 1
+    end = pattern.find(']', j)
+    if end == -1:
+        return None, i + 1
+    body = pattern[i + 1:end].replace('\\', '\\\\')
+    if body[:1] in ('!', '^'):
+        body = '^' + body[1:]
+    return '[' + body + ']', end + 1
+
+def translate_pattern(pattern):
+    """ Regex source matching a path relative to the rule's base directory ('/'-separated) """
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i) and i + 2 == len(pattern):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            translated, i_next = _translate_class(pattern, i)
+            parts.append(translated if translated is not None else re.escape('['))
+            i = i_next
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    body = ''.join(parts)
+    # Unanchored patterns ("*.log", "build/") match at any depth
+    return body if anchored else '(?:.*/)?' + body
+
+def parse_rule(line):
+    """ (regex source, negated, directories only) for one .gitignore line, or None for blanks and comments """
+    line = line.rstrip('\n\r')
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+    negated = line.startswith('!')
+    if negated or line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    return translate_pattern(line), negated, dir_only
+
+class IgnoreRules:
+    """ One ordered list of rules compiled into a single regex per entry kind; the last matching rule wins """
+
+    def __init__(self, lines):
+        rules = [rule for rule in map(parse_rule, lines) if rule is not None]
+        self.empty = not rules
+        self._fileRegex, self._fileNegated = self._compile([rule for rule in rules if not rule[2]])
+        self._dirRegex, self._dirNegated = self._compile(rules)
+
+    @staticmethod
+    def _compile(rules):
+        if not rules:
+            return None, ()
+        # Alternation takes the first matching branch, so list the rules last-first
+        rules = rules[::-1]
+        regex = re.compile('|'.join(f'(^{source}$)' for source, _, _ in rules), re.DOTALL)
+        return regex, tuple(negated for _, negated, _ in rules)
+
+    def match(self, rel_path, is_dir=False):
+        """ True when rel_path is ignored, False when a negated rule re-includes it, None when no rule applies """
+        regex, negated = (self._dirRegex, self._dirNegated) if is_dir else (self._fileRegex, self._fileNegated)
+        if regex is None:
+            return None
+        m = regex.match(rel_path)
+        if m is None:
+            return None
+        return not negated[m.lastindex - 1]
+
+class IgnoreMatcher:
+    """ Include globs, exclude globs and per-directory ignore files for walks under folder """
+
+    def __init__(self, folder, include=(), exclude=(), ignore_files=IGNORE_FILES, defaults=DEFAULT_IGNORES):
+        self.folder = os.path.normpath(folder)
+        self.include = IgnoreRules(include) if include else None
+        self.exclude = IgnoreRules(exclude)
+        self.ignore_files = tuple(ignore_files)
+        self._prefix = self.folder.rstrip(os.sep) + os.sep
+        self._chains = {self.folder: [(self.folder, IgnoreRules(defaults))] + self._load(self.folder)}
+
+    def _load(self, directory):
+        rules = []
+        for name in self.ignore_files:
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                    lines = f.readlines()
+            except OSError:
+                continue
+            parsed = IgnoreRules(lines)
+            if not parsed.empty:
+                rules.append((directory, parsed))
+        return rules
+
+    def _contains(self, path):
+        """ Whether path lies strictly below folder """
+        return path.startswith(self._prefix) and len(path) > len(self._prefix)
+
+    def _chain(self, directory):
+        """ Rules in effect inside directory, shallowest first """
+        chain = self._chains.get(directory)
+        if chain is None:
+            if not self._contains(directory):
+                return self._chains[self.folder]
+            chain = self._chain(os.path.dirname(directory)) + self._load(directory)
+            self._chains[directory] = chain
+        return chain
+
+    def _context(self, directory):
+        """ Relative prefix of directory's entries for the folder-level globs, and (prefix, rules) pairs of its
+        ignore-file chain deepest first """
+        chain = []
+        for base, rules in reversed(self._chain(directory)):
+            chain.append((self._prefixFor(directory, base), rules))
+        return self._prefixFor(directory, self.folder), chain
+
+    @staticmethod
+    def _prefixFor(directory, base):
+        if directory == base:
+            return ''
+        return directory[len(base.rstrip(os.sep)) + 1:].replace(os.sep, '/') + '/'
+
+    def _ignored(self, context, name, is_dir):
+        folder_prefix, chain = context
+        if self.exclude.match(folder_prefix + name, is_dir):
+            return True
+        for prefix, rules in chain:
+            decision = rules.match(prefix + name, is_dir)
+            if decision:
+                return True
+            if decision is not None:
+                # Re-included by a negated rule; still subject to the include globs
+                break
+        if not is_dir and self.include is not None:
+            return not self.include.match(folder_prefix + name)
+        return False
+
+    def isIgnored(self, path, is_dir=False):
+        """ Whether the entry at path is ignored by its own rules (ancestors are not checked) """
+        directory, name = os.path.split(path)
+        return self._ignored(self._context(directory), name, is_dir)
+
+    def accepts(self, path):
+        """ Whether the file at path (anywhere under folder) survives every rule, ancestors included """
+        path = os.path.normpath(path)
+        directory = os.path.dirname(path)
+        while self._contains(directory):
+            if self.isIgnored(directory, True):
+                return False
+            directory = os.path.dirname(directory)
+        return not self.isIgnored(path)
+
+    def prune(self, root, files, subdirs):
+        """ Drops ignored subdirectories from subdirs in place and returns the files that are kept """
+        context = self._context(os.path.normpath(root))
+        subdirs[:] = [name for name in subdirs if not self._ignored(context, name, True)]
+        return [name for name in files if not self._ignored(context, name, False)]
+
+    def lister(self, base_lister):
+        """ Lister that walks with base_lister but never enters ignored directories """
+        def iterListings(folder, is_cancelled=None):
+            for root, files, subdirs in base_lister(folder, is_cancelled):
+                yield root, self.prune(root, files, subdirs), subdirs
+        return iterListings
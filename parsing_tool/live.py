@@ -0,0 +1,83 @@
+""" Directory snapshot used by live refresh: re-lists only the directories reported as changed """
+
+import os
+from collections import namedtuple
+
+from parsing_tool.core import iter_directory_listings, list_directory
+
+LiveChanges = namedtuple('LiveChanges', 'added_files removed_files added_dirs removed_dirs')
+
+class FolderSnapshot:
+    """ Known file and subdirectory names of every directory under folder.
+
+    prune(root, files, subdirs), e.g. IgnoreMatcher.prune, applies the walk's ignore rules to directories re-listed
+    by refresh(): it drops ignored subdirectories in place and returns the files to keep.
+    """
+
+    def __init__(self, folder, lister=iter_directory_listings, prune=None):
+        self.folder = folder
+        self.lister = lister
+        self.prune = prune
+        self._listings = {}
+
+    def build(self, is_cancelled=None):
+        """ Walks the folder; returns False when cancelled before the walk completed """
+        self._listings = {}
+        for root, files, subdirs in self.lister(self.folder, is_cancelled):
+            self._listings[root] = (set(files), set(subdirs))
+        return not (is_cancelled is not None and is_cancelled())
+
+    def directories(self):
+        return list(self._listings)
+
+    def refresh(self, dirty_dirs):
+        """ Re-lists dirty_dirs, updates the snapshot and returns the LiveChanges found """
+        changes = LiveChanges([], [], [], [])
+        # Parents first, so a removed or newly added subtree is handled once
+        for root in sorted(set(dirty_dirs), key=len):
+            known = self._listings.get(root)
+            if known is None:
+                continue
+            try:
+                files, subdirs = self._list(root)
+            except OSError:
+                self._removeSubtree(root, changes)
+                continue
+            old_files, old_subdirs = known
+            new_files = set(files)
+            new_subdirs = set(subdirs)
+            changes.added_files.extend(os.path.join(root, name) for name in files if name not in old_files)
+            changes.removed_files.extend(os.path.join(root, name) for name in old_files - new_files)
+            self._listings[root] = (new_files, new_subdirs)
+            for name in old_subdirs - new_subdirs:
+                self._removeSubtree(os.path.join(root, name), changes)
+            for name in subdirs:
+                if name not in old_subdirs:
+                    self._addSubtree(os.path.join(root, name), changes)
+        return changes
+
+    def _list(self, root):
+        files, subdirs = list_directory(root)
+        if self.prune is not None:
+            files = self.prune(root, files, subdirs)
+        return files, subdirs
+
+    def _removeSubtree(self, folder, changes):
+        stack = [folder]
+        while stack:
+            root = stack.pop()
+            known = self._listings.pop(root, None)
+            if known is None:
+                continue
+            files, subdirs = known
+            changes.removed_dirs.append(root)
+            changes.removed_files.extend(os.path.join(root, name) for name in files)
+            stack.extend(os.path.join(root, name) for name in subdirs)
+
+    def _addSubtree(self, folder, changes):
+        for root, files, subdirs in iter_directory_listings(folder):
+            if self.prune is not None:
+                files = self.prune(root, files, subdirs)
+            self._listings[root] = (set(files), set(subdirs))
+            changes.added_dirs.append(root)
+            changes.added_files.extend(os.path.join(root, name) for name in files)
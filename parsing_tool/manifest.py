@@ -0,0 +1,167 @@
+""" Per-folder snapshot manifests (path, size, mtime, hash) for "changed since last parse" output """
+
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import closing
+
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.core import PARSE_ENTRY_SUFFIX
+from parsing_tool.parsecache import content_hasher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    folder BLOB PRIMARY KEY,
+    saved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    folder BLOB NOT NULL,
+    path BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    PRIMARY KEY (folder, path)
+) WITHOUT ROWID;
+"""
+
+ManifestEntry = namedtuple('ManifestEntry', 'size mtime_ns digest')
+SnapshotDiff = namedtuple('SnapshotDiff', 'added modified deleted entries')
+
+HASH_CHUNK = 1024 * 1024
+
+def _encode(text):
+    return text.encode('utf-8', 'surrogatepass')
+
+def _decode(blob):
+    return blob.decode('utf-8', 'surrogatepass')
+
+def file_signature(file_path):
+    """ (size, mtime_ns) of a file, or of an archive member (its size and its archive's mtime, as ParseCache keys it) """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        from parsing_tool.archives import member_signature
+        return member_signature(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def file_entry(file_path):
+    """ ManifestEntry of a file (or archive member) as it is on disk now; the digest matches ParseCache's """
+    hasher = content_hasher()
+    try:
+        f = open(file_path, 'rb')
+    except OSError:
+        from parsing_tool.archives import default_archive_index, member_signature
+        size, mtime_ns = member_signature(file_path)
+        f = default_archive_index.open(file_path)
+    else:
+        stat = os.fstat(f.fileno())
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+    with f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            hasher.update(chunk)
+    return ManifestEntry(size, mtime_ns, hasher.digest())
+
+def diff_snapshot(files, previous, is_cancelled=None, progress=None):
+    """ Compares files with the previous manifest; None when cancelled.
+
+    Files whose size and mtime match their manifest entry are unchanged without being read; the rest are
+    hashed, so a touched but identical file does not count as modified. entries is the new manifest.
+    """
+    added = []
+    modified = []
+    entries = {}
+    for done, file_path in enumerate(files, 1):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            continue
+        old = previous.get(file_path)
+        if old is not None and old.size == size and old.mtime_ns == mtime_ns:
+            entries[file_path] = old
+        else:
+            try:
+                entry = file_entry(file_path)
+            except OSError:
+                continue
+            entries[file_path] = entry
+            if old is None:
+                added.append(file_path)
+            elif old.digest != entry.digest:
+                modified.append(file_path)
+        if progress is not None and done % 1000 == 0:
+            progress(done)
+    deleted = sorted(path for path in previous if path not in entries)
+    return SnapshotDiff(added, modified, deleted, entries)
+
+def snapshot_entries(files, known=None, is_cancelled=None):
+    """ {path: ManifestEntry} of files after a full parse; None when cancelled.
+
+    known(path) returns the entry recorded while parsing (ParseCache.entry) or None; files it does not know (binary
+    files, files read by a format parser, files read without the cache) are stat'ed and hashed here. Files that
+    cannot be read are left out, as diff_snapshot leaves them out.
+    """
+    entries = {}
+    for file_path in files:
+        if is_cancelled is not None and is_cancelled():
+            return None
+        entry = known(file_path) if known is not None else None
+        if entry is None:
+            try:
+                entry = file_entry(file_path)
+            except OSError:
+                continue
+        entries[file_path] = ManifestEntry(*entry)
+    return entries
+
+def format_deleted_files(folder, paths):
+    """ Parse output section listing files deleted since the last snapshot """
+    if not paths:
+        return ''
+    listing = '\n'.join(os.path.relpath(path, folder) for path in paths)
+    return f"\n\n\n{'#' * 4} Deleted files:\n\n\n{listing}{PARSE_ENTRY_SUFFIX}"
+
+class SnapshotManifest:
+    """ SQLite store of the last parsed snapshot of each folder """
+
+    def __init__(self, path=None):
+        self.path = path or user_cache_dir('manifests.sqlite3')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def savedAt(self, folder):
+        """ Time of the folder's last snapshot, or None """
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT saved_at FROM snapshots WHERE folder = ?', (_encode(folder),)).fetchone()
+        return row[0] if row else None
+
+    def load(self, folder):
+        """ {path: ManifestEntry} of the folder's last snapshot (empty when there is none) """
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT path, size, mtime_ns, digest FROM entries WHERE folder = ?',
+                                (_encode(folder),))
+            return {_decode(path): ManifestEntry(size, mtime_ns, digest) for path, size, mtime_ns, digest in rows}
+
+    def save(self, folder, entries):
+        """ Replaces the folder's snapshot with entries ({path: ManifestEntry}) """
+        key = _encode(folder)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM entries WHERE folder = ?', (key,))
+            conn.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?)',
+                             ((key, _encode(path), entry.size, entry.mtime_ns, entry.digest)
+                              for path, entry in entries.items()))
+            conn.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?)', (key, time.time()))
+
+    def forget(self, folder):
+        key = _encode(folder)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM entries WHERE folder = ?', (key,))
+            conn.execute('DELETE FROM snapshots WHERE folder = ?', (key,))
@@ -0,0 +1,225 @@
+""" Per-operation timing, throughput and memory figures (scan, parse, structure copy, save), with optional cProfile """
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+def peak_memory_bytes():
+    """ Peak resident set size of this process so far, or None where it cannot be read """
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_memory()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _windows_peak_memory():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except Exception:
+        return None
+
+def format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+
+class OperationMetrics:
+    """ Figures for one operation. Phases may overlap: phases measured on worker pools add up thread time """
+
+    def __init__(self, name, profile=False, started=None):
+        """ started: time.perf_counter() value the operation began at, when that was before this object existed """
+        self.name = name
+        now = time.perf_counter()
+        self._started = now if started is None else started
+        self.started_at = time.time() - (now - self._started)
+        self.wall_seconds = None
+        self.phases = {}
+        self.files = 0
+        self.bytes = 0
+        self.cancelled = False
+        self.peak_memory_before = peak_memory_bytes()
+        self.peak_memory = None
+        self.profile_path = None
+        self._lock = threading.Lock()
+        # thread ident -> cProfile.Profile, one per thread that ran profiled code
+        self._profiles = {} if profile else None
+        self._profiling = set()
+
+    @property
+    def profiled(self):
+        return self._profiles is not None
+
+    def addPhase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """ Times the block as phase name (accumulating across uses) and profiles it when profiling """
+        started = time.perf_counter()
+        try:
+            with self.profiling():
+                yield
+        finally:
+            self.addPhase(name, time.perf_counter() - started)
+
+    @contextmanager
+    def profiling(self):
+        """ Runs the block under this thread's profiler; a no-op unless profiling was requested """
+        if self._profiles is None:
+            yield
+            return
+        ident = threading.get_ident()
+        if ident in self._profiling:
+            # Nested in a block that is already being profiled on this thread
+            yield
+            return
+        # Imported here: the profilers are only needed when profiling, and cost every CLI start otherwise
+        import cProfile
+        with self._lock:
+            profile = self._profiles.get(ident)
+            if profile is None:
+                profile = self._profiles[ident] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Some other profiler or debugger owns this thread
+            yield
+            return
+        self._profiling.add(ident)
+        try:
+            yield
+        finally:
+            self._profiling.discard(ident)
+            profile.disable()
+
+    def wrap(self, func):
+        """ func, profiled on whichever thread calls it when profiling """
+        if self._profiles is None:
+            return func
+
+        def profiled(*args, **kwargs):
+            with self.profiling():
+                return func(*args, **kwargs)
+        return profiled
+
+    def finish(self, files=None, bytes=None, cancelled=False):
+        if files is not None:
+            self.files = files
+        if bytes is not None:
+            self.bytes = bytes
+        self.cancelled = cancelled
+        self.wall_seconds = time.perf_counter() - self._started
+        self.peak_memory = peak_memory_bytes()
+        return self
+
+    @property
+    def filesPerSecond(self):
+        return self.files / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def bytesPerSecond(self):
+        return self.bytes / self.wall_seconds if self.wall_seconds else 0.0
+
+    def profileStats(self):
+        """ pstats.Stats merged over every profiled thread, or None """
+        profiles = [profile for profile in (self._profiles or {}).values() if profile.getstats()]
+        if not profiles:
+            return None
+        import pstats
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def dumpProfile(self, folder):
+        """ Writes the merged profile to folder as a .prof file (pstats / snakeviz format) and returns its path """
+        stats = self.profileStats()
+        if stats is None:
+            return None
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        self.profile_path = os.path.join(folder, f"{self.name.lower().replace(' ', '-')}-{stamp}.prof")
+        stats.dump_stats(self.profile_path)
+        return self.profile_path
+
+    def asDict(self):
+        return {
+            'operation': self.name,
+            'started_at': self.started_at,
+            'wall_seconds': self.wall_seconds,
+            'phases': dict(self.phases),
+            'files': self.files,
+            'bytes': self.bytes,
+            'files_per_second': self.filesPerSecond,
+            'bytes_per_second': self.bytesPerSecond,
+            'peak_memory_bytes': self.peak_memory,
+            'peak_memory_growth_bytes': (self.peak_memory - self.peak_memory_before
+                                         if self.peak_memory is not None and self.peak_memory_before is not None
+                                         else None),
+            'cancelled': self.cancelled,
+            'profile_path': self.profile_path,
+        }
+
+    def summary(self):
+        """ One status bar line, e.g. "Parse: 1200 files, 35.2 MB in 2.41s (498 files/s, read 1.80s, ...)" """
+        amounts = []
+        if self.files:
+            amounts.append(f"{self.files} files")
+        if self.bytes:
+            amounts.append(format_bytes(self.bytes))
+        details = [f"{self.filesPerSecond:.0f} files/s"] if self.files else []
+        details += [f"{name} {seconds:.2f}s" for name, seconds in self.phases.items()]
+        text = f"{self.name}: " + (", ".join(amounts) + " in " if amounts else "") + f"{self.wall_seconds:.2f}s"
+        if details:
+            text += f" ({', '.join(details)})"
+        if self.peak_memory is not None:
+            text += f", peak {format_bytes(self.peak_memory)}"
+        if self.cancelled:
+            text += " [cancelled]"
+        return text
+
+class MetricsLog:
+    """ The most recent operations' metrics, dumpable as JSON """
+
+    def __init__(self, limit=100):
+        self.operations = deque(maxlen=limit)
+        self.profiling = False
+
+    def start(self, name):
+        return OperationMetrics(name, profile=self.profiling)
+
+    def record(self, metrics):
+        self.operations.append(metrics)
+
+    @property
+    def last(self):
+        return self.operations[-1] if self.operations else None
+
+    def asJson(self):
+        return json.dumps([metrics.asDict() for metrics in self.operations], indent=2)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.asJson())
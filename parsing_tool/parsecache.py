@@ -0,0 +1,316 @@
+""" Cache of decoded file contents keyed by (path, size, mtime_ns), falling back to a content hash """
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+
+from parsing_tool.appdirs import user_cache_dir
+from parsing_tool.sniff import SNIFF_SIZE, BinaryFileError, default_classifier, sniff_encoding
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+# Path entries kept in memory; each is a few hundred bytes at most
+MAX_PATH_ENTRIES = 1000000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest BLOB PRIMARY KEY,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS paths (
+    path BLOB PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+PathEntry = namedtuple('PathEntry', 'size mtime_ns digest')
+
+def content_hasher():
+    """ Incremental form of content_digest, for hashing files in chunks """
+    return hashlib.blake2b(digest_size=16)
+
+def content_digest(data):
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.digest()
+
+def decode_text(data, encoding):
+    """ Same text as reading the file through open_text_file: replaced errors and universal newlines """
+    return data.decode(encoding, errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+class ParseCache:
+    """ Two-tier cache of decoded file contents.
+
+    Lookups hit when a file's size and mtime_ns are unchanged; otherwise the raw bytes are hashed, and
+    identical content (a touched file, a copy elsewhere) is still served without decoding. Contents are
+    stored once per digest. Both tiers evict least recently used entries past their byte budget; the disk
+    tier (SQLite under the user cache folder) is only used when disk_path is given.
+    """
+
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, disk_path=None, max_disk_bytes=DEFAULT_DISK_BYTES,
+                 classifier=None):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.classifier = classifier or default_classifier
+        self._paths = {}
+        self._blobs = OrderedDict()
+        self._memoryBytes = 0
+        self._lock = threading.Lock()
+        self._diskLock = threading.Lock()
+        self._disk = None
+        self._diskBytes = 0
+        # Updated through _count(), under _lock: the parse engine's reader threads share one cache
+        self.hits = self.hash_hits = self.disk_hits = self.misses = 0
+        # Bytes read from files and the time spent reading/hashing and decoding them, summed over reader threads
+        self.bytes_read = 0
+        self.read_seconds = self.decode_seconds = 0.0
+        if disk_path is not None:
+            self.openDisk(disk_path)
+
+    def openDisk(self, disk_path=None):
+        """ Enables the disk tier """
+        disk_path = disk_path or user_cache_dir('parsecache.sqlite3')
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        conn = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        with self._diskLock:
+            self._closeDisk()
+            self._disk = conn
+            self._diskBytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def closeDisk(self):
+        """ Disables the disk tier; its contents stay on disk for the next openDisk """
+        with self._diskLock:
+            self._closeDisk()
+
+    def _closeDisk(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    @property
+    def hasDisk(self):
+        return self._disk is not None
+
+    def clear(self):
+        with self._lock:
+            self._paths.clear()
+            self._blobs.clear()
+            self._memoryBytes = 0
+        with self._diskLock:
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute('DELETE FROM blobs')
+                    self._disk.execute('DELETE FROM paths')
+                self._diskBytes = 0
+        with self._lock:
+            self.hits = self.hash_hits = self.disk_hits = self.misses = 0
+            self.bytes_read = 0
+            self.read_seconds = self.decode_seconds = 0.0
+
+    def _count(self, **amounts):
+        """ Adds amounts to the named counters (hits, misses, bytes_read, ...) """
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def stats(self):
+        """ Snapshot of the counters, consistent across them """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'hash_hits': self.hash_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_bytes': self._memoryBytes,
+                'memory_entries': len(self._blobs),
+                'disk_bytes': self._diskBytes if self._disk is not None else 0,
+                'bytes_read': self.bytes_read,
+                'read_seconds': self.read_seconds,
+                'decode_seconds': self.decode_seconds,
+            }
+
+    def statsText(self):
+        stats = self.stats()
+        lookups = stats['hits'] + stats['hash_hits'] + stats['misses']
+        rate = 100 * (stats['hits'] + stats['hash_hits']) / lookups if lookups else 0
+        text = (f"{stats['hits']} hits, {stats['hash_hits']} content-hash hits, {stats['misses']} misses "
+                f"({rate:.0f}% hit rate); memory {stats['memory_bytes'] // 1024 // 1024} MB "
+                f"in {stats['memory_entries']} entries")
+        if self._disk is not None:
+            text += f"; disk {stats['disk_bytes'] // 1024 // 1024} MB ({stats['disk_hits']} disk hits)"
+        return text
+
+    # Memory tier
+
+    def _memoryGet(self, digest):
+        with self._lock:
+            content = self._blobs.get(digest)
+            if content is not None:
+                self._blobs.move_to_end(digest)
+            return content
+
+    def _memoryPut(self, digest, content):
+        size = sys.getsizeof(content)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+                return
+            self._blobs[digest] = content
+            self._memoryBytes += size
+            while self._memoryBytes > self.max_memory_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self._memoryBytes -= sys.getsizeof(evicted)
+
+    def _rememberPath(self, file_path, entry):
+        with self._lock:
+            if len(self._paths) >= MAX_PATH_ENTRIES and file_path not in self._paths:
+                del self._paths[next(iter(self._paths))]
+            self._paths[file_path] = entry
+
+    # Disk tier
+
+    def _diskPath(self, file_path):
+        with self._diskLock:
+            if self._disk is None:
+                return None
+            row = self._disk.execute('SELECT size, mtime_ns, digest FROM paths WHERE path = ?',
+                                     (file_path.encode('utf-8', 'surrogatepass'),)).fetchone()
+        return PathEntry(*row) if row else None
+
+    def _diskGet(self, digest):
+        with self._diskLock:
+            if self._disk is None:
+                return None
+            row = self._disk.execute('SELECT content FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                return None
+            with self._disk:
+                self._disk.execute('UPDATE blobs SET last_used = ? WHERE digest = ?', (time.time(), digest))
+        self._count(disk_hits=1)
+        return zlib.decompress(row[0]).decode('utf-8', 'surrogatepass')
+
+    def _diskPut(self, file_path, entry, content=None):
+        path_key = file_path.encode('utf-8', 'surrogatepass')
+        with self._diskLock:
+            if self._disk is None:
+                return
+            with self._disk:
+                self._disk.execute('INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)', (path_key,) + tuple(entry))
+                if content is None:
+                    return
+                blob = zlib.compress(content.encode('utf-8', 'surrogatepass'), 1)
+                if len(blob) > self.max_disk_bytes:
+                    return
+                inserted = self._disk.execute('INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)',
+                                              (entry.digest, blob, len(blob), time.time())).rowcount
+                self._diskBytes += len(blob) if inserted else 0
+                if self._diskBytes > self.max_disk_bytes:
+                    self._diskEvict()
+
+    def _diskEvict(self):
+        """ Drops least recently used blobs down to 90% of the budget; stale path rows just miss later """
+        target = self.max_disk_bytes * 9 // 10
+        for digest, size in self._disk.execute('SELECT digest, size FROM blobs ORDER BY last_used').fetchall():
+            if self._diskBytes <= target:
+                break
+            self._disk.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+            self._diskBytes -= size
+
+    # Lookups
+
+    def entry(self, file_path):
+        """ PathEntry (size, mtime_ns, digest) recorded by the last read of file_path, or None """
+        return self._paths.get(file_path)
+
+    def _content(self, digest):
+        content = self._memoryGet(digest)
+        if content is None:
+            content = self._diskGet(digest)
+            if content is not None:
+                self._memoryPut(digest, content)
+        return content
+
+    def read(self, file_path):
+        """ Decoded contents of file_path (which may be an archive member); a drop-in replacement for
+        engine.read_text_file """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            from parsing_tool.archives import split_member_path
+            if split_member_path(file_path) is None:
+                raise
+            return self._readMember(file_path)
+        entry = self._paths.get(file_path) or self._diskPath(file_path)
+        if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            content = self._content(entry.digest)
+            if content is not None:
+                self._count(hits=1)
+                self._rememberPath(file_path, entry)
+                return content
+        started = time.perf_counter()
+        with open(file_path, 'rb') as f:
+            encoding = self.classifier.classifyOpen(f, file_path)
+            if encoding is None:
+                raise BinaryFileError(file_path)
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        entry = PathEntry(stat.st_size, stat.st_mtime_ns, content_digest(data))
+        self._count(bytes_read=len(data), read_seconds=time.perf_counter() - started)
+        content = self._content(entry.digest)
+        if content is not None:
+            self._count(hash_hits=1)
+            self._rememberPath(file_path, entry)
+            self._diskPut(file_path, entry)
+            return content
+        started = time.perf_counter()
+        content = decode_text(data, encoding)
+        self._count(misses=1, decode_seconds=time.perf_counter() - started)
+        self._memoryPut(entry.digest, content)
+        self._rememberPath(file_path, entry)
+        self._diskPut(file_path, entry, content)
+        return content
+
+    def _readMember(self, member_path):
+        """ read() for an archive member, which counts as unchanged while its size and its archive's mtime are """
+        from parsing_tool.archives import default_archive_index, member_signature
+        size, mtime_ns = member_signature(member_path)
+        entry = self._paths.get(member_path) or self._diskPath(member_path)
+        if entry is not None and entry.size == size and entry.mtime_ns == mtime_ns:
+            content = self._content(entry.digest)
+            if content is not None:
+                self._count(hits=1)
+                self._rememberPath(member_path, entry)
+                return content
+        started = time.perf_counter()
+        data = default_archive_index.read(member_path)
+        encoding = sniff_encoding(data[:SNIFF_SIZE])
+        if encoding is None:
+            raise BinaryFileError(member_path)
+        entry = PathEntry(size, mtime_ns, content_digest(data))
+        self._count(bytes_read=len(data), read_seconds=time.perf_counter() - started)
+        content = self._content(entry.digest)
+        if content is not None:
+            self._count(hash_hits=1)
+        else:
+            started = time.perf_counter()
+            content = decode_text(data, encoding)
+            self._count(misses=1, decode_seconds=time.perf_counter() - started)
+            self._memoryPut(entry.digest, content)
+        self._rememberPath(member_path, entry)
+        self._diskPut(member_path, entry, content)
+        return content
@@ -0,0 +1,297 @@
+""" Per-format parsers: pull the records worth keeping out of .xml and .log files instead of copying them whole.
+
+Parsers stream their input, so memory stays flat however large the file is; only the extracted records are kept.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from parsing_tool.engine import read_text_file
+from parsing_tool.sniff import SNIFF_SIZE, BinaryFileError, open_text_file, sniff_encoding
+
+class RecordParser:
+    """ Base of the format parsers. Subclasses set extensions and implement records() """
+
+    name = ''
+    extensions = ()
+
+    def accepts(self, file_path):
+        return file_path.lower().endswith(self.extensions)
+
+    def records(self, file_path):
+        """ Yields the extracted records of file_path as strings, reading it incrementally """
+        raise NotImplementedError
+
+    def parse(self, file_path):
+        """ Extracted records joined one per line, in place of the file's whole text """
+        return '\n'.join(self.records(file_path))
+
+class ParserSet:
+    """ Parsers tried in order for each file; files no parser accepts are read whole """
+
+    def __init__(self, parsers=()):
+        self.parsers = list(parsers)
+
+    def __bool__(self):
+        return bool(self.parsers)
+
+    def parserFor(self, file_path):
+        for parser in self.parsers:
+            if parser.accepts(file_path):
+                return parser
+        return None
+
+    def reader(self, fallback=read_text_file):
+        """ Reader for ParseEngine: a file's extracted records, or fallback(file_path) when no parser accepts it """
+        def read(file_path):
+            parser = self.parserFor(file_path)
+            return parser.parse(file_path) if parser is not None else fallback(file_path)
+        return read
+
+def local_name(tag):
+    """ Tag without its '{namespace}' part """
+    return tag.rpartition('}')[2] if tag[:1] == '{' else tag
+
+# One location step: name or *, with an optional [@attr] or [@attr='value'] predicate
+XPATH_STEP = re.compile(r"""^(?P<name>\*|[\w.\-:]+)(?:\[@(?P<attr>[\w.\-:]+)(?:\s*=\s*(?P<q>['"])(?P<value>.*?)(?P=q))?\])?$""")
+
+class XPathSubset:
+    """ The part of XPath that can be evaluated while streaming, against the open elements of a document.
+
+    Supported: /a/b (child steps), //b and a//b (descendant steps), * and [@attr] / [@attr='value'] predicates,
+    and a final /@attr or /text() selecting an attribute or the element's text instead of the element. A path that
+    does not start with / matches anywhere, like one starting with //. Names match the tag's local name.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        path = expression.strip()
+        self.select = None
+        head, _, last = path.rpartition('/')
+        if last == 'text()':
+            self.select = 'text'
+            path = head
+        elif last.startswith('@'):
+            self.select = last
+            path = head
+        if not path.startswith('/'):
+            path = '//' + path
+        # (descendant, name, attr, value) per step; descendant steps may skip any number of levels before them
+        self.steps = []
+        descendant = False
+        for part in path[1:].split('/'):
+            if not part:
+                descendant = True
+                continue
+            m = XPATH_STEP.match(part)
+            if m is None:
+                raise ValueError(f"Unsupported XPath step '{part}' in {expression}")
+            self.steps.append((descendant, m.group('name'), m.group('attr'), m.group('value')))
+            descendant = False
+        if not self.steps or descendant:
+            raise ValueError(f"Unsupported XPath expression: {expression}")
+
+    @staticmethod
+    def _stepMatches(step, element):
+        _, name, attr, value = step
+        if name != '*' and name != local_name(element.tag):
+            return False
+        if attr is not None:
+            actual = element.get(attr)
+            if actual is None or (value is not None and actual != value):
+                return False
+        return True
+
+    def matches(self, stack):
+        """ Whether the innermost of the open elements in stack (outermost first) is selected by the path """
+        return self._matchFrom(len(self.steps) - 1, len(stack) - 1, stack)
+
+    def _matchFrom(self, step_index, element_index, stack):
+        # Steps are matched from the last, against elements from the innermost outwards
+        if step_index < 0:
+            return element_index < 0
+        if element_index < 0:
+            return False
+        step = self.steps[step_index]
+        if not self._stepMatches(step, stack[element_index]):
+            return False
+        if not step[0]:
+            return self._matchFrom(step_index - 1, element_index - 1, stack)
+        # A descendant step's parent step may match any ancestor (or the document root when it is the first step)
+        if step_index == 0:
+            return True
+        return any(self._matchFrom(step_index - 1, ancestor, stack) for ancestor in range(element_index - 1, -1, -1))
+
+    def extract(self, element):
+        if self.select == 'text':
+            return ''.join(element.itertext()).strip()
+        if self.select is not None:
+            return element.get(self.select[1:])
+        tail = element.tail
+        element.tail = None
+        try:
+            return ET.tostring(element, encoding='unicode').strip()
+        finally:
+            element.tail = tail
+
+class XmlParser(RecordParser):
+    """ Elements (or their text or an attribute) selected by XPath-subset paths, found with an incremental iterparse.
+
+    Elements are dropped from the tree as soon as they are finished with, unless they sit inside a selected element
+    that is still being read, so memory holds one open path plus the largest selected element. Records come out in
+    the order their elements end, so a selected element follows the selected elements nested in it.
+    """
+
+    name = 'xml'
+
+    def __init__(self, paths, extensions=('.xml',)):
+        self.paths = [XPathSubset(path) if isinstance(path, str) else path for path in paths]
+        self.extensions = tuple(extensions)
+
+    def records(self, file_path):
+        from parsing_tool.archives import open_binary, prefixed
+        stack = []
+        # Selected elements still open, outermost first, with the paths that selected them
+        capturing = []
+        # The binary file lets expat honour the document's own encoding declaration
+        with open_binary(file_path) as f:
+            head = f.read(SNIFF_SIZE)
+            if sniff_encoding(head) is None:
+                raise BinaryFileError(file_path)
+            for event, element in ET.iterparse(prefixed(head, f), events=('start', 'end')):
+                if event == 'start':
+                    stack.append(element)
+                    selected = [path for path in self.paths if path.matches(stack)]
+                    if selected:
+                        capturing.append((element, selected))
+                    continue
+                stack.pop()
+                if capturing and capturing[-1][0] is element:
+                    _, selected = capturing.pop()
+                    for path in selected:
+                        value = path.extract(element)
+                        if value is not None:
+                            yield value
+                if not capturing:
+                    # Nothing encloses this element any more: detach it (it is always its parent's last child)
+                    element.clear()
+                    if stack:
+                        del stack[-1][-1]
+
+LOG_LEVELS = ('TRACE', 'DEBUG', 'INFO', 'NOTICE', 'WARN', 'ERROR', 'CRITICAL', 'FATAL')
+LEVEL_ALIASES = {'WARNING': 'WARN', 'ERR': 'ERROR', 'CRIT': 'CRITICAL', 'SEVERE': 'ERROR', 'FINE': 'DEBUG'}
+
+# Timestamp at the start of a line, then the first level word on it
+DEFAULT_LOG_PATTERN = (r'^\[?(?P<time>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?)\]?'
+                       r'(?:.*?\b(?P<level>' + '|'.join(LOG_LEVELS + tuple(LEVEL_ALIASES)) + r')\b)?')
+
+def normalize_level(level):
+    level = level.upper()
+    return LEVEL_ALIASES.get(level, level)
+
+def parse_log_time(text):
+    """ datetime of an ISO-like timestamp ("2024-01-05 13:22", "2024-01-05T13:22:11,123", "...Z"), or None """
+    text = text.strip().replace(',', '.')
+    if text[-1:] in ('Z', 'z'):
+        # fromisoformat only reads the UTC designator from Python 3.11 on
+        text = text[:-1] + '+00:00'
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+def comparable_time(stamp):
+    """ stamp as an aware datetime, reading a naive one as local time, so stamps with and without offsets compare """
+    return stamp if stamp.tzinfo is not None else stamp.astimezone()
+
+class LogParser(RecordParser):
+    """ Log records filtered by level and time range, optionally reduced to fields captured by the pattern.
+
+    A line the pattern matches starts a record; lines it does not match (stack traces, wrapped messages) continue
+    the previous one. The pattern's named groups are the fields; its time and level groups drive the filters.
+    Records without a level or time are dropped while the corresponding filter is set.
+    """
+
+    name = 'log'
+    # Continuation lines kept per record; the rest are counted in a marker line
+    MAX_RECORD_LINES = 1000
+
+    def __init__(self, pattern=None, levels=None, since=None, until=None, fields=None, extensions=('.log',)):
+        self.pattern = re.compile(pattern or DEFAULT_LOG_PATTERN)
+        self.levels = {normalize_level(level) for level in levels} if levels else None
+        self.since = comparable_time(since) if since is not None else None
+        self.until = comparable_time(until) if until is not None else None
+        self.fields = list(fields) if fields else None
+        self.extensions = tuple(extensions)
+        if self.fields:
+            unknown = [field for field in self.fields if field not in self.pattern.groupindex]
+            if unknown:
+                raise ValueError(f"The log pattern has no group named {', '.join(unknown)}")
+
+    def wants(self, match):
+        """ Whether the record starting with match passes the level and time filters """
+        groups = match.groupdict()
+        if self.levels is not None:
+            level = groups.get('level')
+            if level is None or normalize_level(level) not in self.levels:
+                return False
+        if self.since is not None or self.until is not None:
+            stamp = parse_log_time(groups['time']) if groups.get('time') else None
+            if stamp is None:
+                return False
+            stamp = comparable_time(stamp)
+            if self.since is not None and stamp < self.since:
+                return False
+            if self.until is not None and stamp > self.until:
+                return False
+        return True
+
+    def format(self, match, lines, dropped):
+        if self.fields:
+            return '\t'.join(match.group(field) or '' for field in self.fields)
+        if dropped:
+            lines = lines + [f"[... {dropped} more lines]"]
+        return '\n'.join(lines)
+
+    def records(self, file_path):
+        match = None
+        lines = []
+        dropped = 0
+        with open_text_file(file_path) as f:
+            for line in f:
+                line = line.rstrip('\r\n')
+                start = self.pattern.match(line)
+                if start is not None:
+                    if match is not None:
+                        yield self.format(match, lines, dropped)
+                    match = start if self.wants(start) else None
+                    lines = [line] if match is not None else []
+                    dropped = 0
+                elif match is not None:
+                    if len(lines) < self.MAX_RECORD_LINES:
+                        lines.append(line)
+                    else:
+                        dropped += 1
+        if match is not None:
+            yield self.format(match, lines, dropped)
+
+def parse_time_bound(text):
+    """ datetime for a --since / --until style bound, None for a blank one; ValueError when it cannot be read """
+    if not text or not text.strip():
+        return None
+    stamp = parse_log_time(text)
+    if stamp is None:
+        raise ValueError(f"Not a date/time: {text} (expected e.g. 2024-01-05 or 2024-01-05 13:00)")
+    return stamp
+
+def build_parser_set(xml_paths=(), log_pattern=None, levels=None, since=None, until=None, fields=None):
+    """ ParserSet for the given options: an XmlParser when there are paths, a LogParser when any log option is set """
+    parsers = []
+    if xml_paths:
+        parsers.append(XmlParser(xml_paths))
+    since = parse_time_bound(since) if isinstance(since, str) else since
+    until = parse_time_bound(until) if isinstance(until, str) else until
+    if log_pattern or levels or since is not None or until is not None or fields:
+        parsers.append(LogParser(log_pattern, levels, since, until, fields))
+    return ParserSet(parsers)
@@ -0,0 +1,135 @@
+import os
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+class CompactPathStore:
+    """ Append-only list of file paths stored as an interned folder table plus packed, offset-indexed name bytes.
+
+    Filter keys (lowercased full paths) are computed once when paths are added and kept as immutable,
+    NUL separated chunks, so a filter can scan a snapshot of them on another thread while paths are
+    still being appended. Removed paths are tombstoned: their rows keep their numbers but are skipped
+    by match().
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._dirs = []
+        self._dirIndex = {}
+        self._dirOf = array('I')
+        self._names = bytearray()
+        self._nameOffsets = array('Q', [0])
+        # (first row, key bytes, key offsets relative to the chunk) per extend() call
+        self._keyChunks = []
+        self._keyChunkStarts = []
+        self._alive = bytearray()
+        self._removedCount = 0
+        # Folder index -> rows, built on first lookup
+        self._folderRows = None
+
+    def __len__(self):
+        return len(self._dirOf)
+
+    def append(self, path):
+        self.extend((path,))
+
+    def extend(self, paths):
+        first = len(self._dirOf)
+        keys = []
+        for path in paths:
+            folder, name = os.path.split(path)
+            index = self._dirIndex.get(folder)
+            if index is None:
+                index = len(self._dirs)
+                self._dirIndex[folder] = index
+                self._dirs.append(folder)
+            self._dirOf.append(index)
+            self._names += name.encode('utf-8', 'surrogatepass')
+            self._nameOffsets.append(len(self._names))
+            keys.append(path.lower().encode('utf-8', 'surrogatepass'))
+            if self._folderRows is not None:
+                self._folderRows.setdefault(index, array('I')).append(len(self._dirOf) - 1)
+        if not keys:
+            return
+        self._alive.extend(b'\1' * len(keys))
+        offsets = array('Q', accumulate((len(key) + 1 for key in keys), initial=0))
+        self._keyChunks.append((first, b'\0'.join(keys) + b'\0', offsets))
+        self._keyChunkStarts.append(first)
+
+    def name(self, row):
+        return self._names[self._nameOffsets[row]:self._nameOffsets[row + 1]].decode('utf-8', 'surrogatepass')
+
+    def path(self, row):
+        return os.path.join(self._dirs[self._dirOf[row]], self.name(row))
+
+    def key(self, row):
+        """ Lowercased UTF-8 filter key of a row """
+        first, blob, offsets = self._keyChunks[bisect_right(self._keyChunkStarts, row) - 1]
+        row -= first
+        return blob[offsets[row]:offsets[row + 1] - 1]
+
+    def keyChunks(self, start=0, stop=None):
+        """ Snapshot of (first row, key bytes, offsets, first local row, stop local row) covering start..stop """
+        stop = len(self) if stop is None else min(stop, len(self))
+        chunks = []
+        if start >= stop:
+            return chunks
+        index = bisect_right(self._keyChunkStarts, start) - 1
+        for first, blob, offsets in self._keyChunks[index:]:
+            if first >= stop:
+                break
+            chunks.append((first, blob, offsets, max(start - first, 0), min(stop - first, len(offsets) - 1)))
+        return chunks
+
+    def isAlive(self, row):
+        return bool(self._alive[row])
+
+    def hasRemoved(self):
+        return self._removedCount > 0
+
+    def findRow(self, path):
+        """ Live row holding path, or -1 """
+        folder, name = os.path.split(path)
+        index = self._dirIndex.get(folder)
+        if index is None:
+            return -1
+        if self._folderRows is None:
+            self._folderRows = {}
+            for row, folder_index in enumerate(self._dirOf):
+                self._folderRows.setdefault(folder_index, array('I')).append(row)
+        for row in self._folderRows.get(index, ()):
+            if self._alive[row] and self.name(row) == name:
+                return row
+        return -1
+
+    def remove(self, row):
+        if self._alive[row]:
+            self._alive[row] = 0
+            self._removedCount += 1
+
+    def match(self, term, start=0, stop=None):
+        """ Live rows in start..stop whose lowercased path contains term """
+        rows = array('I')
+        needle = term.lower().replace('\0', '').encode('utf-8', 'surrogatepass')
+        if not needle:
+            rows.extend(range(start, len(self) if stop is None else min(stop, len(self))))
+            return self.dropRemoved(rows)
+        for first, blob, offsets, low, high in self.keyChunks(start, stop):
+            pos = offsets[low]
+            end = offsets[high]
+            while True:
+                pos = blob.find(needle, pos, end)
+                if pos < 0:
+                    break
+                row = bisect_right(offsets, pos) - 1
+                rows.append(first + row)
+                pos = offsets[row + 1]
+        return self.dropRemoved(rows)
+
+    def dropRemoved(self, rows):
+        if not self._removedCount:
+            return rows
+        alive = self._alive
+        return array('I', [row for row in rows if alive[row]])
@@ -0,0 +1,118 @@
+""" Memory-mapped random access to the lines of arbitrarily large text files, for the preview pane """
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+
+class MappedTextFile:
+    """ Maps a file read-only and indexes newline counts per fixed-size block so any line can be found quickly """
+
+    # Bytes per index block; the index costs 8 bytes per block (32k entries for a 2 GB file)
+    BLOCK_SIZE = 64 * 1024
+    # Bytes read per step of the background scan
+    SCAN_CHUNK = 64 * BLOCK_SIZE
+    # Longer lines are cut short for display
+    MAX_LINE_BYTES = 4096
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        except Exception:
+            self._file.close()
+            raise
+        # _newlines[b] is the number of newlines before byte b * BLOCK_SIZE
+        self._newlines = array('Q', [0])
+        self._scanned = 0
+        self.complete = self.size == 0
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def build(self, is_cancelled=None, progress=None):
+        """ Scans the file for newlines; returns False when cancelled. Lines become available as the scan advances """
+        block = self.BLOCK_SIZE
+        while self._scanned < self.size:
+            if is_cancelled is not None and is_cancelled():
+                return False
+            chunk = self._map[self._scanned:self._scanned + self.SCAN_CHUNK]
+            total = self._newlines[-1]
+            for start in range(0, len(chunk), block):
+                total += chunk.count(b'\n', start, start + block)
+                if start + block <= len(chunk):
+                    self._newlines.append(total)
+            self._scanned += len(chunk)
+            if self._scanned == self.size and self.size % block:
+                self._newlines.append(total)
+            if progress is not None:
+                progress(self._scanned * 100 // self.size)
+        self.complete = True
+        return True
+
+    def refresh(self):
+        """ Remaps a fully indexed file that has grown since (one still being appended to) and indexes the new bytes.
+
+        Returns whether it grew.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self.size:
+            return False
+        if self.size % self.BLOCK_SIZE:
+            # The last block was partial; scan it again now that it has more bytes
+            self._newlines.pop()
+            self._scanned = (len(self._newlines) - 1) * self.BLOCK_SIZE
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = size
+        self.complete = False
+        self.build()
+        return True
+
+    def progress(self):
+        return 100 if self.complete else self._scanned * 100 // self.size
+
+    def lineCount(self):
+        """ Lines known so far; final once complete """
+        newlines = self._newlines[-1]
+        if self.complete and self.size and self._map[self.size - 1] != ord('\n'):
+            newlines += 1
+        return newlines
+
+    def lineOffset(self, line):
+        """ Byte offset where line (0-based) starts """
+        if line <= 0:
+            return 0
+        # Block holding the newline that ends line - 1
+        block = bisect_left(self._newlines, line) - 1
+        position = block * self.BLOCK_SIZE
+        for _ in range(line - self._newlines[block]):
+            position = self._map.find(b'\n', position) + 1
+        return position
+
+    def lines(self, first, count):
+        """ Decoded text of up to count lines starting at line first """
+        count = min(count, self.lineCount() - first)
+        if count <= 0 or self._map is None:
+            return []
+        result = []
+        position = self.lineOffset(first)
+        for line in range(first, first + count):
+            end = self._map.find(b'\n', position, position + self.MAX_LINE_BYTES + 1)
+            if end == -1:
+                end = min(self.size, position + self.MAX_LINE_BYTES)
+                data = self._map[position:end]
+                next_position = self.lineOffset(line + 1) if end < self.size else self.size
+            else:
+                data = self._map[position:end]
+                next_position = end + 1
+            result.append(data.decode(self.encoding, errors='replace').rstrip('\r').expandtabs())
+            position = next_position
+        return result
@@ -0,0 +1,136 @@
+""" Classifies files as binary or text from their first few KB and picks the encoding to decode them with """
+
+import codecs
+import io
+import os
+import threading
+
+# Bytes inspected per file
+SNIFF_SIZE = 8192
+
+# Checked longest first so the UTF-32 LE BOM is not mistaken for UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Control bytes that still occur in ordinary text: backspace, tab, newline, form feed, carriage return, escape
+TEXT_CONTROL_BYTES = frozenset(b'\b\t\n\f\r\x1b')
+NON_TEXT_BYTES = bytes(b for b in range(32) if b not in TEXT_CONTROL_BYTES) + b'\x7f'
+
+class BinaryFileError(ValueError):
+    """ Raised instead of reading a file that was classified as binary """
+
+    def __init__(self, file_path):
+        super().__init__(f"{os.path.basename(file_path)} looks like a binary file")
+        self.file_path = file_path
+
+def _utf16_without_bom(head):
+    """ 'utf-16-le' / 'utf-16-be' for mostly-ASCII UTF-16 text without a BOM, else None """
+    even, odd = head[0::2], head[1::2]
+    if len(odd) < 2:
+        return None
+    if odd.count(0) >= 0.7 * len(odd) and even.count(0) == 0:
+        return 'utf-16-le'
+    if even.count(0) >= 0.7 * len(even) and odd.count(0) == 0:
+        return 'utf-16-be'
+    return None
+
+def sniff_encoding(head):
+    """ Encoding for a file starting with head, or None when it looks binary """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b'\0' in head:
+        return _utf16_without_bom(head)
+    if len(head.translate(None, NON_TEXT_BYTES)) < 0.9 * len(head):
+        return None
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the sniff window is still UTF-8
+        if e.reason != 'unexpected end of data':
+            return 'latin-1'
+    return 'utf-8'
+
+class FileClassifier:
+    """ Caches sniffed encodings per (path, size, mtime) so files that have not changed are not sniffed again """
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _lookup(self, file_path, stat):
+        cached = self._cache.get(file_path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached
+        return None
+
+    def _store(self, file_path, stat, encoding):
+        with self._lock:
+            if len(self._cache) >= self.max_entries and file_path not in self._cache:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self._cache[next(iter(self._cache))]
+            self._cache[file_path] = (stat.st_size, stat.st_mtime_ns, encoding)
+
+    def classifyOpen(self, f, file_path):
+        """ Encoding (or None for binary) of the binary stream f, which is left positioned at the start """
+        stat = os.fstat(f.fileno())
+        cached = self._lookup(file_path, stat)
+        if cached is not None:
+            return cached[2]
+        encoding = sniff_encoding(f.read(SNIFF_SIZE))
+        f.seek(0)
+        self._store(file_path, stat, encoding)
+        return encoding
+
+    def encoding(self, file_path):
+        """ Encoding of file_path, or None when it looks binary """
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            archives = _archives_for(file_path)
+            if archives is None:
+                raise
+            with archives.open(file_path) as member:
+                return sniff_encoding(member.read(SNIFF_SIZE))
+        with f:
+            return self.classifyOpen(f, file_path)
+
+    def openText(self, file_path):
+        """ Opens file_path (or an archive member) for reading as text in its sniffed encoding; raises
+        BinaryFileError for binaries """
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            archives = _archives_for(file_path)
+            if archives is None:
+                raise
+            return archives.openText(file_path)
+        try:
+            encoding = self.classifyOpen(f, file_path)
+            if encoding is None:
+                raise BinaryFileError(file_path)
+            return io.TextIOWrapper(f, encoding=encoding, errors='replace')
+        except BaseException:
+            f.close()
+            raise
+
+def _archives_for(file_path):
+    """ The archive index to read file_path from when it is an archive member, else None """
+    from parsing_tool.archives import default_archive_index, split_member_path
+    return default_archive_index if split_member_path(file_path) is not None else None
+
+# Shared by the GUI, the CLI and the parse engine
+default_classifier = FileClassifier()
+
+def open_text_file(file_path, classifier=None):
+    return (classifier or default_classifier).openText(file_path)
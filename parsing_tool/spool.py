@@ -0,0 +1,47 @@
+""" Append-only temporary backing file for parse output that has outgrown the in-memory view """
+
+import os
+import shutil
+import tempfile
+
+class ParseSpool:
+    """ UTF-8 temporary file that parse output is appended to and read back from (view, save, copy).
+
+    Text is written with newline='' so the file holds exactly the '\\n' line ends MappedTextFile indexes. The file is
+    removed on close.
+    """
+
+    def __init__(self, folder=None):
+        fd, self.path = tempfile.mkstemp(prefix='parsing-tool-', suffix='.txt', dir=folder)
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape', newline='')
+
+    def append(self, text):
+        self._file.write(text)
+
+    def flush(self):
+        """ Makes everything appended so far visible to readers of path """
+        self._file.flush()
+
+    @property
+    def size(self):
+        """ Bytes appended so far """
+        self.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def read(self):
+        self.flush()
+        with open(self.path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            return f.read()
+
+    def copyTo(self, destination):
+        self.flush()
+        shutil.copyfile(self.path, destination)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
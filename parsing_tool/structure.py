@@ -0,0 +1,159 @@
+""" Indented folder tree text for Copy File Structure: sorted, depth-limited, capped per folder, optionally annotated """
+
+import os
+import threading
+
+from parsing_tool.core import iter_directory_listings
+from parsing_tool.sniff import default_classifier
+
+INDENT = ' ' * 4
+LINE_COUNT_CHUNK = 1024 * 1024
+
+class StructureOptions:
+    """ max_depth: folder levels expanded below the root (None = all); max_entries: files, and separately
+    subfolders, listed per folder before the rest is summarised (None = all) """
+
+    def __init__(self, sort=True, max_depth=None, max_entries=None, sizes=False, line_counts=False):
+        self.sort = sort
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.sizes = sizes
+        self.line_counts = line_counts
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+
+def count_lines(file_path, encoding):
+    """ Line count of a text file read in chunks, a final line without a newline included; wide encodings are
+    decoded, the rest counted as bytes """
+    if encoding.startswith(('utf-16', 'utf-32')):
+        f = default_classifier.openText(file_path)
+        newline, empty = '\n', ''
+    else:
+        f = open(file_path, 'rb')
+        newline, empty = b'\n', b''
+    count = 0
+    last = empty
+    with f:
+        for chunk in iter(lambda: f.read(LINE_COUNT_CHUNK), empty):
+            count += chunk.count(newline)
+            last = chunk
+    return count + 1 if last and not last.endswith(newline) else count
+
+def more(count, noun):
+    return f"… {count:,} more {noun}{'' if count == 1 else 's'}"
+
+class LineCountCache:
+    """ Line counts per (path, size, mtime) so repeat renders only read files that changed """
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def lineCount(self, file_path, stat):
+        """ Number of lines, or None for binary files """
+        cached = self._counts.get(file_path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        encoding = default_classifier.encoding(file_path)
+        count = count_lines(file_path, encoding) if encoding is not None else None
+        with self._lock:
+            if len(self._counts) >= self.max_entries and file_path not in self._counts:
+                del self._counts[next(iter(self._counts))]
+            self._counts[file_path] = (stat.st_size, stat.st_mtime_ns, count)
+        return count
+
+class StructureRenderer:
+    """ Renders the tree of a folder from any lister (plain os.scandir walk, cached listings, ignore rules).
+
+    Folders are walked depth first, so a folder's summary lines ("... 4,812 more files") are emitted once the walk
+    has left it. folders and files count what the last render listed.
+    """
+
+    def __init__(self, options=None, line_counts=None):
+        self.options = options or StructureOptions()
+        self.lineCounts = line_counts or LineCountCache()
+        self.folders = 0
+        self.files = 0
+
+    def _annotation(self, file_path):
+        options = self.options
+        if not (options.sizes or options.line_counts):
+            return ''
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return ''
+        details = []
+        if options.sizes:
+            details.append(format_size(stat.st_size))
+        if options.line_counts:
+            try:
+                lines = self.lineCounts.lineCount(file_path, stat)
+            except OSError:
+                lines = None
+            details.append('binary' if lines is None else f"{lines:,} line{'' if lines == 1 else 's'}")
+        return f" ({', '.join(details)})"
+
+    @staticmethod
+    def _level(folder, root):
+        relative = os.path.relpath(root, folder)
+        return 0 if relative == os.curdir else relative.count(os.sep) + 1
+
+    def render(self, folder, lister=iter_directory_listings, is_cancelled=None, progress=None):
+        """ Tree text of folder, or None when cancelled """
+        options = self.options
+        self.folders = 0
+        self.files = 0
+        lines = []
+        # (level, line) summaries of folders whose subfolders are still being walked
+        pending = []
+        for root, files, subdirs in lister(folder, is_cancelled):
+            if is_cancelled is not None and is_cancelled():
+                return None
+            level = self._level(folder, root)
+            while pending and pending[-1][0] >= level:
+                lines.append(pending.pop()[1])
+            indent = INDENT * level
+            lines.append(f"{indent}{os.path.basename(os.path.normpath(root)) or root}/")
+            self.folders += 1
+            if options.sort:
+                files = sorted(files, key=str.casefold)
+                # Sorted in place: the walk follows this list, so the subfolders come out in order too
+                subdirs.sort(key=str.casefold)
+            shown_files = files if options.max_entries is None else files[:options.max_entries]
+            for name in shown_files:
+                lines.append(f"{indent}{INDENT}{name}{self._annotation(os.path.join(root, name))}")
+            self.files += len(shown_files)
+            if len(files) > len(shown_files):
+                lines.append(f"{indent}{INDENT}{more(len(files) - len(shown_files), 'file')}")
+            if options.max_depth is not None and level >= options.max_depth:
+                # Not expanded: list the subfolder names only
+                shown_dirs = subdirs if options.max_entries is None else subdirs[:options.max_entries]
+                lines.extend(f"{indent}{INDENT}{name}/" for name in shown_dirs)
+                hidden_dirs = len(subdirs) - len(shown_dirs)
+                del subdirs[:]
+            else:
+                hidden_dirs = 0
+                if options.max_entries is not None and len(subdirs) > options.max_entries:
+                    hidden_dirs = len(subdirs) - options.max_entries
+                    del subdirs[options.max_entries:]
+            if hidden_dirs:
+                summary = f"{indent}{INDENT}{more(hidden_dirs, 'folder')}"
+                if subdirs:
+                    pending.append((level, summary))
+                else:
+                    lines.append(summary)
+            if progress is not None and self.folders % 500 == 0:
+                progress(self.folders)
+        while pending:
+            lines.append(pending.pop()[1])
+        return '\n'.join(lines)
+
+def render_structure(folder, lister=iter_directory_listings, options=None):
+    return StructureRenderer(options).render(folder, lister)
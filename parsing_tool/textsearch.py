@@ -0,0 +1,36 @@
+""" Find-in-view matching: compiles the find bar options and locates matches in Qt (UTF-16) positions """
+
+import re
+from array import array
+from bisect import bisect_left
+
+# Characters outside the BMP take two UTF-16 code units in a QTextDocument but one index in a Python str
+ASTRAL_CHARS = re.compile('[\U00010000-\U0010FFFF]')
+
+def compile_search(term, case_sensitive=False, regex=False):
+    """ Pattern for the find bar's term and options, or None for an empty term; re.error for a bad regex """
+    if not term:
+        return None
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(term if regex else re.escape(term), flags | re.MULTILINE)
+
+def find_matches(text, pattern, limit=None):
+    """ (starts, lengths, capped) of pattern's non-empty matches in text, positions in UTF-16 code units.
+
+    Scanning stops after limit matches; capped tells whether more were left.
+    """
+    starts = array('Q')
+    lengths = array('L')
+    astral = [m.start() for m in ASTRAL_CHARS.finditer(text)] if not text.isascii() else []
+    for m in pattern.finditer(text):
+        start, end = m.span()
+        if start == end:
+            continue
+        if limit is not None and len(starts) >= limit:
+            return starts, lengths, True
+        if astral:
+            start += bisect_left(astral, start)
+            end += bisect_left(astral, end)
+        starts.append(start)
+        lengths.append(end - start)
+    return starts, lengths, False
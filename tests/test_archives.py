@@ -0,0 +1,149 @@
+import io
+import os
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from parsing_tool import archives
+from parsing_tool.archives import ArchiveIndex, archive_lister, split_member_path
+from parsing_tool.core import iter_directory_listings
+from parsing_tool.parsers import XmlParser
+from parsing_tool.sniff import BinaryFileError
+
+MEMBERS = {'a.log': b'alpha\n', 'sub/b.log': b'beta\n', 'sub/deep/c.log': b'gamma\n'}
+
+@pytest.fixture
+def index(tmp_path):
+    index = ArchiveIndex(str(tmp_path / 'archives.sqlite3'))
+    yield index
+    index.close()
+
+def make_tar(path, members, mode='w:gz'):
+    with tarfile.open(path, mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+@pytest.mark.parametrize('suffix', ['.zip', '.tar', '.tar.gz', '.tar.xz'])
+def test_members_are_listed_and_read(tmp_path, index, suffix):
+    path = str(tmp_path / ('bundle' + suffix))
+    if suffix == '.zip':
+        make_zip(path, MEMBERS)
+    else:
+        make_tar(path, MEMBERS, 'w' if suffix == '.tar' else 'w:' + suffix.rsplit('.', 1)[1])
+
+    listings = list(index.iterListings(path))
+    assert listings[0] == (path, ['a.log'], ['sub'])
+    assert listings[1] == (os.path.join(path, 'sub'), ['b.log'], ['deep'])
+    for name, data in MEMBERS.items():
+        assert index.read(os.path.join(path, *name.split('/'))) == data
+    # Reads out of archive order still find every member
+    for name, data in reversed(list(MEMBERS.items())):
+        assert index.read(os.path.join(path, *name.split('/'))) == data
+
+def test_split_member_path(tmp_path):
+    bundle = tmp_path / 'logs.tar.gz'
+    bundle.write_bytes(b'')
+    assert split_member_path(os.path.join(str(bundle), 'var', 'app.log')) == (str(bundle), 'var/app.log')
+    assert split_member_path(str(bundle)) is None
+    assert split_member_path(os.path.join(str(tmp_path), 'missing.zip', 'a.log')) is None
+
+def test_index_is_reused_from_disk_until_the_archive_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, MEMBERS)
+    cache = str(tmp_path / 'archives.sqlite3')
+    assert set(ArchiveIndex(cache).members(path)) == set(MEMBERS)
+
+    scans = []
+    monkeypatch.setattr(archives, 'scan_members', lambda *args: scans.append(args) or [])
+    assert set(ArchiveIndex(cache).members(path)) == set(MEMBERS)
+    assert scans == []
+
+    make_tar(path, {'other.log': b'other\n'})
+    os.utime(path, ns=(0, 0))
+    assert ArchiveIndex(cache).members(path) == {}
+    assert len(scans) == 1
+
+def test_rewritten_archive_is_reopened(tmp_path, index):
+    path = str(tmp_path / 'bundle.zip')
+    make_zip(path, {'a.log': b'old\n'})
+    member = os.path.join(path, 'a.log')
+    assert index.read(member) == b'old\n'
+    make_zip(path, {'a.log': b'new contents\n'})
+    assert index.read(member) == b'new contents\n'
+
+def test_compressed_tar_member_is_streamed(tmp_path, index, monkeypatch):
+    monkeypatch.setattr(archives, 'LOOKAHEAD_MEMBER_BYTES', 1024)
+    big = b'line of a large member\n' * 10000
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, {'big.log': big, 'small.log': b'small\n'})
+    member = os.path.join(path, 'big.log')
+
+    with index.open(member) as f:
+        assert not isinstance(f, io.BytesIO)
+        assert f.read(5) == b'line '
+        chunks = [b'line ']
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    assert b''.join(chunks) == big
+    # The stream is free again once the member is closed
+    assert index.read(os.path.join(path, 'small.log')) == b'small\n'
+
+def test_sniffed_small_member_is_not_decompressed_twice(tmp_path, index, monkeypatch):
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, MEMBERS)
+    member = os.path.join(path, 'sub', 'b.log')
+    with index.open(member) as f:
+        f.read(2)
+    opened = []
+    original = tarfile.open
+    monkeypatch.setattr(tarfile, 'open', lambda *args, **kwargs: opened.append(args) or original(*args, **kwargs))
+    assert index.read(member) == b'beta\n'
+    assert opened == []
+
+def test_closing_waits_for_a_member_being_read(tmp_path, index):
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, MEMBERS)
+    f = index.open(os.path.join(path, 'a.log'))
+    closer = threading.Thread(target=index.close)
+    closer.start()
+    closer.join(0.2)
+    assert closer.is_alive()
+    assert f.read() == b'alpha\n'
+    f.close()
+    closer.join(5)
+    assert not closer.is_alive()
+
+def test_open_text_rejects_binary_members(tmp_path, index):
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, {'text.log': 'café\n'.encode('utf-8'), 'blob.bin': bytes(range(256)) * 4})
+    with index.openText(os.path.join(path, 'text.log')) as f:
+        assert f.read() == 'café\n'
+    with pytest.raises(BinaryFileError):
+        index.openText(os.path.join(path, 'blob.bin'))
+
+def test_xml_parser_reads_compressed_tar_members(tmp_path, index, monkeypatch):
+    monkeypatch.setattr(archives, 'default_archive_index', index)
+    path = str(tmp_path / 'bundle.tar.gz')
+    make_tar(path, {'doc.xml': b'<root><item>one</item><item>two</item></root>'})
+    assert list(XmlParser(['item/text()']).records(os.path.join(path, 'doc.xml'))) == ['one', 'two']
+
+def test_archive_lister_shows_archives_as_folders(tmp_path, index):
+    folder = tmp_path / 'logs'
+    folder.mkdir()
+    (folder / 'top.log').write_text('top\n')
+    bundle = str(folder / 'bundle.zip')
+    make_zip(bundle, {'a.log': b'a\n'})
+    listings = list(archive_lister(iter_directory_listings, index)(str(folder)))
+    assert listings == [(str(folder), ['top.log'], ['bundle.zip']), (bundle, ['a.log'], [])]
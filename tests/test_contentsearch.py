@@ -0,0 +1,46 @@
+import os
+
+from parsing_tool.contentsearch import ContentIndex, required_literals
+
+def test_search_finds_text_in_utf16_files(tmp_path):
+    folder = tmp_path / 'logs'
+    folder.mkdir()
+    (folder / 'wide.log').write_text("first line\nNeedle in UTF-16\n", encoding='utf-16')
+    (folder / 'plain.log').write_text("no match here\n", encoding='utf-8')
+    (folder / 'blob.bin').write_bytes(b'\x00\x01Needle\x00')
+    index = ContentIndex(str(folder), path=str(tmp_path / 'index.sqlite3'))
+    index.update()
+    hits = index.search('needle')
+    assert [(hit.path, hit.line_number, hit.line) for hit in hits] == [
+        (str(folder / 'wide.log'), 2, "Needle in UTF-16")]
+
+def make_index(tmp_path, files):
+    folder = tmp_path / 'logs'
+    folder.mkdir()
+    for name, text in files.items():
+        (folder / name).write_text(text, encoding='utf-8')
+    index = ContentIndex(str(folder), path=str(tmp_path / 'index.sqlite3'))
+    index.update()
+    return folder, index
+
+def test_case_insensitive_search_folds_non_ascii_text(tmp_path):
+    folder, index = make_index(tmp_path, {'de.log': "Kein ÄRGER heute\n", 'en.log': "no trouble\n"})
+    for query in ('ÄRGER', 'ärger', 'Ärger'):
+        assert [hit.path for hit in index.search(query)] == [str(folder / 'de.log')]
+    assert [hit.path for hit in index.search('ärger', case_sensitive=True)] == []
+
+def test_inline_flags_disable_literal_narrowing(tmp_path):
+    folder, index = make_index(tmp_path, {'a.log': "foobar\n", 'b.log': "nothing\n"})
+    assert required_literals('(?x) foo  bar # comment', regex=True) == []
+    assert [hit.line for hit in index.search('(?x) foo  bar # comment', regex=True)] == ["foobar"]
+
+def test_rebuild_reports_progress_and_its_own_counts(tmp_path):
+    folder, index = make_index(tmp_path, {f"f{i}.log": f"line {i}\n" for i in range(1100)})
+    for i in range(1, 1100):
+        os.remove(folder / f"f{i}.log")
+    reported = []
+    # Tombstones now outnumber live files: the rebuild re-indexes the one file left, reporting its progress
+    assert index.update(progress=reported.append) == (1, 0)
+    assert reported[-1] == 1
+    assert [hit.path for hit in index.search('line 0')] == [str(folder / 'f0.log')]
+    assert index.update() == (0, 0)
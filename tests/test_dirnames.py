@@ -0,0 +1,52 @@
+import os
+
+from parsing_tool import dirnames
+from parsing_tool.dirnames import DirectoryNameIndex, with_ancestors
+
+def make_dirs(root, *paths):
+    for path in paths:
+        (root / path).mkdir(parents=True, exist_ok=True)
+
+def build(root):
+    index = DirectoryNameIndex(str(root))
+    assert index.build()
+    return index
+
+def test_index_holds_every_directory_once(tmp_path):
+    make_dirs(tmp_path, 'logs/app/old', 'logs/web', 'src/app')
+    (tmp_path / 'logs' / 'file.log').write_text('not a folder\n')
+    index = build(tmp_path)
+    assert index.complete
+    assert len(index) == 6
+    assert sorted(index.path(row) for row in range(len(index))) == sorted(
+        os.path.join(str(tmp_path), *path.split('/')) for path in
+        ('logs', 'logs/app', 'logs/app/old', 'logs/web', 'src', 'src/app'))
+
+def test_search_by_name_with_limit(tmp_path):
+    make_dirs(tmp_path, 'logs/app/old', 'logs/web', 'src/app')
+    index = build(tmp_path)
+    paths, total = index.search('app')
+    assert total == 2
+    assert sorted(paths) == [os.path.join(str(tmp_path), 'logs', 'app'), os.path.join(str(tmp_path), 'src', 'app')]
+    paths, total = index.search('app', limit=1)
+    assert len(paths) == 1 and total == 2
+    assert index.search('lgsold', fuzzy=True)[0] == []
+    assert index.search('old', fuzzy=True)[0] == [os.path.join(str(tmp_path), 'logs', 'app', 'old')]
+
+def test_build_can_be_cancelled_and_skips_pseudo_filesystems(tmp_path, monkeypatch):
+    make_dirs(tmp_path, *(f'd{i}/sub' for i in range(30)))
+    index = DirectoryNameIndex(str(tmp_path))
+    assert not index.build(is_cancelled=lambda: True)
+    assert not index.complete
+
+    monkeypatch.setattr(dirnames, 'PSEUDO_FILESYSTEMS', (str(tmp_path / 'd0'),))
+    index = build(tmp_path)
+    # The pseudo filesystem is skipped with everything below it
+    assert len(index) == 58
+    assert not index.search('d0')[0]
+
+def test_with_ancestors_stops_at_root(tmp_path):
+    root = str(tmp_path)
+    deep = os.path.join(root, 'a', 'b', 'c')
+    assert with_ancestors([deep], root) == {root, os.path.join(root, 'a'), os.path.join(root, 'a', 'b'), deep}
+    assert with_ancestors([], root) == {root}
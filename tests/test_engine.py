@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from parsing_tool.engine import ParseEngine, read_text_file
+from parsing_tool.sniff import BinaryFileError
+
+def test_results_come_back_in_input_order():
+    # Early files take longest, so they finish last
+    def reader(name):
+        time.sleep(0.002 * (20 - int(name)))
+        return name.upper()
+
+    files = [str(i) for i in range(20)]
+    results = list(ParseEngine(max_workers=4, max_in_flight=8, reader=reader).iterResults(files))
+    assert [(index, path, content) for index, path, content, _ in results] == \
+        [(i, str(i), str(i)) for i in range(20)]
+
+def test_in_flight_reads_are_bounded():
+    lock = threading.Lock()
+    pending = 0
+    peak = 0
+
+    def reader(path):
+        nonlocal pending, peak
+        with lock:
+            pending += 1
+            peak = max(peak, pending)
+        time.sleep(0.001)
+        with lock:
+            pending -= 1
+        return path
+
+    consumed = 0
+
+    def files():
+        # The input is pulled no further than the window ahead of the consumer (the refill comes before each yield)
+        for i in range(40):
+            assert i <= consumed + 6
+            yield i
+
+    engine = ParseEngine(max_workers=3, max_in_flight=6, reader=reader)
+    for _ in engine.iterResults(files()):
+        consumed += 1
+    assert consumed == 40
+    assert peak <= 3
+
+def test_errors_are_returned_per_file():
+    def reader(path):
+        if path == 'bad':
+            raise OSError('unreadable')
+        return path
+
+    results = list(ParseEngine(reader=reader).iterResults(['a', 'bad', 'c']))
+    assert [content for _, _, content, _ in results] == ['a', None, 'c']
+    assert isinstance(results[1][3], OSError)
+    assert results[0][3] is None
+
+def test_cancel_stops_the_results():
+    engine = ParseEngine(max_workers=2, max_in_flight=4, reader=lambda path: path)
+    seen = []
+    for _, path, _, _ in engine.iterResults(range(100)):
+        seen.append(path)
+        if len(seen) == 3:
+            engine.cancel()
+    assert seen == [0, 1, 2]
+    assert engine.isCancelled()
+
+def test_read_text_file_decodes_and_rejects_binaries(tmp_path):
+    text = tmp_path / 'a.log'
+    text.write_bytes('héllo\n'.encode('utf-16'))
+    assert read_text_file(str(text)) == 'héllo\n'
+    binary = tmp_path / 'b.bin'
+    binary.write_bytes(bytes(range(256)) * 8)
+    with pytest.raises(BinaryFileError):
+        read_text_file(str(binary))
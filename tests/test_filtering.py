@@ -0,0 +1,43 @@
+import os
+
+from parsing_tool.filtering import filter_rows, parse_query, rank_rows
+from parsing_tool.pathstore import CompactPathStore
+
+PATHS = [os.path.join('src', 'server', 'main.py'), os.path.join('src', 'client', 'main.py'),
+         os.path.join('docs', 'server.md'), os.path.join('src', 'server', 'util.py'),
+         os.path.join('logs', 'smain.log')]
+
+def make_store(paths=PATHS):
+    store = CompactPathStore()
+    store.extend(paths)
+    return store
+
+def test_parse_query_splits_exclusions():
+    assert parse_query('Server -Test !tmp -') == (['server', '-'], ['test', 'tmp'])
+
+def test_substring_terms_intersect_in_store_order():
+    store = make_store()
+    assert list(filter_rows(store, 'server')) == [0, 2, 3]
+    assert list(filter_rows(store, 'SRC py')) == [0, 1, 3]
+    assert list(filter_rows(store, 'src -server')) == [1]
+    assert list(filter_rows(store, 'main', start=1, stop=4)) == [1]
+
+def test_fuzzy_ranks_file_name_matches_first_and_caps():
+    store = make_store()
+    rows = filter_rows(store, 'main', fuzzy=True)
+    assert set(rows) == {0, 1, 4}
+    # Word-start matches in the file name beat a match inside one
+    assert rows[-1] == 4
+    assert len(filter_rows(store, 'py', fuzzy=True, limit=2)) == 2
+    assert list(filter_rows(store, 'srvmn', fuzzy=True)) == [0]
+
+def test_cancelled_filter_returns_none():
+    assert filter_rows(make_store(), 'main', fuzzy=True, is_cancelled=lambda: True) is None
+
+def test_rank_rows_merges_separately_ranked_parts():
+    store = make_store()
+    whole = filter_rows(store, 'main', fuzzy=True)
+    parts = list(filter_rows(store, 'main', fuzzy=True, stop=3)) + list(filter_rows(store, 'main', fuzzy=True, start=3))
+    parts.reverse()
+    assert rank_rows(store, 'main', parts) == whole
+    assert list(rank_rows(store, 'main', parts, limit=1)) == [whole[0]]
@@ -0,0 +1,99 @@
+import os
+
+from parsing_tool.follow import FileFollower, FollowUpdate
+
+def follow(path, offset=None):
+    follower = FileFollower()
+    follower.follow(str(path), offset)
+    return follower
+
+def test_only_appended_complete_lines_are_returned(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text('old line\n')
+    follower = follow(log)
+    assert follower.poll() == []
+    with open(log, 'a') as f:
+        f.write('new line\npart')
+    assert follower.poll() == [FollowUpdate(str(log), 'new line\n', None)]
+    assert follower.poll() == []
+    with open(log, 'a') as f:
+        f.write('ial\n')
+    assert follower.poll() == [FollowUpdate(str(log), 'partial\n', None)]
+
+def test_follow_from_an_offset(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text('first\nsecond\n')
+    assert follow(log, 6).poll() == [FollowUpdate(str(log), 'second\n', None)]
+
+def test_truncated_file_is_read_again(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text('a long first line\npending')
+    follower = follow(log, 0)
+    assert follower.poll()[0].text == 'a long first line\n'
+    log.write_text('short\n')
+    assert follower.poll() == [FollowUpdate(str(log), 'pendingshort\n', 'truncated')]
+
+def test_rotated_file_is_read_from_the_start(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text('before\n')
+    follower = follow(log)
+    follower.poll()
+    os.rename(log, tmp_path / 'app.log.1')
+    log.write_text('after rotation\n')
+    assert follower.poll() == [FollowUpdate(str(log), 'after rotation\n', 'rotated')]
+
+def test_missing_file_is_reported_once(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text('line\n')
+    follower = follow(log)
+    follower.poll()
+    with open(log, 'a') as f:
+        f.write('unfinished')
+    follower.poll()
+    os.remove(log)
+    assert follower.poll() == [FollowUpdate(str(log), 'unfinished', 'missing')]
+    assert follower.poll() == []
+    log.write_text('back\n')
+    # A new file, unless the filesystem hands the old inode out again: then it merely looks shorter
+    [update] = follower.poll()
+    assert update.text == 'back\n' and update.event in ('rotated', 'truncated')
+
+def test_wide_encodings_decode_across_polls(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_bytes('héllo\n'.encode('utf-16'))
+    follower = follow(log, 0)
+    assert follower.poll() == [FollowUpdate(str(log), 'héllo\n', None)]
+    encoded = 'wörld\n'.encode('utf-16-le')
+    with open(log, 'ab') as f:
+        f.write(encoded[:3])
+    assert follower.poll() == []
+    with open(log, 'ab') as f:
+        f.write(encoded[3:])
+    assert follower.poll() == [FollowUpdate(str(log), 'wörld\n', None)]
+
+def test_binary_file_is_dropped(tmp_path):
+    blob = tmp_path / 'data.bin'
+    blob.write_bytes(bytes(range(256)) * 8)
+    follower = follow(blob, 0)
+    assert follower.poll() == []
+    assert len(follower) == 0
+
+def test_reads_are_capped_per_poll(tmp_path, monkeypatch):
+    log = tmp_path / 'app.log'
+    log.write_text('x' * 9 + '\n')
+    follower = follow(log, 0)
+    monkeypatch.setattr(FileFollower, 'READ_LIMIT', 4)
+    monkeypatch.setattr(FileFollower, 'MAX_PARTIAL', 100)
+    assert follower.poll() == [] and follower.poll() == []
+    assert follower.poll() == [FollowUpdate(str(log), 'x' * 9 + '\n', None)]
+
+def test_unfollow_and_order(tmp_path):
+    paths = [tmp_path / name for name in ('b.log', 'a.log', 'c.log')]
+    follower = FileFollower()
+    for path in paths:
+        path.write_text('')
+        follower.follow(str(path), 0)
+    follower.unfollow([str(paths[2])])
+    for path in paths:
+        path.write_text('x\n')
+    assert [update.path for update in follower.poll()] == [str(paths[0]), str(paths[1])]
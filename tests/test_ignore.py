@@ -0,0 +1,61 @@
+import os
+
+from parsing_tool.core import iter_directory_listings, iter_files
+from parsing_tool.ignore import IgnoreMatcher, IgnoreRules, split_patterns
+
+def make_tree(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+def walk(folder, matcher):
+    return sorted(os.path.relpath(path, folder).replace(os.sep, '/')
+                  for path in iter_files(folder, lister=matcher.lister(iter_directory_listings)))
+
+def test_split_patterns():
+    assert split_patterns(' *.log, *.txt;!build/  ! ') == (('*.log', '*.txt'), ('build/',))
+
+def test_rules_last_match_wins_and_negation_reincludes():
+    rules = IgnoreRules(['*.log', '!keep.log', '# comment', '', 'tmp/'])
+    assert rules.match('a.log') is True
+    assert rules.match('sub/keep.log') is False
+    assert rules.match('a.txt') is None
+    assert rules.match('tmp', is_dir=True) is True
+    assert rules.match('tmp') is None
+
+def test_anchored_and_double_star_patterns():
+    rules = IgnoreRules(['/root.txt', 'docs/**/*.md', 'file[0-9].txt', r'\#literal'])
+    assert rules.match('root.txt')
+    assert rules.match('sub/root.txt') is None
+    assert rules.match('docs/a.md') and rules.match('docs/x/y/b.md')
+    assert rules.match('other/docs/a.md') is None
+    assert rules.match('file3.txt') and rules.match('file.txt') is None
+    assert rules.match('#literal')
+
+def test_walk_honours_nested_ignore_files(tmp_path):
+    make_tree(tmp_path, {
+        '.gitignore': '*.tmp\nbuild/\n',
+        'a.log': '', 'a.tmp': '',
+        'build/out.log': '',
+        '.git/config': '',
+        'sub/.parsingignore': '!keep.tmp\n*.log\n',
+        'sub/keep.tmp': '', 'sub/other.tmp': '', 'sub/b.log': '', 'sub/c.txt': '',
+    })
+    assert walk(str(tmp_path), IgnoreMatcher(str(tmp_path))) == \
+        ['.gitignore', 'a.log', 'sub/.parsingignore', 'sub/c.txt', 'sub/keep.tmp']
+
+def test_include_and_exclude_globs(tmp_path):
+    make_tree(tmp_path, {'a.log': '', 'b.txt': '', 'skip/c.log': '', 'deep/d.log': ''})
+    matcher = IgnoreMatcher(str(tmp_path), include=['*.log'], exclude=['skip/'])
+    assert walk(str(tmp_path), matcher) == ['a.log', 'deep/d.log']
+    assert matcher.accepts(str(tmp_path / 'deep' / 'd.log'))
+    assert not matcher.accepts(str(tmp_path / 'skip' / 'c.log'))
+    assert not matcher.accepts(str(tmp_path / 'b.txt'))
+
+def test_prune_edits_subdirs_in_place(tmp_path):
+    make_tree(tmp_path, {'.gitignore': 'node_modules/\n*.pyc\n'})
+    subdirs = ['src', 'node_modules']
+    files = IgnoreMatcher(str(tmp_path)).prune(str(tmp_path), ['a.py', 'a.pyc'], subdirs)
+    assert files == ['a.py']
+    assert subdirs == ['src']
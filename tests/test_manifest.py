@@ -0,0 +1,71 @@
+import os
+import zipfile
+
+import pytest
+
+from parsing_tool import archives
+from parsing_tool.archives import ArchiveIndex, archive_lister
+from parsing_tool.core import iter_files
+from parsing_tool.manifest import diff_snapshot, snapshot_entries
+from parsing_tool.parsecache import ParseCache
+from parsing_tool.sniff import BinaryFileError
+
+@pytest.fixture
+def archive_index(tmp_path, monkeypatch):
+    index = ArchiveIndex(str(tmp_path / 'archives.sqlite3'))
+    monkeypatch.setattr(archives, 'default_archive_index', index)
+    yield index
+    index.close()
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, text in members.items():
+            archive.writestr(name, text)
+
+def test_diff_snapshot_includes_archive_members(tmp_path, archive_index):
+    folder = tmp_path / 'logs'
+    folder.mkdir()
+    (folder / 'top.log').write_text('top\n')
+    bundle = str(folder / 'bundle.zip')
+    make_zip(bundle, {'a.log': 'a\n', 'sub/b.log': 'b\n'})
+    lister = archive_lister(index=archive_index)
+    members = {os.path.join(bundle, 'a.log'), os.path.join(bundle, 'sub', 'b.log')}
+
+    first = diff_snapshot(iter_files(str(folder), lister=lister), {})
+    assert set(first.added) == members | {str(folder / 'top.log')}
+
+    second = diff_snapshot(iter_files(str(folder), lister=lister), first.entries)
+    assert second.added == second.modified == second.deleted == []
+
+    make_zip(bundle, {'a.log': 'a changed\n', 'sub/b.log': 'b\n'})
+    third = diff_snapshot(iter_files(str(folder), lister=lister), second.entries)
+    assert third.modified == [os.path.join(bundle, 'a.log')]
+    assert third.added == third.deleted == []
+
+def test_member_digest_matches_parse_cache(tmp_path, archive_index):
+    bundle = str(tmp_path / 'bundle.zip')
+    make_zip(bundle, {'a.log': 'a\n'})
+    member = os.path.join(bundle, 'a.log')
+    diff = diff_snapshot([member], {})
+    cache = ParseCache()
+    assert cache.read(member) == 'a\n'
+    assert tuple(cache.entry(member)) == tuple(diff.entries[member])
+
+def test_full_parse_snapshot_covers_files_the_cache_skipped(tmp_path):
+    folder = tmp_path / 'logs'
+    folder.mkdir()
+    (folder / 'app.log').write_text('text\n')
+    (folder / 'image.bin').write_bytes(b'\x00\x01\x02binary')
+    files = list(iter_files(str(folder)))
+    cache = ParseCache()
+    for file_path in files:
+        try:
+            cache.read(file_path)
+        except BinaryFileError:
+            pass
+    entries = snapshot_entries(files, cache.entry)
+    assert set(entries) == set(files)
+    assert entries[str(folder / 'app.log')] == tuple(cache.entry(str(folder / 'app.log')))
+
+    diff = diff_snapshot(iter_files(str(folder)), entries)
+    assert diff.added == diff.modified == diff.deleted == []
@@ -0,0 +1,19 @@
+from parsing_tool.engine import ParseEngine
+from parsing_tool.parsecache import ParseCache
+
+def test_counters_add_up_across_reader_threads(tmp_path):
+    files = []
+    for i in range(400):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text(f"file {i % 50}\n")
+        files.append(str(path))
+    cache = ParseCache()
+    for _ in range(3):
+        results = list(ParseEngine(max_workers=8, reader=cache.read).iterResults(files))
+        assert all(error is None for _, _, _, error in results)
+    stats = cache.stats()
+    # First pass: every file read and either decoded or served by content hash; later passes: all path hits
+    assert stats['misses'] + stats['hash_hits'] == 400
+    assert stats['misses'] >= 50
+    assert stats['hits'] == 800
+    assert stats['bytes_read'] == sum(len(f"file {i % 50}\n") for i in range(400))
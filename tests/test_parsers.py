@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+from parsing_tool.parsers import LogParser, build_parser_set, parse_log_time
+
+def write_log(tmp_path, text):
+    path = tmp_path / 'app.log'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_aware_bound_against_naive_log_lines(tmp_path):
+    # 13:00 local time, written as an offset-aware UTC bound
+    bound = datetime(2024, 1, 5, 13, 0).astimezone().astimezone(timezone.utc)
+    path = write_log(tmp_path, "2024-01-05 12:00 INFO before\n2024-01-05 14:00 INFO after\n")
+    parser = LogParser(since=bound)
+    assert list(parser.records(path)) == ["2024-01-05 14:00 INFO after"]
+
+def test_naive_bound_against_aware_log_lines(tmp_path):
+    local = datetime(2024, 1, 5, 13, 0).astimezone()
+    before = (local.replace(hour=12)).isoformat(timespec='minutes')
+    after = (local.replace(hour=14)).isoformat(timespec='minutes')
+    path = write_log(tmp_path, f"{before} INFO before\n{after} INFO after\n")
+    parser = LogParser(pattern=r'^(?P<time>\S+) (?P<level>\w+)', until=datetime(2024, 1, 5, 13, 0))
+    assert list(parser.records(path)) == [f"{before} INFO before"]
+
+def test_utc_designator_in_time_bound():
+    parsers = build_parser_set(since='2024-01-05T13:00Z')
+    assert parsers.parsers[0].since == datetime(2024, 1, 5, 13, 0, tzinfo=timezone.utc)
+    assert parse_log_time('2024-01-05 13:00:00,5') == datetime(2024, 1, 5, 13, 0, 0, 500000)
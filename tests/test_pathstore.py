@@ -0,0 +1,44 @@
+import os
+
+from parsing_tool.pathstore import CompactPathStore
+
+def make_store(*batches):
+    store = CompactPathStore()
+    for batch in batches:
+        store.extend(batch)
+    return store
+
+def test_paths_round_trip_across_batches():
+    paths = [os.path.join('logs', 'App.log'), os.path.join('logs', 'sub', 'b.txt'), os.path.join('other', 'café.log')]
+    store = make_store(paths[:2], [], paths[2:])
+    assert len(store) == 3
+    assert [store.path(row) for row in range(3)] == paths
+    assert store.name(2) == 'café.log'
+    assert store.key(0) == os.path.join('logs', 'app.log').encode()
+
+def test_match_is_case_insensitive_and_bounded():
+    store = make_store([os.path.join('a', 'Server.log'), os.path.join('b', 'client.log')],
+                       [os.path.join('c', 'server.txt')])
+    assert list(store.match('SERVER')) == [0, 2]
+    assert list(store.match('server', start=1)) == [2]
+    assert list(store.match('server', stop=2)) == [0]
+    assert list(store.match('')) == [0, 1, 2]
+    # A term never matches across two keys
+    assert list(store.match('log' + os.path.join('b', ''))) == []
+
+def test_removed_rows_keep_their_numbers():
+    store = make_store([os.path.join('a', 'x.log'), os.path.join('a', 'y.log'), os.path.join('b', 'x.log')])
+    assert store.findRow(os.path.join('a', 'y.log')) == 1
+    store.remove(1)
+    store.remove(1)
+    assert store.hasRemoved()
+    assert not store.isAlive(1)
+    assert store.findRow(os.path.join('a', 'y.log')) == -1
+    assert list(store.match('.log')) == [0, 2]
+    assert store.path(2) == os.path.join('b', 'x.log')
+
+def test_find_row_sees_rows_added_after_the_first_lookup():
+    store = make_store([os.path.join('a', 'x.log')])
+    assert store.findRow(os.path.join('a', 'z.log')) == -1
+    store.extend([os.path.join('a', 'z.log')])
+    assert store.findRow(os.path.join('a', 'z.log')) == 1
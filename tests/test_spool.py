@@ -0,0 +1,45 @@
+import gzip
+import os
+
+from parsing_tool.export import open_export
+from parsing_tool.spool import ParseSpool
+
+def test_spool_appends_reads_and_copies_text_as_written(tmp_path):
+    spool = ParseSpool(str(tmp_path))
+    try:
+        spool.append('first\n')
+        spool.append('sécond\r\nthird')
+        text = 'first\nsécond\r\nthird'
+        assert spool.read() == text
+        assert spool.size == len(text.encode('utf-8'))
+        copy = tmp_path / 'copy.txt'
+        spool.copyTo(str(copy))
+        assert copy.read_bytes() == text.encode('utf-8')
+    finally:
+        spool.close()
+
+def test_spool_keeps_undecodable_names(tmp_path):
+    spool = ParseSpool(str(tmp_path))
+    try:
+        spool.append('bad \udcff name\n')
+        assert spool.read() == 'bad � name\n'
+    finally:
+        spool.close()
+
+def test_spool_file_is_removed_on_close(tmp_path):
+    spool = ParseSpool(str(tmp_path))
+    spool.append('x')
+    path = spool.path
+    assert os.path.exists(path)
+    spool.close()
+    spool.close()
+    assert not os.path.exists(path)
+
+def test_export_writes_line_ends_like_the_spool(tmp_path):
+    text = 'a\nb\r\nc\n'
+    with open_export(str(tmp_path / 'out.txt')) as f:
+        f.write(text)
+    with open_export(str(tmp_path / 'out.txt.gz'), 'gzip') as f:
+        f.write(text)
+    assert (tmp_path / 'out.txt').read_bytes() == text.encode()
+    assert gzip.decompress((tmp_path / 'out.txt.gz').read_bytes()) == text.encode()
@@ -0,0 +1,37 @@
+import os
+
+from parsing_tool.structure import LineCountCache, StructureOptions, StructureRenderer, count_lines
+
+def test_count_lines_includes_unterminated_last_line(tmp_path):
+    cases = {'empty.txt': '', 'one.txt': 'hello', 'two.txt': 'hello\nworld', 'terminated.txt': 'hello\nworld\n'}
+    for name, text in cases.items():
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    (tmp_path / 'wide.txt').write_text('a\nb\nc', encoding='utf-16')
+    assert count_lines(str(tmp_path / 'empty.txt'), 'utf-8') == 0
+    assert count_lines(str(tmp_path / 'one.txt'), 'utf-8') == 1
+    assert count_lines(str(tmp_path / 'two.txt'), 'utf-8') == 2
+    assert count_lines(str(tmp_path / 'terminated.txt'), 'utf-8') == 2
+    assert count_lines(str(tmp_path / 'wide.txt'), 'utf-16') == 3
+
+def test_annotations_use_singular_for_one_line(tmp_path):
+    (tmp_path / 'a.txt').write_text('only line')
+    (tmp_path / 'b.txt').write_text('x\ny\n')
+    (tmp_path / 'c.bin').write_bytes(b'\x00\x01')
+    renderer = StructureRenderer(StructureOptions(line_counts=True), LineCountCache())
+    text = renderer.render(str(tmp_path))
+    assert text.splitlines() == [
+        os.path.basename(str(tmp_path)) + '/',
+        '    a.txt (1 line)',
+        '    b.txt (2 lines)',
+        '    c.bin (binary)',
+    ]
+
+def test_depth_and_entry_caps(tmp_path):
+    (tmp_path / 'sub' / 'deep').mkdir(parents=True)
+    for i in range(5):
+        (tmp_path / f"f{i}.log").write_text('x')
+    (tmp_path / 'sub' / 'deep' / 'hidden.log').write_text('x')
+    text = StructureRenderer(StructureOptions(max_depth=1, max_entries=2)).render(str(tmp_path))
+    assert 'f0.log' in text and 'f1.log' in text and 'f2.log' not in text
+    assert '3 more files' in text
+    assert 'hidden.log' not in text